@@ -1,13 +1,14 @@
 {
     "name": "CR POS Electronic Invoice Bridge",
     "summary": "Puente POS -> FE CR (Tiquete/Factura) reutilizando l10n_cr_einvoice",
-    "version": "19.0.1.1.2",
+    "version": "19.0.1.3.0",
     "category": "Point of Sale",
     "author": "FenixCr Solutions",
     "license": "LGPL-3",
     "depends": ["point_of_sale", "account", "l10n_cr_einvoice"],
     "data": [
         "security/ir.model.access.csv",
+        "security/pos_fe_security.xml",
         "data/cron.xml",
         "views/hacienda_pos_menu_views.xml",
         "views/pos_config_views.xml",
@@ -15,6 +16,8 @@
         "views/product_template_views.xml",
         "views/pos_order_views.xml",
         "views/pos_order_fe_report_views.xml",
+        "views/pos_fe_daily_summary_views.xml",
+        "views/pos_fe_bulk_job_views.xml",
         "reports/pos_order_report.xml",
     ],
     "assets": {
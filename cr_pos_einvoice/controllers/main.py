@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import content_disposition, request
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class PosFeReportController(http.Controller):
+    @http.route("/cr_pos_einvoice/fe_report/<int:wizard_id>/xlsx", type="http", auth="user", methods=["GET"])
+    def download_fe_report_xlsx(self, wizard_id, **kwargs):
+        """Build the FE report workbook in a temporary file and stream it back.
+
+        The file is unlinked as soon as it is open: the response keeps reading from
+        the open descriptor and the disk space is released when the download ends.
+        """
+        wizard = request.env["pos.order.fe.report.wizard"].browse(wizard_id).exists()
+        if not wizard:
+            raise request.not_found()
+        wizard.check_access("read")
+
+        fd, path = tempfile.mkstemp(prefix="cr_pos_fe_report_", suffix=".xlsx")
+        os.close(fd)
+        try:
+            wizard._write_report_xlsx(path)
+            report_file = open(path, "rb")  # noqa: SIM115 - closed by the response
+        finally:
+            os.unlink(path)
+
+        headers = [
+            ("Content-Type", XLSX_MIMETYPE),
+            ("Content-Length", str(os.fstat(report_file.fileno()).st_size)),
+            ("Content-Disposition", content_disposition(wizard._get_report_xlsx_filename())),
+        ]
+        return http.Response(
+            wrap_file(request.httprequest.environ, report_file),
+            headers=headers,
+            direct_passthrough=True,
+        )
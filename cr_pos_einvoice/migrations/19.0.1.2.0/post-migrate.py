@@ -0,0 +1,45 @@
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def migrate(cr, version):
+    """Move captured receipt HTML from the pos_order.cr_receipt_html column to gzip attachments."""
+    cr.execute(
+        """
+        SELECT 1
+          FROM information_schema.columns
+         WHERE table_name = 'pos_order' AND column_name = 'cr_receipt_html'
+        """
+    )
+    if not cr.fetchone():
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    PosOrder = env["pos.order"]
+    moved = 0
+    while True:
+        cr.execute(
+            """
+            SELECT id, cr_receipt_html
+              FROM pos_order
+             WHERE cr_receipt_html IS NOT NULL AND cr_receipt_html != ''
+             ORDER BY id
+             LIMIT %s
+            """,
+            (BATCH_SIZE,),
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+        for order_id, receipt_html in rows:
+            PosOrder.browse(order_id)._cr_store_receipt_html(receipt_html)
+        cr.execute("UPDATE pos_order SET cr_receipt_html = NULL WHERE id = ANY(%s)", ([row[0] for row in rows],))
+        moved += len(rows)
+
+    cr.execute("ALTER TABLE pos_order DROP COLUMN cr_receipt_html")
+    _logger.info("Moved captured receipt HTML of %s POS orders to compressed attachments.", moved)
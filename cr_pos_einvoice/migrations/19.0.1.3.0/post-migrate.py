@@ -0,0 +1,50 @@
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def _recompute_in_batches(env, model_name, field_names):
+    """Compute ``field_names`` of every record of ``model_name``, ``BATCH_SIZE`` records at a time."""
+    Model = env[model_name].with_context(active_test=False)
+    fields_to_compute = [Model._fields[name] for name in field_names]
+    env.cr.execute(f'SELECT id FROM "{Model._table}" ORDER BY id')
+    ids = [row[0] for row in env.cr.fetchall()]
+    for start in range(0, len(ids), BATCH_SIZE):
+        records = Model.browse(ids[start : start + BATCH_SIZE])
+        for field in fields_to_compute:
+            env.add_to_compute(field, records)
+        env.flush_all()
+        env.invalidate_all()
+    return len(ids)
+
+
+def migrate(cr, version):
+    """Fill the new stored FE amounts and build the daily FE summary from them."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    lines = _recompute_in_batches(env, "pos.order.line", ["cr_is_fe_charge_line"])
+    orders = _recompute_in_batches(
+        env,
+        "pos.order",
+        [
+            "cr_other_charges_amount",
+            "cr_other_charges_resolved_json",
+            "cr_tax_rate_display",
+            "cr_taxable_amount",
+            "cr_taxable_amount_1",
+            "cr_taxable_amount_2",
+            "cr_taxable_amount_4",
+            "cr_taxable_amount_13",
+            "cr_exempt_amount",
+            "cr_nonsubject_amount",
+            "cr_exonerated_amount",
+        ],
+    )
+    _logger.info("Computed the stored FE amounts of %s POS orders and %s lines.", orders, lines)
+
+    env["pos.fe.daily.summary"]._cr_rebuild()
+    cr.execute("SELECT COUNT(*) FROM pos_fe_daily_summary")
+    _logger.info("Built %s daily FE summary rows from existing POS orders.", cr.fetchone()[0])
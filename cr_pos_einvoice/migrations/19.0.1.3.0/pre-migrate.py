@@ -0,0 +1,23 @@
+# Stored computed fields added in this version: (table, column, type). Creating the
+# columns here keeps the ORM from recomputing every order and line in one pass at
+# update; post-migrate fills them in batches.
+STORED_COMPUTED_COLUMNS = (
+    ("pos_order", "cr_other_charges_amount", "numeric"),
+    ("pos_order", "cr_other_charges_resolved_json", "jsonb"),
+    ("pos_order", "cr_tax_rate_display", "varchar"),
+    ("pos_order", "cr_taxable_amount", "numeric"),
+    ("pos_order", "cr_taxable_amount_1", "numeric"),
+    ("pos_order", "cr_taxable_amount_2", "numeric"),
+    ("pos_order", "cr_taxable_amount_4", "numeric"),
+    ("pos_order", "cr_taxable_amount_13", "numeric"),
+    ("pos_order", "cr_exempt_amount", "numeric"),
+    ("pos_order", "cr_nonsubject_amount", "numeric"),
+    ("pos_order", "cr_exonerated_amount", "numeric"),
+    ("pos_order_line", "cr_is_fe_charge_line", "boolean"),
+)
+
+
+def migrate(cr, version):
+    """Create the new stored FE amount columns empty, to be filled in batches by post-migrate."""
+    for table, column, column_type in STORED_COMPUTED_COLUMNS:
+        cr.execute(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{column}" {column_type}')
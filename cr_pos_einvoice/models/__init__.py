@@ -1,11 +1,22 @@
+from . import account_journal
 from . import account_move
+from . import account_tax
 from . import pos_payment_method
 from . import pos_order_line
 from . import pos_order
+from . import pos_fe_document
+from . import pos_fe_email
+from . import pos_fe_daily_summary
+from . import pos_fe_event
+from . import pos_fe_bulk_job
+from . import pos_fe_circuit
 
 from . import pos_config
 from . import pos_session
 
 from . import pos_make_payment
 
+from . import product_product
 from . import product_template
+from . import res_company
+from . import res_partner
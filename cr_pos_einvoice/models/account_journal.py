@@ -0,0 +1,26 @@
+from odoo import api, models
+
+
+class AccountJournal(models.Model):
+    _inherit = "account.journal"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        journals = super().create(vals_list)
+        if any(journal.type == "sale" for journal in journals):
+            self.env["res.company"]._cr_clear_fe_context()
+        return journals
+
+    def write(self, vals):
+        was_sale = any(journal.type == "sale" for journal in self)
+        result = super().write(vals)
+        if {"type", "company_id", "active", "sequence"} & set(vals) and (was_sale or any(journal.type == "sale" for journal in self)):
+            self.env["res.company"]._cr_clear_fe_context()
+        return result
+
+    def unlink(self):
+        clear = any(journal.type == "sale" for journal in self)
+        result = super().unlink()
+        if clear:
+            self.env["res.company"]._cr_clear_fe_context()
+        return result
@@ -58,29 +58,36 @@ class AccountMove(models.Model):
         if not posted_customer_moves:
             return
 
-        orders_by_move = {}
+        # One search maps the moves not linked yet to their POS order.
+        order_by_move = {move: move.cr_pos_order_id for move in posted_customer_moves if move.cr_pos_order_id}
+        unlinked_moves = posted_customer_moves.filtered(lambda move: not move.cr_pos_order_id)
         pos_order_model = self.env["pos.order"]
-        for move in posted_customer_moves:
-            order = move.cr_pos_order_id
-            if not order and "account_move" in pos_order_model._fields:
-                order = pos_order_model.search([("account_move", "=", move.id)], limit=1)
-            if not order:
-                continue
-            if not move.cr_pos_order_id:
-                move.write(
-                    {
-                        "cr_pos_order_id": order.id,
-                        "cr_pos_document_type": "nc" if move.move_type == "out_refund" else "fe",
-                    }
-                )
-            order._cr_prepare_invoice_fe_values(move)
-            order._cr_sync_from_invoice_only()
-            orders_by_move[move.id] = order.id
+        if unlinked_moves and "account_move" in pos_order_model._fields:
+            for order in pos_order_model.search([("account_move", "in", unlinked_moves.ids)]):
+                order_by_move.setdefault(order.account_move, order)
+        if not order_by_move:
+            return
 
-        target_moves = posted_customer_moves.filtered(lambda move: move.id in orders_by_move)
-        if target_moves:
-            # Queue for l10n_cr_einvoice cron/send methods without forcing resend.
-            target_moves._cr_pos_enqueue_for_send(force=False)
+        # Link, FE values and send queue of all moves, written in one call per distinct value set.
+        now = fields.Datetime.now()
+        moves_by_vals = {}
+        for move, order in order_by_move.items():
+            vals = order._cr_get_invoice_fe_values(move)
+            vals.update(
+                {
+                    "cr_pos_fe_state": "to_send",
+                    "cr_pos_fe_next_try": now,
+                    "cr_pos_fe_last_error": False,
+                    "cr_pos_fe_error_code": False,
+                }
+            )
+            key = frozenset(vals.items())
+            moves_by_vals[key] = moves_by_vals.get(key, self.browse()) | move
+        for key, moves in moves_by_vals.items():
+            moves.write(dict(key))
+
+        orders = pos_order_model.union(*order_by_move.values())
+        orders._cr_sync_from_invoice_only(prepared_invoices=self.union(*order_by_move))
 
     def action_cr_pos_send_hacienda(self):
         for move in self:
@@ -146,75 +153,51 @@ class AccountMove(models.Model):
 
     def _cr_pos_call_send_method(self):
         self.ensure_one()
-        send_methods = [
-            "action_fp_send_to_api",
-            "action_sign_and_send",
-            "action_post_sign_invoices",
-            "action_send_to_hacienda",
-            "action_sign_xml",
-            "action_post_sign_pos_order",
-        ]
-        for method_name in send_methods:
-            if hasattr(self, method_name):
-                getattr(self, method_name)()
-                return
-        raise UserError(_("No se encontró un método público de envío FE en l10n_cr_einvoice."))
+        found, _result = self.env["pos.order"]._cr_call_backend(self, "send_action")
+        if not found:
+            raise UserError(_("No se encontró un método público de envío FE en l10n_cr_einvoice."))
 
     def _cr_pos_check_hacienda_status(self):
         self.ensure_one()
-        status_methods = [
-            "action_check_hacienda_status",
-            "action_consult_hacienda",
-            "action_get_hacienda_status",
-            "action_refresh_hacienda_status",
-        ]
-        for method_name in status_methods:
-            if hasattr(self, method_name):
-                getattr(self, method_name)()
-                self._cr_pos_sync_order_fe_data()
-                return True
-        raise UserError(_("No se encontró método público para consultar estado FE."))
+        found, _result = self.env["pos.order"]._cr_call_backend(self, "status_action")
+        if not found:
+            raise UserError(_("No se encontró método público para consultar estado FE."))
+        self._cr_pos_sync_order_fe_data()
+        return True
 
     def _cr_pos_sync_order_fe_data(self):
-        for move in self:
-            order = move.cr_pos_order_id
-            if not order:
-                continue
-            status = move.cr_pos_fe_state
-            for candidate in ("l10n_cr_hacienda_status", "l10n_cr_state_tributacion", "l10n_cr_status", "state_tributacion"):
-                if candidate in move._fields and move[candidate]:
-                    status = move[candidate]
-                    break
-
-            status = order._cr_normalize_hacienda_status(status, default_status=(status == "sent"))
-            clave = False
-            for candidate in ("l10n_cr_clave", "l10n_cr_einvoice_key", "l10n_cr_numero_consecutivo"):
-                if candidate in move._fields and move[candidate]:
-                    clave = move[candidate]
-                    break
-
-            consecutivo = False
-            for candidate in ("l10n_cr_numero_consecutivo", "l10n_latam_document_number"):
-                if candidate in move._fields and move[candidate]:
-                    consecutivo = move[candidate]
-                    break
-            xml_attachment = self.env["ir.attachment"].search(
+        aliases = self.env["pos.order"]._cr_field_aliases()
+        # Latest XML attachment of every move, in one query.
+        xml_attachment_by_move = dict(
+            self.env["ir.attachment"]._read_group(
                 [
                     ("res_model", "=", "account.move"),
-                    ("res_id", "=", move.id),
+                    ("res_id", "in", self.filtered("cr_pos_order_id").ids),
                     ("mimetype", "in", ["application/xml", "text/xml"]),
                 ],
-                order="id desc",
-                limit=1,
+                ["res_id"],
+                ["id:max"],
             )
-            order.write(
+        )
+        for move in self:
+            order = move.cr_pos_order_id
+            if not order:
+                continue
+            status = next((move[name] for name in aliases["move_fe_status"] if move[name]), move.cr_pos_fe_state)
+            status = order._cr_normalize_hacienda_status(status, default_status=(status == "sent"))
+            clave = next((move[name] for name in aliases["move_clave"] if move[name]), False)
+            consecutivo = next((move[name] for name in aliases["move_consecutivo"] if move[name]), False)
+            xml_attachment = self.env["ir.attachment"].browse(xml_attachment_by_move.get(move.id))
+            # The invoice is authoritative, also for a rejected document corrected and re-sent.
+            order._cr_fe_transition(
+                status,
                 {
-                    "cr_fe_status": status,
                     "cr_fe_error_code": False,
                     "cr_fe_clave": clave,
                     "cr_fe_consecutivo": consecutivo,
                     "cr_fe_xml_attachment_id": xml_attachment.id or False,
-                }
+                },
+                force=True,
             )
 
 
@@ -227,7 +210,7 @@ class AccountMove(models.Model):
         for order, _target_type in targets:
             try:
                 with self.env.cr.savepoint():
-                    order._cr_send_pending_te_to_hacienda()
+                    order._cr_dispatch_pending_te()
             except Exception:  # noqa: BLE001
                 self._logger.exception(
                     "Error enviando TE POS pendiente para order_id=%s desde cron de account.move.",
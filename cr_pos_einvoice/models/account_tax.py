@@ -0,0 +1,49 @@
+from odoo import api, fields, models
+
+# Rates reported in their own "Gravado n%" column of the FE report.
+CR_FE_TRACKED_TAX_RATES = (1.0, 2.0, 4.0, 13.0)
+
+
+class AccountTax(models.Model):
+    _inherit = "account.tax"
+
+    cr_fe_tax_bucket = fields.Selection(
+        [
+            ("nonsubject", "No sujeto"),
+            ("exempt", "Exento"),
+            ("exonerated", "Exonerado"),
+            ("taxable_general", "Gravado tarifa general"),
+            ("taxable", "Gravado"),
+        ],
+        string="Clasificación FE",
+        compute="_compute_cr_fe_tax_classification",
+        store=True,
+        help="Clasificación del impuesto para los montos FE del POS (exento, no sujeto, exonerado o gravado), "
+        "según el código de tarifa IVA y el porcentaje.",
+    )
+
+    @api.model
+    def _cr_get_fe_tax_bucket(self, code, amount):
+        """Bucket of one tax from its IVA rate code (``fp_tax_rate_code_iva``) and percentage."""
+        if code == "01":
+            return "nonsubject"
+        if code == "10":
+            return "exempt"
+        if code == "08":
+            # Exonerado: Hacienda usa código 08 (13%) con monto de impuesto en cero.
+            return "taxable_general" if (amount or 0.0) > 0 else "exonerated"
+        # Like the FE report, a 0% rate without its own IVA code is reported as exento.
+        return "taxable" if (amount or 0.0) > 0 else "exempt"
+
+    @api.depends(lambda self: ["amount"] + (["fp_tax_rate_code_iva"] if "fp_tax_rate_code_iva" in self._fields else []))
+    def _compute_cr_fe_tax_classification(self):
+        has_code = "fp_tax_rate_code_iva" in self._fields
+        for tax in self:
+            tax.cr_fe_tax_bucket = self._cr_get_fe_tax_bucket(has_code and tax.fp_tax_rate_code_iva, tax.amount)
+
+    @api.model
+    def _load_pos_data_fields(self, *args, **kwargs):
+        fields_to_load = super()._load_pos_data_fields(*args, **kwargs)
+        if fields_to_load and "cr_fe_tax_bucket" not in fields_to_load:
+            fields_to_load.append("cr_fe_tax_bucket")
+        return fields_to_load
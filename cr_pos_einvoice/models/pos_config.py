@@ -1,6 +1,11 @@
-from odoo import api, fields, models, _
+import gzip
+import hashlib
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 
+from .product_product import CR_POS_TIP_PRODUCT_FIELDS
+
 
 class PosConfig(models.Model):
     _inherit = "pos.config"
@@ -41,6 +46,27 @@ class PosConfig(models.Model):
             "'Facturar' se ejecuta desde pos.order y no crea account.move automáticamente."
         ),
     )
+    cr_fe_ticket_pdf_engine = fields.Selection(
+        [
+            ("qweb", "QWeb (wkhtmltopdf)"),
+            ("native", "Nativo (ReportLab)"),
+        ],
+        string="Motor PDF del tiquete",
+        default="qweb",
+        required=True,
+        help=(
+            "QWeb usa el reporte HTML y wkhtmltopdf. El motor nativo dibuja el tiquete de 80 mm "
+            "directamente a PDF dentro del proceso, sin lanzar wkhtmltopdf; si falla se usa QWeb."
+        ),
+    )
+    cr_fe_capture_receipt_html = fields.Boolean(
+        string="Capturar HTML de todos los tiquetes",
+        default=False,
+        help=(
+            "Si está inactivo, el POS solo envía el HTML del tiquete cuando el cliente tiene correo "
+            "(el único caso en que se usa para el PDF enviado por email)."
+        ),
+    )
     cr_service_charge_percent = fields.Float(
         string="% servicio (Otros Cargos)",
         default=10.0,
@@ -61,6 +87,26 @@ class PosConfig(models.Model):
         ),
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        configs = super().create(vals_list)
+        configs._cr_get_tip_products()._cr_recompute_fe_charge_role()
+        return configs
+
+    def write(self, vals):
+        tip_fields = set(CR_POS_TIP_PRODUCT_FIELDS) | {"cr_tip_product_id"}
+        if not tip_fields & set(vals):
+            return super().write(vals)
+        previous_tip_products = self._cr_get_tip_products()
+        result = super().write(vals)
+        (previous_tip_products | self._cr_get_tip_products())._cr_recompute_fe_charge_role()
+        return result
+
+    def _cr_get_tip_products(self):
+        return self.env["product.product"].union(
+            *(self.mapped(name) for name in CR_POS_TIP_PRODUCT_FIELDS if name in self._fields)
+        )
+
     def _compute_cr_tip_product_id(self):
         for config in self:
             config.cr_tip_product_id = config._cr_get_native_tip_product()
@@ -92,3 +138,55 @@ class PosConfig(models.Model):
                 raise ValidationError(
                     _("El porcentaje de servicio debe estar entre 0 y 100 para cumplimiento FE CR.")
                 )
+
+    @api.model
+    def _cr_receipt_header_attachment_name(self, digest):
+        return f"receipt-header-{digest}.html.gz"
+
+    @api.model
+    @tools.ormcache("digest")
+    def _cr_lookup_receipt_header(self, digest):
+        """Return the stored static receipt header for ``digest`` (content-addressed, cached).
+
+        Raises ``KeyError`` when it is not stored yet: exceptions are not cached, so
+        a header stored later by any worker is found without clearing the cache.
+        """
+        attachment = self.env["ir.attachment"].sudo().search(
+            [
+                ("res_model", "=", "pos.config"),
+                ("name", "=", self._cr_receipt_header_attachment_name(digest)),
+            ],
+            limit=1,
+        )
+        if not attachment or not attachment.raw:
+            raise KeyError(digest)
+        return gzip.decompress(attachment.raw).decode("utf-8")
+
+    @api.model
+    def _cr_get_receipt_header(self, digest):
+        """Return the stored static receipt header for ``digest`` or False."""
+        try:
+            return self._cr_lookup_receipt_header(digest)
+        except KeyError:
+            return False
+
+    @api.model
+    def cr_pos_store_receipt_header(self, config_id, digest, header_html, options=None):
+        config = self.browse(config_id).exists()
+        if not config or not digest:
+            return {"ok": False}
+        header = self.env["pos.order"]._cr_decode_receipt_capture(header_html, (options or {}).get("encoding"))
+        if hashlib.sha256(header.encode("utf-8")).hexdigest() != digest:
+            return {"ok": False, "reason": "digest_mismatch"}
+        if self._cr_get_receipt_header(digest) is False:
+            self.env["ir.attachment"].sudo().create(
+                {
+                    "name": self._cr_receipt_header_attachment_name(digest),
+                    "type": "binary",
+                    "raw": gzip.compress(header.encode("utf-8")),
+                    "res_model": "pos.config",
+                    "res_id": config.id,
+                    "mimetype": "application/gzip",
+                }
+            )
+        return {"ok": True}
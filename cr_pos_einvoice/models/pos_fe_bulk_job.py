@@ -0,0 +1,162 @@
+import logging
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class PosFeBulkJob(models.Model):
+    """Background send/consult of a selection of POS orders to Hacienda.
+
+    List actions only record the selection here and trigger the cron, which works
+    through it in chunks (one savepoint per order) so large selections never run
+    inside the HTTP request. Sends go through the company FE circuit like the
+    pending-ticket cron; orders of a paused company wait for the next run.
+    """
+
+    _name = "pos.fe.bulk.job"
+    _description = "Envío/consulta masiva FE POS"
+    _order = "id desc"
+
+    name = fields.Char(string="Descripción", required=True, readonly=True)
+    operation = fields.Selection(
+        [
+            ("send", "Enviar a Hacienda"),
+            ("status", "Consultar estado Hacienda"),
+        ],
+        string="Operación",
+        required=True,
+        readonly=True,
+    )
+    state = fields.Selection(
+        [
+            ("queued", "En cola"),
+            ("running", "En proceso"),
+            ("done", "Finalizado"),
+            ("cancel", "Cancelado"),
+        ],
+        string="Estado",
+        default="queued",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    company_id = fields.Many2one("res.company", string="Compañía", required=True, default=lambda self: self.env.company, readonly=True)
+    user_id = fields.Many2one("res.users", string="Solicitado por", default=lambda self: self.env.uid, readonly=True)
+    order_ids = fields.Many2many(
+        "pos.order", "pos_fe_bulk_job_order_rel", "job_id", "order_id", string="Pedidos POS", readonly=True
+    )
+    done_order_ids = fields.Many2many(
+        "pos.order", "pos_fe_bulk_job_done_order_rel", "job_id", "order_id", string="Pedidos procesados", readonly=True
+    )
+    total_count = fields.Integer(string="Pedidos", readonly=True)
+    success_count = fields.Integer(string="Correctos", readonly=True)
+    error_count = fields.Integer(string="Con error", readonly=True)
+    progress = fields.Float(string="Avance", compute="_compute_progress")
+    result_log = fields.Text(string="Resultado", readonly=True)
+    started_at = fields.Datetime(string="Iniciado el", readonly=True)
+    finished_at = fields.Datetime(string="Finalizado el", readonly=True)
+
+    @api.depends("total_count", "success_count", "error_count")
+    def _compute_progress(self):
+        for job in self:
+            processed = job.success_count + job.error_count
+            job.progress = 100.0 * processed / job.total_count if job.total_count else 100.0
+
+    @api.model
+    def _cr_enqueue(self, orders, operation):
+        """Queue ``orders`` for ``operation`` and return the action opening the job."""
+        label = dict(self._fields["operation"].selection)[operation]
+        job = self.create(
+            {
+                "name": _("%(operation)s: %(count)s pedidos POS", operation=label, count=len(orders)),
+                "operation": operation,
+                "order_ids": [(6, 0, orders.ids)],
+                "total_count": len(orders),
+            }
+        )
+        job._cr_trigger_processing()
+        return {
+            "type": "ir.actions.act_window",
+            "name": _("Proceso FE en segundo plano"),
+            "res_model": self._name,
+            "view_mode": "form",
+            "res_id": job.id,
+            "target": "current",
+        }
+
+    @api.model
+    def _cr_trigger_processing(self):
+        cron = self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_process_fe_bulk_jobs", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_cr_cancel(self):
+        self.filtered(lambda job: job.state in ("queued", "running")).write(
+            {"state": "cancel", "finished_at": fields.Datetime.now()}
+        )
+        return True
+
+    def _cr_process_chunk(self, limit):
+        """Run the operation on up to ``limit`` remaining orders; return how many were processed."""
+        self.ensure_one()
+        remaining = (self.order_ids - self.done_order_ids).sorted("id")
+        if not self.started_at:
+            self.write({"state": "running", "started_at": fields.Datetime.now()})
+        processed = self.env["pos.order"]
+        success_count = error_count = 0
+        errors = []
+        for order in remaining:
+            if len(processed) >= limit:
+                break
+            if self.operation == "send" and self.env["pos.fe.circuit"].sudo()._cr_get_open([order.company_id.id]):
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    ok = order._cr_run_fe_bulk_operation(self.operation)
+            except Exception as error:  # noqa: BLE001
+                _logger.exception("Error in POS FE bulk job %s for order %s", self.id, order.id)
+                ok = False
+                message = str(error)
+            else:
+                message = False if ok else (order.cr_fe_last_error or _("Sin respuesta válida de Hacienda."))
+            processed |= order
+            if ok:
+                success_count += 1
+            else:
+                error_count += 1
+                errors.append(f"{order.name}: {message}")
+        values = {
+            "done_order_ids": [(4, order_id) for order_id in processed.ids],
+            "success_count": self.success_count + success_count,
+            "error_count": self.error_count + error_count,
+        }
+        if errors:
+            values["result_log"] = "\n".join(filter(None, [self.result_log, *errors]))
+        if not remaining - processed:
+            values.update({"state": "done", "finished_at": fields.Datetime.now()})
+        self.write(values)
+        return len(processed)
+
+    @api.model
+    def _cron_cr_pos_process_fe_bulk_jobs(self, batch_size=50):
+        """Process one chunk of the oldest open jobs and re-trigger while work remains."""
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM pos_fe_bulk_job
+             WHERE state IN ('queued', 'running')
+             ORDER BY id
+               FOR UPDATE SKIP LOCKED
+            """
+        )
+        jobs = self.sudo().browse([row[0] for row in self.env.cr.fetchall()])
+        budget = batch_size
+        for job in jobs:
+            if budget <= 0:
+                break
+            budget -= job._cr_process_chunk(budget)
+        if budget < batch_size and jobs.filtered(lambda job: job.state != "done"):
+            # Progress was made and work remains: continue right away instead of waiting for the interval.
+            self._cr_trigger_processing()
+        return True
@@ -0,0 +1,132 @@
+from odoo import api, fields, models
+
+# Consecutive transport failures (network, MH outage, credentials) before a company's FE dispatch is paused.
+CR_FE_CIRCUIT_THRESHOLD = 5
+CR_FE_CIRCUIT_MAX_MINUTES = 60
+# Pauses opened/closed (None) by the current transaction, which its snapshot cannot see in the table.
+_CR_FE_CIRCUIT_MEMO_KEY = "cr_pos_einvoice.fe_circuit_open"
+# Failure streaks registered by the current transaction (0 once reset by a success).
+_CR_FE_CIRCUIT_STREAK_KEY = "cr_pos_einvoice.fe_circuit_streak"
+
+
+class PosFeCircuit(models.Model):
+    """Per-company FE send circuit: consecutive transport failures and the pause they open.
+
+    One row per company, kept out of ``res_company`` and updated in its own short
+    transaction, so the pending-TE crons and bulk jobs never serialize on the company
+    row and a streak is not lost when the cron transaction rolls back.
+    """
+
+    _name = "pos.fe.circuit"
+    _description = "Circuito de envío FE POS"
+    _log_access = False
+
+    company_id = fields.Many2one("res.company", string="Compañía", required=True, ondelete="cascade", readonly=True)
+    failure_streak = fields.Integer(string="Fallos de transporte consecutivos", default=0, readonly=True)
+    open_until = fields.Datetime(string="Envío FE pausado hasta", readonly=True)
+
+    _cr_pos_fe_circuit_company_unique = models.Constraint(
+        "unique(company_id)",
+        "Cada compañía tiene un único circuito de envío FE.",
+    )
+
+    @api.model
+    def _cr_get_open(self, company_ids):
+        """Return ``{company_id: open_until}`` for the given companies whose dispatch is paused."""
+        if not company_ids:
+            return {}
+        self.env.cr.execute(
+            """
+            SELECT company_id, open_until
+              FROM pos_fe_circuit
+             WHERE company_id = ANY(%s)
+               AND open_until > NOW() AT TIME ZONE 'UTC'
+            """,
+            (list(company_ids),),
+        )
+        open_circuits = dict(self.env.cr.fetchall())
+        now = fields.Datetime.now()
+        for company_id, open_until in self.env.cr.precommit.data.get(_CR_FE_CIRCUIT_MEMO_KEY, {}).items():
+            if company_id not in company_ids:
+                continue
+            if open_until and open_until > now:
+                open_circuits[company_id] = open_until
+            else:
+                open_circuits.pop(company_id, None)
+        return open_circuits
+
+    @api.model
+    def _cr_has_streak(self, company_id, streaks):
+        """Whether ``company_id`` may have a streak or pause to reset.
+
+        ``streaks`` holds the outcomes registered by this transaction; otherwise the
+        row is read on the current cursor, which sees what was committed before.
+        """
+        if company_id in streaks:
+            return bool(streaks[company_id])
+        self.env.cr.execute(
+            """
+            SELECT 1
+              FROM pos_fe_circuit
+             WHERE company_id = %s
+               AND (failure_streak > 0 OR open_until IS NOT NULL)
+            """,
+            (company_id,),
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _cr_register_outcome(self, company_id, failed):
+        """Record a send outcome of ``company_id``; return ``(streak, open_until)`` after it.
+
+        A failure once the streak reached ``CR_FE_CIRCUIT_THRESHOLD`` (re)opens the pause
+        for 5 minutes per failure beyond the threshold, up to ``CR_FE_CIRCUIT_MAX_MINUTES``;
+        a success closes it. Runs on a separate cursor committed right away; a
+        success of a company without streak or pause writes nothing.
+        """
+        memo = self.env.cr.precommit.data.setdefault(_CR_FE_CIRCUIT_MEMO_KEY, {})
+        streaks = self.env.cr.precommit.data.setdefault(_CR_FE_CIRCUIT_STREAK_KEY, {})
+        if not failed and not streaks.get(company_id) and not self._cr_has_streak(company_id, streaks):
+            # Nothing to reset: the usual success costs no extra cursor or write.
+            return 0, None
+        # In test mode the registry cursor shares the test transaction.
+        with self.env.registry.cursor() as cr:
+            if not failed:
+                cr.execute(
+                    """
+                    UPDATE pos_fe_circuit
+                       SET failure_streak = 0, open_until = NULL
+                     WHERE company_id = %s
+                       AND (failure_streak > 0 OR open_until IS NOT NULL)
+                    """,
+                    (company_id,),
+                )
+                memo[company_id] = None
+                streaks[company_id] = 0
+                return 0, None
+            cr.execute(
+                """
+                INSERT INTO pos_fe_circuit (company_id, failure_streak)
+                VALUES (%(company_id)s, 1)
+                ON CONFLICT (company_id) DO UPDATE
+                   SET failure_streak = pos_fe_circuit.failure_streak + 1,
+                       open_until = CASE
+                           WHEN pos_fe_circuit.failure_streak + 1 >= %(threshold)s
+                           THEN NOW() AT TIME ZONE 'UTC' + make_interval(
+                               mins => LEAST(%(max_minutes)s, (pos_fe_circuit.failure_streak + 2 - %(threshold)s) * 5)
+                           )
+                           ELSE pos_fe_circuit.open_until
+                       END
+                RETURNING failure_streak, open_until
+                """,
+                {
+                    "company_id": company_id,
+                    "threshold": CR_FE_CIRCUIT_THRESHOLD,
+                    "max_minutes": CR_FE_CIRCUIT_MAX_MINUTES,
+                },
+            )
+            streak, open_until = cr.fetchone()
+        streaks[company_id] = streak
+        if streak >= CR_FE_CIRCUIT_THRESHOLD:
+            memo[company_id] = open_until
+        return streak, open_until
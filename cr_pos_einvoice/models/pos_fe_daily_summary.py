@@ -0,0 +1,299 @@
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# Report column -> (pos.order amount field, field subtracted from it). Otros Cargos are
+# stored inside the exento bucket, so the report moves them to their own column.
+REPORT_AMOUNT_FIELDS = (
+    ("exempt", "cr_exempt_amount", "cr_other_charges_amount"),
+    ("other_charges", "cr_other_charges_amount", None),
+    ("nonsubject", "cr_nonsubject_amount", None),
+    ("exonerated", "cr_exonerated_amount", None),
+    ("taxable_1", "cr_taxable_amount_1", None),
+    ("taxable_2", "cr_taxable_amount_2", None),
+    ("taxable_4", "cr_taxable_amount_4", None),
+    ("taxable_13", "cr_taxable_amount_13", None),
+    ("tax", "amount_tax", None),
+    ("total", "amount_total", None),
+)
+# Days are cut in Costa Rica local time, like the Hacienda declarations.
+SUMMARY_TZ = "America/Costa_Rica"
+# pos.order fields whose change moves an order between summary rows or changes its amounts.
+SUMMARY_ORDER_FIELDS = {
+    "state",
+    "date_order",
+    "company_id",
+    "session_id",
+    "config_id",
+    "lines",
+    "amount_tax",
+    "amount_total",
+    "cr_fe_status",
+    "cr_fe_document_type",
+    "cr_other_charges_json",
+}
+# Report states: only these orders are counted in the summary.
+SUMMARY_ORDER_STATES = ("paid", "done", "invoiced")
+_SNAPSHOT_KEY = "cr_pos_einvoice.daily_summary_snapshot"
+
+
+class PosFeDailySummary(models.Model):
+    """Signed FE report amounts per (company, POS, local day, document type, FE status).
+
+    Maintained incrementally: the first time a transaction touches an order, its
+    current contribution (row key and signed amounts) is snapshotted; right before
+    commit the new contribution of every snapshotted order is read back and the
+    per-row differences are added to the summary in one upsert. Concurrent
+    transactions updating the same row serialize on it (the later one is retried),
+    and rows whose order count drops to zero are deleted.
+    """
+
+    _name = "pos.fe.daily.summary"
+    _description = "Resumen diario FE POS"
+    _order = "date desc, company_id, config_id, document_type, fe_status"
+    _rec_name = "date"
+
+    company_id = fields.Many2one("res.company", string="Empresa", required=True, index=True, readonly=True)
+    config_id = fields.Many2one("pos.config", string="Punto de venta", index=True, readonly=True, ondelete="cascade")
+    date = fields.Date(string="Fecha", required=True, index=True, readonly=True)
+    document_type = fields.Selection(
+        [("te", "Tiquete Electrónico"), ("fe", "Factura Electrónica"), ("nc", "Nota de Crédito")],
+        string="Tipo documento FE",
+        readonly=True,
+    )
+    fe_status = fields.Selection(selection="_get_fe_status_selection", string="Estado FE", readonly=True)
+    currency_id = fields.Many2one(related="company_id.currency_id", string="Moneda")
+    order_count = fields.Integer(string="Comprobantes", readonly=True)
+    exempt_amount = fields.Monetary(string="Exento", readonly=True)
+    other_charges_amount = fields.Monetary(string="Otros cargos", readonly=True)
+    nonsubject_amount = fields.Monetary(string="No sujeto", readonly=True)
+    exonerated_amount = fields.Monetary(string="Exonerado", readonly=True)
+    taxable_1_amount = fields.Monetary(string="Gravado 1%", readonly=True)
+    taxable_2_amount = fields.Monetary(string="Gravado 2%", readonly=True)
+    taxable_4_amount = fields.Monetary(string="Gravado 4%", readonly=True)
+    taxable_13_amount = fields.Monetary(string="Gravado 13%", readonly=True)
+    tax_amount = fields.Monetary(string="Importe impuesto", readonly=True)
+    total_amount = fields.Monetary(string="Total", readonly=True)
+
+    _cr_slice_unique = models.UniqueIndex(
+        "(company_id, COALESCE(config_id, 0), date, COALESCE(document_type, ''), COALESCE(fe_status, ''))"
+    )
+
+    @api.model
+    def _get_fe_status_selection(self):
+        return self.env["pos.order"]._fields["cr_fe_status"].selection
+
+    @api.model
+    def _cr_local_day_sql(self, alias="o"):
+        return SQL("((%s.date_order AT TIME ZONE 'UTC') AT TIME ZONE %s)::date", SQL.identifier(alias), SUMMARY_TZ)
+
+    @api.model
+    def _cr_amount_columns(self):
+        """Return ``[(summary column, signed amount expression on pos_order o)]``."""
+        sign = SQL("CASE WHEN o.cr_fe_document_type = 'nc' OR COALESCE(o.amount_total, 0) < 0 THEN -1 ELSE 1 END")
+        columns = []
+        for key, fname, minus_fname in REPORT_AMOUNT_FIELDS:
+            amount = SQL("COALESCE(%s, 0)", SQL.identifier("o", fname))
+            if minus_fname:
+                amount = SQL("%s - COALESCE(%s, 0)", amount, SQL.identifier("o", minus_fname))
+            columns.append((f"{key}_amount", SQL("(%s) * (%s)", sign, amount)))
+        return columns
+
+    @api.model
+    def _cr_flush_orders(self):
+        self.env["pos.order"].flush_model(
+            ["state", "company_id", "config_id", "date_order", "cr_fe_status", "cr_fe_document_type"]
+            + [fname for _key, fname, _minus in REPORT_AMOUNT_FIELDS]
+        )
+
+    @api.model
+    def _cr_get_order_contributions(self, order_ids):
+        """Return ``{order_id: (row key, signed amounts)}`` of the given orders counted in the summary.
+
+        The row key is ``(company_id, config_id, local day, document type, FE status)``;
+        amounts follow ``REPORT_AMOUNT_FIELDS``.
+        """
+        if not order_ids:
+            return {}
+        self._cr_flush_orders()
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT o.id, o.company_id, o.config_id, %s, o.cr_fe_document_type, o.cr_fe_status, %s
+                  FROM pos_order o
+                 WHERE o.id = ANY(%s) AND o.state IN %s AND o.date_order IS NOT NULL
+                """,
+                self._cr_local_day_sql(),
+                SQL(", ").join(amount for _column, amount in self._cr_amount_columns()),
+                list(order_ids),
+                SUMMARY_ORDER_STATES,
+            )
+        )
+        return {row[0]: (tuple(row[1:6]), row[6:]) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _cr_mark_orders_dirty(self, orders, created=False):
+        """Snapshot the summary contribution of ``orders`` before the transaction changes them.
+
+        Call it before the change; only the first call per order and transaction
+        snapshots, so later changes are all measured from the committed state.
+        ``created`` orders had no contribution before this transaction, whatever
+        was snapshotted while their lines were being created.
+        """
+        if not orders.ids:
+            return
+        precommit = self.env.cr.precommit
+        if _SNAPSHOT_KEY not in precommit.data:
+            precommit.data[_SNAPSHOT_KEY] = {}
+            precommit.add(self._cr_flush_dirty)
+        snapshot = precommit.data[_SNAPSHOT_KEY]
+        if created:
+            snapshot.update(dict.fromkeys(orders.ids))
+            return
+        order_ids = [order_id for order_id in orders.ids if order_id not in snapshot]
+        if not order_ids:
+            return
+        contributions = self._cr_get_order_contributions(order_ids)
+        for order_id in order_ids:
+            snapshot[order_id] = contributions.get(order_id)
+
+    @api.model
+    def _cr_flush_dirty(self):
+        """Apply to the summary the changes of the orders snapshotted by :meth:`_cr_mark_orders_dirty`."""
+        snapshot = self.env.cr.precommit.data.pop(_SNAPSHOT_KEY, None)
+        if not snapshot:
+            return
+        current = self._cr_get_order_contributions(list(snapshot))
+        deltas = {}
+        for order_id, previous in snapshot.items():
+            for contribution, sign in ((previous, -1), (current.get(order_id), 1)):
+                if not contribution:
+                    continue
+                key, amounts = contribution
+                count, totals = deltas.get(key, (0, [0.0] * len(amounts)))
+                deltas[key] = (count + sign, [total + sign * (amount or 0.0) for total, amount in zip(totals, amounts)])
+        currencies = {}
+        rows = []
+        for key, (count, totals) in deltas.items():
+            company_id = key[0]
+            if company_id not in currencies:
+                currencies[company_id] = self.env["res.company"].browse(company_id).currency_id
+            totals = [currencies[company_id].round(total) for total in totals]
+            if count or any(totals):
+                rows.append((key, count, totals))
+        if rows:
+            self._cr_apply_deltas(rows)
+
+    @api.model
+    def _cr_apply_deltas(self, rows):
+        """Add ``[(row key, order count delta, amount deltas)]`` to the summary rows."""
+        # A stable row order keeps concurrent upserts from deadlocking on each other.
+        rows = sorted(rows, key=lambda row: tuple("" if value is None else str(value) for value in row[0]))
+        columns = [SQL.identifier(column) for column, _amount in self._cr_amount_columns()]
+        now = fields.Datetime.now()
+        values = SQL(", ").join(
+            SQL(
+                "(%s, %s, %s::date, %s, %s, %s, %s, %s, %s, %s, %s)",
+                *key,
+                count,
+                SQL(", ").join(SQL("%s", total) for total in totals),
+                self.env.uid,
+                now,
+                self.env.uid,
+                now,
+            )
+            for key, count, totals in rows
+        )
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO pos_fe_daily_summary AS s (
+                    company_id, config_id, date, document_type, fe_status, order_count, %(columns)s,
+                    create_uid, create_date, write_uid, write_date
+                )
+                VALUES %(values)s
+                    ON CONFLICT (company_id, COALESCE(config_id, 0), date, COALESCE(document_type, ''), COALESCE(fe_status, ''))
+                    DO UPDATE SET order_count = s.order_count + EXCLUDED.order_count, %(updates)s,
+                                  write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+                RETURNING s.id, s.order_count
+                """,
+                columns=SQL(", ").join(columns),
+                values=values,
+                updates=SQL(", ").join(SQL("%s = s.%s + EXCLUDED.%s", column, column, column) for column in columns),
+            )
+        )
+        empty_ids = [row_id for row_id, order_count in self.env.cr.fetchall() if order_count <= 0]
+        if empty_ids:
+            self.env.cr.execute(SQL("DELETE FROM pos_fe_daily_summary WHERE id = ANY(%s)", empty_ids))
+        self.invalidate_model()
+
+    @api.model
+    def _cr_rebuild(self, date_from=None, date_to=None):
+        """Rebuild the summary from ``pos_order`` (all days, or the given local-day range).
+
+        Also the recovery path after bulk SQL fixes on orders, e.g.
+        ``env["pos.fe.daily.summary"]._cr_rebuild("2026-01-01", "2026-01-31")`` from a shell.
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        delete_conditions = [SQL("TRUE")]
+        order_conditions = [SQL("o.date_order IS NOT NULL")]
+        if date_from:
+            delete_conditions.append(SQL("s.date >= %s", date_from))
+            order_conditions += [
+                SQL("o.date_order >= %s", date_from - timedelta(days=1)),
+                SQL("%s >= %s", self._cr_local_day_sql(), date_from),
+            ]
+        if date_to:
+            delete_conditions.append(SQL("s.date <= %s", date_to))
+            order_conditions += [
+                SQL("o.date_order < %s", date_to + timedelta(days=2)),
+                SQL("%s <= %s", self._cr_local_day_sql(), date_to),
+            ]
+        # Pending changes may fall outside the rebuilt range: apply them first.
+        self._cr_flush_dirty()
+        self.env.cr.execute(
+            SQL("DELETE FROM pos_fe_daily_summary s WHERE %s", SQL(" AND ").join(delete_conditions))
+        )
+        self._cr_insert_grouped(SQL(" AND ").join(order_conditions))
+        return True
+
+    @api.model
+    def _cr_insert_grouped(self, where):
+        self._cr_flush_orders()
+        columns = self._cr_amount_columns()
+        day = self._cr_local_day_sql()
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO pos_fe_daily_summary (
+                    company_id, config_id, date, document_type, fe_status, order_count, %(columns)s,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT o.company_id, o.config_id, %(day)s, o.cr_fe_document_type, o.cr_fe_status, COUNT(*), %(amounts)s,
+                       %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+                  FROM pos_order o
+                 WHERE o.state IN %(states)s AND %(where)s
+              GROUP BY o.company_id, o.config_id, %(day)s, o.cr_fe_document_type, o.cr_fe_status
+                    ON CONFLICT (company_id, COALESCE(config_id, 0), date, COALESCE(document_type, ''), COALESCE(fe_status, ''))
+                    DO UPDATE SET order_count = EXCLUDED.order_count, %(updates)s,
+                                  write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+                """,
+                columns=SQL(", ").join(SQL.identifier(column) for column, _amount in columns),
+                updates=SQL(", ").join(
+                    SQL("%s = EXCLUDED.%s", SQL.identifier(column), SQL.identifier(column)) for column, _amount in columns
+                ),
+                day=day,
+                amounts=SQL(", ").join(SQL("COALESCE(SUM(%s), 0)", amount) for _column, amount in columns),
+                uid=self.env.uid,
+                states=SUMMARY_ORDER_STATES,
+                where=where,
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def action_cr_rebuild(self):
+        self._cr_rebuild()
+        return {"type": "ir.actions.client", "tag": "reload"}
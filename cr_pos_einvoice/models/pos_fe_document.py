@@ -0,0 +1,82 @@
+import hashlib
+
+from psycopg2 import IntegrityError
+
+from odoo import api, fields, models
+
+
+class PosFeDocument(models.Model):
+    """Content-addressed FE artifacts (XML, respuesta MH, PDF, HTML capturado) per POS order.
+
+    The digest and size are computed once, from the bytes already in memory
+    when the artifact is created, so reuse and lookups never need to decode
+    the attachment payload again.
+    """
+
+    _name = "pos.fe.document"
+    _description = "Artefacto FE POS"
+    _order = "id desc"
+
+    order_id = fields.Many2one("pos.order", string="Pedido POS", required=True, index=True, ondelete="cascade")
+    kind = fields.Selection(
+        [
+            ("xml", "XML firmado"),
+            ("response", "XML respuesta MH"),
+            ("pdf", "PDF comprobante"),
+            ("receipt_html", "HTML del tiquete (gzip)"),
+        ],
+        string="Tipo de artefacto",
+        required=True,
+    )
+    digest = fields.Char(string="SHA-256", readonly=True)
+    size = fields.Integer(string="Tamaño (bytes)", readonly=True)
+    source_hash = fields.Char(
+        string="Hash de origen",
+        readonly=True,
+        help="Hash de los datos usados para generar el artefacto (p. ej. el PDF del tiquete); "
+        "si no cambia, el artefacto almacenado sigue siendo válido.",
+    )
+    attachment_id = fields.Many2one("ir.attachment", string="Adjunto", required=True, ondelete="cascade")
+    created_at = fields.Datetime(string="Creado", default=fields.Datetime.now, readonly=True)
+
+    _cr_pos_fe_document_order_kind_unique = models.Constraint(
+        "unique(order_id, kind)",
+        "Solo puede existir un artefacto FE por pedido POS y tipo.",
+    )
+
+    @api.model
+    def _cr_compute_digest(self, payload):
+        return hashlib.sha256(payload or b"").hexdigest()
+
+    @api.model
+    def _cr_get(self, order, kind):
+        """Indexed (order_id, kind) lookup; empty recordset for unsaved orders."""
+        if not order or not order.id:
+            return self.browse()
+        return self.sudo().search([("order_id", "=", order.id), ("kind", "=", kind)], limit=1)
+
+    @api.model
+    def _cr_register(self, order, kind, attachment, payload, source_hash=False):
+        """Create or refresh the (order, kind) artifact from in-memory ``payload`` bytes."""
+        if not order or not order.id or not attachment:
+            return self.browse()
+
+        values = {
+            "attachment_id": attachment.id,
+            "digest": self._cr_compute_digest(payload),
+            "size": len(payload or b""),
+            "source_hash": source_hash,
+            "created_at": fields.Datetime.now(),
+        }
+        document = self._cr_get(order, kind)
+        if document:
+            document.write(values)
+            return document
+        try:
+            with self.env.cr.savepoint():
+                return self.sudo().create({"order_id": order.id, "kind": kind, **values})
+        except IntegrityError:
+            # A concurrent transaction registered the same (order, kind) first.
+            document = self._cr_get(order, kind)
+            document.write(values)
+            return document
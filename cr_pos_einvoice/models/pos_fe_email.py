@@ -0,0 +1,160 @@
+import logging
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Failed deliveries are queued again with a growing delay until this many attempts.
+CR_FE_EMAIL_MAX_ATTEMPTS = 5
+
+
+class PosFeEmail(models.Model):
+    """Delivery queue and dedupe ledger of accepted FE emails, one row per (order, recipient).
+
+    Rows are claimed with ``FOR UPDATE SKIP LOCKED`` on this table, so email dispatch never
+    locks the ``pos_order`` row, and the unique (order, recipient) key replaces the ``mail.mail``
+    searches previously used to detect duplicates. A failed delivery is retried with backoff
+    up to ``CR_FE_EMAIL_MAX_ATTEMPTS`` attempts before the row stays in error.
+    """
+
+    _name = "pos.fe.email"
+    _description = "Cola de correos FE POS"
+    _order = "id"
+
+    order_id = fields.Many2one("pos.order", string="Pedido POS", required=True, index=True, ondelete="cascade")
+    email_to = fields.Char(string="Destinatario", required=True)
+    state = fields.Selection(
+        [
+            ("queued", "En cola"),
+            ("sent", "Enviado"),
+            ("error", "Error"),
+            ("cancel", "Cancelado"),
+        ],
+        string="Estado",
+        default="queued",
+        required=True,
+        index=True,
+    )
+    mail_id = fields.Many2one("mail.mail", string="Correo", ondelete="set null")
+    attempts = fields.Integer(string="Intentos", default=0)
+    next_try = fields.Datetime(string="Próximo intento")
+    last_error = fields.Text(string="Último error")
+    sent_at = fields.Datetime(string="Enviado el")
+
+    _cr_pos_fe_email_order_recipient_unique = models.Constraint(
+        "unique(order_id, email_to)",
+        "El comprobante ya fue registrado para envío a este destinatario.",
+    )
+
+    @api.model
+    def _cr_ensure(self, order, email_to, requeue=False):
+        """Return the (order, recipient) row, inserting it race-free when missing."""
+        self.env.cr.execute(
+            """
+            INSERT INTO pos_fe_email (order_id, email_to, state, attempts, create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, 'queued', 0, %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (order_id, email_to) DO NOTHING
+            """,
+            (order.id, email_to, self.env.uid, self.env.uid),
+        )
+        entry = self.sudo().search([("order_id", "=", order.id), ("email_to", "=", email_to)], limit=1)
+        if requeue and entry.state != "queued":
+            entry.write({"state": "queued", "attempts": 0, "next_try": False, "last_error": False})
+        return entry
+
+    @api.model
+    def _cr_trigger_delivery(self):
+        cron = self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_send_fe_emails", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def _cr_mark_sent(self, mail=None):
+        self.write(
+            {
+                "state": "sent",
+                "sent_at": fields.Datetime.now(),
+                "next_try": False,
+                "last_error": False,
+                "mail_id": mail and mail.id,
+            }
+        )
+
+    def _cr_mark_error(self, message, mail=None):
+        """Record a failed delivery: queue it again later, or keep it in error after the last attempt."""
+        for entry in self:
+            attempts = entry.attempts + 1
+            retry = attempts < CR_FE_EMAIL_MAX_ATTEMPTS
+            entry.write(
+                {
+                    "state": "queued" if retry else "error",
+                    "attempts": attempts,
+                    "next_try": retry and fields.Datetime.now() + timedelta(minutes=min(60, attempts * 10)),
+                    "last_error": message,
+                    "mail_id": mail and mail.id,
+                }
+            )
+
+    @api.model
+    def _cron_cr_pos_send_fe_emails(self, limit=100):
+        """Send queued FE emails due now in one ``mail.mail.send()`` batch (one SMTP session per server)."""
+        self.env.cr.execute(
+            """
+            SELECT id
+              FROM pos_fe_email
+             WHERE state = 'queued'
+               AND (next_try IS NULL OR next_try <= NOW() AT TIME ZONE 'UTC')
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+            """,
+            (limit,),
+        )
+        entries = self.sudo().browse([row[0] for row in self.env.cr.fetchall()])
+        if not entries:
+            return True
+
+        batch = []
+        Mail = self.env["mail.mail"].sudo()
+        for entry in entries:
+            order = entry.order_id
+            order.invalidate_recordset(["cr_fe_status", "cr_fe_email_sent", "partner_id", "config_id"])
+            if not order._cr_should_send_accepted_email() or order._cr_get_customer_email() != entry.email_to:
+                entry.state = "cancel"
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    attachments = order._cr_get_email_attachments()
+                    if not attachments:
+                        message = _("No se encontraron adjuntos XML/PDF para el envío por correo.")
+                        entry._cr_mark_error(message)
+                        order._cr_set_email_delivery_error(message)
+                        continue
+                    mail = Mail.create(order._cr_prepare_accepted_email_values(entry.email_to, attachments))
+            except Exception as error:  # noqa: BLE001
+                _logger.exception("Error preparing FE email for POS order %s", order.id)
+                entry._cr_mark_error(str(error))
+                order._cr_set_email_delivery_error(str(error))
+                continue
+            batch.append((entry, mail, attachments))
+
+        if batch:
+            mails = Mail.browse([mail.id for _entry, mail, _attachments in batch])
+            mails.send(raise_exception=False)
+
+        events = []
+        for entry, mail, _attachments in batch:
+            order = entry.order_id
+            if mail.exists() and mail.state == "exception":
+                message = mail.failure_reason or _("No se pudo enviar el correo del comprobante electrónico.")
+                entry._cr_mark_error(message, mail)
+                order._cr_set_email_delivery_error(message)
+                continue
+            entry._cr_mark_sent(mail)
+            order._cr_mark_accepted_email_sent()
+            events.append({"order_id": order.id, "event": "email_sent", "message": entry.email_to})
+        self.env["pos.fe.event"]._cr_log(events)
+
+        if len(entries) == limit:
+            self._cr_trigger_delivery()
+        return True
@@ -0,0 +1,50 @@
+from odoo import api, fields, models
+
+
+class PosFeEvent(models.Model):
+    """Append-only FE milestone log of POS orders (XML, status changes, MH response, email).
+
+    Replaces the chatter post per milestone: events are plain rows inserted in
+    one batch per ``pos.order.write()``, and only terminal states are summarized
+    in the order chatter.
+    """
+
+    _name = "pos.fe.event"
+    _description = "Evento FE POS"
+    _order = "id desc"
+    _log_access = False
+
+    order_id = fields.Many2one("pos.order", string="Pedido POS", required=True, index=True, ondelete="cascade", readonly=True)
+    event = fields.Selection(
+        [
+            ("xml_generated", "XML generado"),
+            ("status", "Cambio de estado"),
+            ("response_received", "Respuesta MH recibida"),
+            ("email_sent", "Correo enviado"),
+        ],
+        string="Evento",
+        required=True,
+        readonly=True,
+    )
+    status = fields.Selection(selection="_get_fe_status_selection", string="Estado FE", readonly=True)
+    previous_status = fields.Selection(selection="_get_fe_status_selection", string="Estado anterior", readonly=True)
+    event_date = fields.Datetime(string="Fecha", required=True, default=fields.Datetime.now, readonly=True)
+    duration = fields.Float(
+        string="Duración (s)",
+        readonly=True,
+        help="Segundos transcurridos en el estado anterior.",
+    )
+    attachment_id = fields.Many2one("ir.attachment", string="Adjunto", ondelete="set null", readonly=True)
+    message = fields.Char(string="Detalle", readonly=True)
+    user_id = fields.Many2one("res.users", string="Usuario", default=lambda self: self.env.uid, readonly=True)
+
+    @api.model
+    def _get_fe_status_selection(self):
+        return self.env["pos.order"]._fields["cr_fe_status"].selection
+
+    @api.model
+    def _cr_log(self, vals_list):
+        """Insert a batch of events (one INSERT for the whole list)."""
+        if not vals_list:
+            return self.browse()
+        return self.sudo().create(vals_list)
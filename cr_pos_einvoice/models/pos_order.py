@@ -1,21 +1,32 @@
 import logging
 import base64
+import gzip
 import hashlib
 import json
 import re
-import unicodedata
+import zlib
 from collections import defaultdict
 from datetime import timedelta, datetime, date, time
+from itertools import zip_longest
 from lxml import etree
 from markupsafe import Markup, escape
 
 from psycopg2 import IntegrityError
 from psycopg2.errors import InFailedSqlTransaction, LockNotAvailable, SerializationFailure
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
+from odoo.tools import SQL, config as odoo_config, format_amount, format_datetime
 from odoo.tools.float_utils import float_is_zero
 
+from ..tools.backend_capabilities import BACKEND_CAPABILITIES, call_capability, resolve_capability
+from ..tools.ticket_pdf import render_ticket_pdf
+from .account_tax import CR_FE_TRACKED_TAX_RATES
+from .pos_fe_circuit import CR_FE_CIRCUIT_THRESHOLD
+from .pos_fe_daily_summary import SUMMARY_ORDER_FIELDS
+from .pos_order_line import CR_FE_CHARGE_LINE_MARKERS
+from .product_product import CR_OTHER_CHARGE_PRODUCT_MARKERS
+
 
 class PosOrder(models.Model):
     _inherit = "pos.order"
@@ -30,8 +41,112 @@ class PosOrder(models.Model):
 
     _logger = logging.getLogger(__name__)
 
+    # Alias -> (model, candidate field names in priority order). Which candidates
+    # physically exist depends on the installed FE/POS modules; see _cr_field_aliases().
+    _CR_FIELD_ALIASES = {
+        "order_declared_other_charge_amount": (
+            "pos.order",
+            (
+                "cr_other_charge_amount",
+                "other_charge_amount",
+                "fp_other_charge_amount",
+                "l10n_cr_other_charge_amount",
+                "tip_amount",
+                "amount_tip",
+                "cr_tip_amount",
+                "tip",
+            ),
+        ),
+        "order_tip_amount": ("pos.order", ("tip_amount", "amount_tip")),
+        "config_tip_product": ("pos.config", ("cr_tip_product_id", "pos_tip_product_id", "tip_product_id")),
+        # product.product exposes the template fields through _inherits.
+        "product_other_charge_markers": ("product.product", CR_OTHER_CHARGE_PRODUCT_MARKERS),
+        "line_tip_markers": ("pos.order.line", CR_FE_CHARGE_LINE_MARKERS),
+        "move_fe_status": (
+            "account.move",
+            ("l10n_cr_hacienda_status", "l10n_cr_state_tributacion", "l10n_cr_status", "state_tributacion"),
+        ),
+        "move_clave": ("account.move", ("l10n_cr_clave", "l10n_cr_einvoice_key", "l10n_cr_numero_consecutivo")),
+        "move_consecutivo": ("account.move", ("l10n_cr_numero_consecutivo", "l10n_latam_document_number")),
+    }
+    _CR_MOVE_OTHER_CHARGES_FIELDS = (
+        "fp_other_charges",
+        "other_charges",
+        "otros_cargos",
+        "l10n_cr_other_charges",
+        "cr_other_charges_json",
+        "fp_other_charges_json",
+        "other_charges_json",
+        "otros_cargos_json",
+        "l10n_cr_other_charges_json",
+    )
+    # Transaction memo of resolved NC references, and the fields invalidating it.
+    _CR_REFERENCE_MEMO_KEY = "cr_pos_einvoice.refund_references"
+    _CR_REFERENCE_MEMO_FIELDS = {
+        "cr_fe_reference_document_type",
+        "cr_fe_reference_document_number",
+        "cr_fe_reference_issue_date",
+        "cr_fe_reference_code",
+        "cr_fe_reference_reason",
+        "cr_fe_clave",
+        "cr_fe_consecutivo",
+        "cr_fe_document_type",
+        "date_order",
+        "amount_total",
+        "lines",
+        "account_move",
+        "cr_ticket_move_id",
+        "fp_reference_code",
+        "fp_reference_reason",
+    }
+    _CR_MOVE_OTHER_CHARGES_TYPES = {"char", "text", "html", "json", "serialized", "one2many", "many2many"}
+
     _CR_INVOICE_MOVE_TYPES = ("out_invoice", "out_refund")
     _CR_FINAL_STATES = ("accepted", "rejected", "not_applicable")
+    _CR_RECEIPT_PDF_BATCH_SIZE = 20
+    # Failed queued renders before the email falls back to the existing PDF.
+    _CR_RECEIPT_PDF_MAX_ATTEMPTS = 5
+    # Larger selections of the send/consult actions run as a background pos.fe.bulk.job.
+    _CR_SYNC_ACTION_LIMIT = 20
+    # Send failure messages that point to the connection/credentials rather than the document.
+    _CR_TRANSPORT_ERROR_MARKERS = (
+        "timeout",
+        "timed out",
+        "connection",
+        "conexión",
+        "ssl",
+        "certificate",
+        "certificado",
+        "unauthorized",
+        "no autorizado",
+        "service unavailable",
+    )
+    # Bump when the ticket report layout changes so cached receipt PDFs are rendered again.
+    _CR_RECEIPT_REPORT_VERSION = "1"
+    _CR_RECEIPT_HTML_MAX_SIZE = 5_000_000
+    _CR_RECEIPT_HTML_RETENTION_DAYS = 30
+    # Placeholder left by receipt_capture_patch.js where the deduplicated receipt header goes.
+    _CR_RECEIPT_HEADER_PLACEHOLDER = "<!--cr-receipt-header-->"
+    # FE states summarized in the chatter; intermediate transitions only go to pos.fe.event.
+    _CR_FE_TERMINAL_STATUSES = ("accepted", "rejected", "error")
+    # Allowed FE status moves (current -> targets), enforced by _cr_fe_transition.
+    _CR_FE_OPEN_TARGETS = ("pending", "error_retry", "error", "sent", "processing", "accepted", "rejected", "not_applicable")
+    _CR_FE_TRANSITIONS = {
+        "draft": _CR_FE_OPEN_TARGETS,
+        "pending": _CR_FE_OPEN_TARGETS,
+        "error_retry": _CR_FE_OPEN_TARGETS,
+        "error": _CR_FE_OPEN_TARGETS,
+        "not_applicable": _CR_FE_OPEN_TARGETS,
+        "sent": ("sent", "processing", "pending", "accepted", "rejected", "error_retry", "error"),
+        "processing": ("processing", "sent", "pending", "accepted", "rejected", "error_retry", "error"),
+        "accepted": ("accepted",),
+        "rejected": ("rejected",),
+    }
+    # Extra moves allowed only with ``force`` (explicit resend, invoice sync): a rejected
+    # document may be corrected and sent again. Accepted stays terminal.
+    _CR_FE_FORCED_TRANSITIONS = {
+        "rejected": ("pending", "error_retry", "error", "sent", "processing", "accepted"),
+    }
 
     cr_ticket_move_id = fields.Many2one("account.move", string="Movimiento FE Tiquete", copy=False, index=True)
     cr_other_charges_json = fields.Text(
@@ -43,7 +158,15 @@ class PosOrder(models.Model):
         string="Otros cargos",
         compute="_compute_cr_other_charges_amount",
         currency_field="currency_id",
-        store=False,
+        store=True,
+    )
+    cr_other_charges_resolved_json = fields.Json(
+        string="Otros cargos FE resueltos",
+        compute="_compute_cr_other_charges_amount",
+        store=True,
+        copy=False,
+        help="Otros Cargos normalizados que se envían en el XML (líneas marcadas, JSON del POS, "
+        "propinas o monto declarado), recalculados solo cuando cambian las líneas o el JSON.",
     )
     cr_fe_document_type = fields.Selection(
         [("te", "Tiquete Electrónico"), ("fe", "Factura Electrónica"), ("nc", "Nota de Crédito")],
@@ -68,15 +191,19 @@ class PosOrder(models.Model):
         default="draft",
         copy=False,
         index=True,
-        tracking=True,
     )
-    cr_fe_error_code = fields.Char(string="Código de error FE", copy=False, tracking=True)
+    cr_fe_status_changed_at = fields.Datetime(string="Cambio de estado FE", copy=False, readonly=True)
+    cr_fe_event_ids = fields.One2many("pos.fe.event", "order_id", string="Eventos FE", readonly=True)
+    cr_fe_error_code = fields.Char(string="Código de error FE", copy=False)
     cr_fe_clave = fields.Char(string="Clave FE", copy=False, tracking=True)
     cr_fe_consecutivo = fields.Char(string="Consecutivo FE", copy=False, tracking=True)
     cr_fe_idempotency_key = fields.Char(string="Clave de idempotencia FE", copy=False, index=True)
     cr_fe_xml_attachment_id = fields.Many2one("ir.attachment", string="XML documento", copy=False)
     cr_fe_response_attachment_id = fields.Many2one("ir.attachment", string="XML respuesta MH", copy=False)
     cr_fe_pdf_attachment_id = fields.Many2one("ir.attachment", string="PDF comprobante", copy=False)
+    cr_fe_pdf_pending = fields.Boolean(string="PDF FE pendiente", default=False, copy=False, index=True)
+    cr_fe_pdf_attempts = fields.Integer(string="Intentos de PDF FE", default=0, copy=False)
+    cr_fe_pdf_next_try = fields.Datetime(string="Próximo intento de PDF FE", copy=False)
     cr_fe_attachment_ids = fields.Many2many("ir.attachment", string="Adjuntos FE", compute="_compute_cr_fe_attachment_ids")
     cr_fe_retry_count = fields.Integer(string="Reintentos FE", default=0, copy=False)
     cr_fe_next_try = fields.Datetime(string="Próximo intento FE", copy=False)
@@ -90,7 +217,13 @@ class PosOrder(models.Model):
     cr_fe_reference_issue_date = fields.Date(string="Fecha emisión referencia FE", copy=False)
     cr_fe_reference_code = fields.Char(string="Código referencia FE", copy=False)
     cr_fe_reference_reason = fields.Char(string="Razón referencia FE", copy=False)
-    cr_receipt_html = fields.Text(string="HTML Tiquete POS", copy=False)
+    cr_receipt_html = fields.Text(
+        string="HTML Tiquete POS",
+        compute="_compute_cr_receipt_html",
+        inverse="_inverse_cr_receipt_html",
+        copy=False,
+        help="HTML capturado del tiquete POS. Se guarda comprimido (gzip) en el almacén de adjuntos, no en pos_order.",
+    )
     fp_document_type = fields.Selection(
         selection="_selection_fp_document_type",
         string="Tipo de comprobante FE",
@@ -118,55 +251,55 @@ class PosOrder(models.Model):
     cr_tax_rate_display = fields.Char(
         string="Impuesto (%)",
         compute="_compute_cr_tax_report_amounts",
-        store=False,
+        store=True,
     )
     cr_taxable_amount = fields.Monetary(
         string="Gravado",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_taxable_amount_1 = fields.Monetary(
         string="Gravado 1%",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_taxable_amount_2 = fields.Monetary(
         string="Gravado 2%",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_taxable_amount_4 = fields.Monetary(
         string="Gravado 4%",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_taxable_amount_13 = fields.Monetary(
         string="Gravado 13%",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_exempt_amount = fields.Monetary(
         string="Exento",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_nonsubject_amount = fields.Monetary(
         string="No sujeto",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
     cr_exonerated_amount = fields.Monetary(
         string="Exonerado",
         compute="_compute_cr_tax_report_amounts",
         currency_field="currency_id",
-        store=False,
+        store=True,
     )
 
     _cr_pos_einvoice_idempotency_key_unique = models.Constraint(
@@ -192,79 +325,97 @@ class PosOrder(models.Model):
                 order.cr_fe_document_type = False
 
     @api.depends(
-        "cr_other_charges_json",
-        "lines.price_subtotal",
-        "lines.product_id",
-        "config_id",
-        "session_id.config_id",
+        lambda self: [
+            "cr_other_charges_json",
+            "lines.price_subtotal",
+            "lines.product_id",
+            "lines.cr_is_other_charge_line",
+            "lines.cr_is_fe_charge_line",
+            "config_id",
+            "session_id.config_id",
+            "currency_id",
+        ]
+        + [
+            name
+            for name in self._CR_FIELD_ALIASES["order_declared_other_charge_amount"][1]
+            if name in self._fields
+        ]
     )
     def _compute_cr_other_charges_amount(self):
         for order in self:
-            charges = order._cr_get_other_charges_payload()
+            charges = order._cr_resolve_other_charges()
+            order.cr_other_charges_resolved_json = charges
             order.cr_other_charges_amount = sum(float(charge.get("amount") or 0.0) for charge in charges)
 
-    @api.depends("lines.price_subtotal", "lines.tax_ids_after_fiscal_position")
+    @api.model
+    def _cr_classify_line_taxes(self, taxes, tracked_rates):
+        """Classify a line by its taxes in a single pass.
+
+        Returns ``(bucket, rate_labels, tracked_line_rates)`` where bucket is one of
+        ``nonsubject``, ``exempt``, ``exonerated`` or ``taxable``.
+        """
+        Tax = self.env["account.tax"]
+        buckets = set()
+        positive_rates = []
+        for tax in taxes:
+            # Stored per-tax classification; plain objects (and taxes not yet
+            # classified) fall back to the same rules on the IVA code.
+            bucket = getattr(tax, "cr_fe_tax_bucket", False) or Tax._cr_get_fe_tax_bucket(
+                getattr(tax, "fp_tax_rate_code_iva", False), tax.amount
+            )
+            buckets.add(bucket)
+            if (tax.amount or 0.0) > 0:
+                positive_rates.append(float(tax.amount))
+
+        if "nonsubject" in buckets:
+            return "nonsubject", set(), set()
+        if "exempt" in buckets:
+            return "exempt", set(), set()
+        if "exonerated" in buckets and "taxable_general" not in buckets:
+            # Exonerado: Hacienda usa código 08 (13%) con monto de impuesto en cero.
+            return "exonerated", {"13%"}, set()
+        if not positive_rates:
+            return "exempt", set(), set()
+        return (
+            "taxable",
+            {f"{rate:g}%" for rate in positive_rates},
+            {rate for rate in positive_rates if rate in tracked_rates},
+        )
+
+    # Tax attributes (amount, FE code) are not dependencies on purpose: taxes used on sold
+    # orders are frozen, and a tax edit must not rewrite every historical order.
+    @api.depends(
+        "currency_id",
+        "fiscal_position_id",
+        "lines.price_subtotal",
+        "lines.tax_ids_after_fiscal_position",
+    )
     def _compute_cr_tax_report_amounts(self):
-        tracked_rates = (1.0, 2.0, 4.0, 13.0)
+        tracked_rates = CR_FE_TRACKED_TAX_RATES
         for order in self:
-            taxable = 0.0
-            exempt = 0.0
-            nonsubject = 0.0
-            exonerated = 0.0
+            totals = {"taxable": 0.0, "exempt": 0.0, "nonsubject": 0.0, "exonerated": 0.0}
             rates = set()
             taxable_by_rate = {rate: 0.0 for rate in tracked_rates}
             for line in order.lines:
                 subtotal = line.price_subtotal or 0.0
-                taxes = line.tax_ids_after_fiscal_position
-                code_taxes = {
-                    str(code): taxes.filtered(lambda tax: getattr(tax, "fp_tax_rate_code_iva", False) == code)
-                    for code in ("01", "08", "10")
-                }
-                has_nonsubject = bool(code_taxes["01"])
-                has_exempt = bool(code_taxes["10"])
-                has_code_08 = bool(code_taxes["08"])
-                code_08_positive = code_taxes["08"].filtered(lambda tax: (tax.amount or 0.0) > 0)
-                code_08_zero = code_taxes["08"] - code_08_positive
-
-                if has_nonsubject:
-                    nonsubject += subtotal
-                    continue
-
-                if has_exempt:
-                    exempt += subtotal
-                    continue
-
-                if has_code_08 and code_08_zero and not code_08_positive:
-                    # Exonerado: Hacienda usa código 08 (13%) con monto de impuesto en cero.
-                    exonerated += subtotal
-                    rates.add("13%")
-                    continue
-
-                positive_taxes = taxes.filtered(lambda tax: (tax.amount or 0.0) > 0)
-                if positive_taxes:
-                    taxable += subtotal
-                    for tax in positive_taxes:
-                        rates.add(f"{tax.amount:g}%")
-                    line_rates = {
-                        float(int(tax.amount) if float(tax.amount).is_integer() else tax.amount)
-                        for tax in positive_taxes
-                        if float(tax.amount) in tracked_rates
-                    }
-                    if line_rates:
-                        allocation = subtotal / len(line_rates)
-                        for rate in line_rates:
-                            taxable_by_rate[rate] += allocation
-                else:
-                    exempt += subtotal
-            order.cr_taxable_amount = taxable
+                bucket, line_rate_labels, line_rates = order._cr_classify_line_taxes(
+                    line.tax_ids_after_fiscal_position, tracked_rates
+                )
+                totals[bucket] += subtotal
+                rates |= line_rate_labels
+                if line_rates:
+                    allocation = subtotal / len(line_rates)
+                    for rate in line_rates:
+                        taxable_by_rate[rate] += allocation
+            order.cr_taxable_amount = totals["taxable"]
             order.cr_taxable_amount_1 = taxable_by_rate[1.0]
             order.cr_taxable_amount_2 = taxable_by_rate[2.0]
             order.cr_taxable_amount_4 = taxable_by_rate[4.0]
             order.cr_taxable_amount_13 = taxable_by_rate[13.0]
-            order.cr_exempt_amount = exempt
-            order.cr_nonsubject_amount = nonsubject
-            order.cr_exonerated_amount = exonerated
-            if exonerated and float_is_zero(taxable_by_rate[13.0], precision_rounding=order.currency_id.rounding):
+            order.cr_exempt_amount = totals["exempt"]
+            order.cr_nonsubject_amount = totals["nonsubject"]
+            order.cr_exonerated_amount = totals["exonerated"]
+            if totals["exonerated"] and float_is_zero(taxable_by_rate[13.0], precision_rounding=order.currency_id.rounding):
                 rates.add("13%")
             order.cr_tax_rate_display = ", ".join(sorted(rates)) if rates else "0%"
 
@@ -280,26 +431,71 @@ class PosOrder(models.Model):
         for order in self:
             order.cr_fe_attachment_ids = attachments_by_order[order.id]
 
+    @api.model
+    @tools.ormcache()
+    def _cr_field_aliases(self):
+        """Map each ``_CR_FIELD_ALIASES`` alias to the fields that exist, resolved once per registry.
+
+        ``move_other_charges`` is the account.move field holding OtrosCargos for the XML
+        generator (a known name first, else any field named like "other charges").
+        """
+        models_by_name = self.env.registry.models
+        aliases = {
+            alias: tuple(name for name in candidates if name in getattr(models_by_name.get(model_name), "_fields", {}))
+            for alias, (model_name, candidates) in self._CR_FIELD_ALIASES.items()
+        }
+        move_fields = getattr(models_by_name.get("account.move"), "_fields", {})
+        supported = [name for name, field in move_fields.items() if field.type in self._CR_MOVE_OTHER_CHARGES_TYPES]
+        preferred = [name for name in self._CR_MOVE_OTHER_CHARGES_FIELDS if name in supported]
+        by_pattern = [
+            name
+            for name in supported
+            if ("other" in name.lower() and "charge" in name.lower())
+            or ("otros" in name.lower() and "cargos" in name.lower())
+            or ("otro" in name.lower() and "cargo" in name.lower())
+        ]
+        aliases["move_other_charges"] = tuple(preferred + by_pattern)[:1]
+        return aliases
+
     def _cr_service(self):
         return self.env.registry.models.get("l10n_cr.einvoice.service") and self.env["l10n_cr.einvoice.service"]
 
-    def _cr_call_target_method(self, target, method_name, args, kwargs):
-        method = getattr(target, method_name, False)
-        if not method:
+    @api.model
+    @tools.ormcache("model_name", "capability")
+    def _cr_resolve_backend_capability(self, model_name, capability):
+        """Return ``(method_name, call_style)`` implementing ``capability`` on ``model_name``, or None.
+
+        Resolved from the method signatures once per registry (see ``tools/backend_capabilities``);
+        candidates that exist with an incompatible signature are logged and skipped.
+        """
+        model_class = self.env.registry.models.get(model_name)
+        if model_class is None:
+            return None
+        method_name, call_style, incompatible = resolve_capability(model_class, capability)
+        for name in incompatible:
+            self._logger.warning(
+                "FE backend %s.%s no acepta la llamada '%s'; se ignora.", model_name, name, capability
+            )
+        return (method_name, call_style) if method_name else None
+
+    def _register_hook(self):
+        super()._register_hook()
+        # Resolve the FE backends at registry load, not on the first send of a worker.
+        for model_name in ("l10n_cr.einvoice.service", "pos.order", "account.move"):
+            for capability in BACKEND_CAPABILITIES:
+                self._cr_resolve_backend_capability(model_name, capability)
+
+    def _cr_call_backend(self, target, capability, args=(), kwargs=None):
+        """Call ``capability`` on ``target`` and return ``(found, result)``."""
+        if not isinstance(target, models.BaseModel):
             return False, None
-        try:
-            return True, method(*args, **kwargs)
-        except TypeError as error:
-            # Compatibilidad para implementaciones en pos.order que no reciben order_id como primer argumento.
-            if target is self and args and args[0] == self.id:
-                try:
-                    return True, method(*args[1:], **kwargs)
-                except TypeError:
-                    pass
-            raise error
+        resolved = self._cr_resolve_backend_capability(target._name, capability)
+        if not resolved:
+            return False, None
+        return True, call_capability(target, capability, *resolved, args=args, kwargs=kwargs)
 
-    def _cr_call_service_method(self, method_names, *args, prefer_local=False, **kwargs):
-        """Call first available FE backend method from service or pos.order."""
+    def _cr_call_service_method(self, capability, *args, prefer_local=False, **kwargs):
+        """Call the FE backend ``capability`` (see ``BACKEND_CAPABILITIES``) on the service or pos.order."""
         self.ensure_one()
         tried_backends = []
         backends = []
@@ -315,10 +511,9 @@ class PosOrder(models.Model):
 
         for backend_name, backend in backends:
             tried_backends.append(backend_name)
-            for method_name in method_names:
-                found, result = self._cr_call_target_method(backend, method_name, args, kwargs)
-                if found:
-                    return result
+            found, result = self._cr_call_backend(backend, capability, args, kwargs)
+            if found:
+                return result
 
         raise UserError(
             _(
@@ -327,22 +522,15 @@ class PosOrder(models.Model):
             )
             % {
                 "backends": ", ".join(tried_backends),
-                "methods": ", ".join(method_names),
+                "methods": ", ".join(BACKEND_CAPABILITIES[capability][0]),
             }
         )
 
     def _cr_call_status_backend(self):
         self.ensure_one()
-        status_methods = [
-            "action_check_hacienda_status",
-            "action_consult_hacienda",
-            "action_get_hacienda_status",
-            "action_refresh_hacienda_status",
-        ]
-        for method_name in status_methods:
-            found, _result = self._cr_call_target_method(self, method_name, tuple(), {})
-            if found:
-                return True
+        found, _result = self._cr_call_backend(self, "status_action")
+        if found:
+            return True
         raise UserError(
             _(
                 "No se encontró método público para consultar estado FE en pos.order y tampoco un "
@@ -407,8 +595,31 @@ class PosOrder(models.Model):
             order.fp_payment_method = method.fp_payment_method if method else False
             order.fp_economic_activity_id = order.config_id.fp_economic_activity_id
 
+    def _cr_get_reference_memo(self, kind, resolver):
+        """Return ``resolver()`` for this order, memoized until commit/rollback.
+
+        NC reference resolution reads the DB (refund, origin order and invoice) and is
+        needed by the snapshot, payload, virtual move and receipt paths of the same
+        transaction. Any write touching ``_CR_REFERENCE_MEMO_FIELDS`` drops the memo.
+        """
+        self.ensure_one()
+        if not self.id:
+            return resolver()
+        memo = self.env.cr.precommit.data.setdefault(self._CR_REFERENCE_MEMO_KEY, {})
+        key = (kind, self.id)
+        if key not in memo:
+            memo[key] = resolver()
+        return dict(memo[key])
+
+    @api.model
+    def _cr_clear_reference_memo(self):
+        self.env.cr.precommit.data.pop(self._CR_REFERENCE_MEMO_KEY, None)
+
     def _cr_get_manual_reference_data(self):
-        """Manual NC reference captured on pos.order (backend payment wizard/UI)."""
+        """Manual NC reference captured on pos.order (backend payment wizard/UI), memoized per transaction."""
+        return self._cr_get_reference_memo("manual", self._cr_read_manual_reference_data)
+
+    def _cr_read_manual_reference_data(self):
         self.ensure_one()
         reference_data = {
             "document_type": (self.cr_fe_reference_document_type or "").strip() or False,
@@ -550,22 +761,60 @@ class PosOrder(models.Model):
         move = self._cr_get_real_invoice_move()
         return bool(move and move.move_type == "out_refund")
 
+    def _cr_get_refund_candidates(self):
+        """Return the orders of ``self`` that may be credit notes, classified in one query.
+
+        Same signals as ``_cr_is_credit_note_order`` (negative total, refunded lines,
+        NC document type, out_refund invoice), so plain sales can skip the NC
+        reference machinery without loading their lines.
+        """
+        if not self.ids:
+            return self.browse()
+        self.flush_recordset(["amount_total", "cr_fe_document_type", "account_move"])
+        self.env["pos.order.line"].flush_model(["order_id", "refunded_orderline_id"])
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT o.id
+                  FROM pos_order o
+                 WHERE o.id = ANY(%s)
+                   AND (
+                        o.amount_total < 0
+                        OR o.cr_fe_document_type = 'nc'
+                        OR EXISTS (
+                            SELECT 1 FROM pos_order_line l
+                             WHERE l.order_id = o.id AND l.refunded_orderline_id IS NOT NULL
+                        )
+                        OR EXISTS (
+                            SELECT 1 FROM account_move m
+                             WHERE m.id = o.account_move AND m.move_type = 'out_refund' AND m.state != 'cancel'
+                        )
+                   )
+                """,
+                self.ids,
+            )
+        )
+        return self.browse(order_id for (order_id,) in self.env.cr.fetchall())
+
     def _cr_build_idempotency_key(self):
         self.ensure_one()
         return f"POS-{self.company_id.id}-{self.config_id.id}-{self.name or self.pos_reference or self.id}"
 
-    def _cr_get_or_create_idempotency_key(self):
+    def _cr_get_or_create_idempotency_key(self, persist=True):
         """Return a stable FE idempotency key and persist it when missing.
 
         NC/Refund flows can call FE backends from different entry points (prepare,
         send or status check). Persisting the key as soon as we need FE interaction
         keeps retries deterministic and avoids duplicate emission under concurrency.
+        With ``persist=False`` the caller stores the key in its own transition write.
         """
         self.ensure_one()
         if self.cr_fe_idempotency_key:
             return self.cr_fe_idempotency_key
 
         key = self._cr_build_idempotency_key()
+        if not persist:
+            return key
         try:
             self.write({"cr_fe_idempotency_key": key})
         except IntegrityError as error:
@@ -639,24 +888,12 @@ class PosOrder(models.Model):
         if not service:
             return None
 
-        if service:
-            for method_name in (
-                "get_next_consecutivo",
-                "get_next_consecutive",
-                "get_next_consecutivo_by_document_type",
-            ):
-                method = getattr(service, method_name, False)
-                if not method:
-                    continue
-                try:
-                    result = method(company_id=self.company_id.id, document_type=doc_code)
-                except TypeError:
-                    result = method(self.company_id.id, doc_code)
-                if result:
-                    value = result.get("consecutivo") if isinstance(result, dict) else result
-                    numeric_value = self._cr_extract_last_consecutive_number(value)
-                    if numeric_value is not None:
-                        return numeric_value
+        found, result = self._cr_call_backend(
+            service, "next_consecutive", kwargs={"company_id": self.company_id.id, "document_type": doc_code}
+        )
+        if found and result:
+            value = result.get("consecutivo") if isinstance(result, dict) else result
+            return self._cr_extract_last_consecutive_number(value)
         return None
 
     def _cr_sync_last_consecutivo_in_einvoice_config(self, document_type, consecutivo):
@@ -681,21 +918,12 @@ class PosOrder(models.Model):
 
         service = self._cr_service()
         doc_code = (document_type or self.cr_fe_document_type or "te").upper()
-        sync_methods = (
-            "set_last_consecutivo_by_document_type",
-            "update_last_consecutivo_by_document_type",
-            "set_last_consecutive_by_document_type",
-            "set_last_number_by_document_type",
-            "update_last_number_by_document_type",
+        found, _result = self._cr_call_backend(
+            service,
+            "set_last_consecutive",
+            kwargs={"company_id": self.company_id.id, "document_type": doc_code, "consecutivo": last_number},
         )
-        for method_name in sync_methods:
-            method = getattr(service, method_name, False)
-            if not method:
-                continue
-            try:
-                method(company_id=self.company_id.id, document_type=doc_code, consecutivo=last_number)
-            except TypeError:
-                method(self.company_id.id, doc_code, last_number)
+        if found:
             return True
 
         company = self.company_id.sudo()
@@ -724,14 +952,10 @@ class PosOrder(models.Model):
         doc_code = (document_type or self.cr_fe_document_type or "te").upper()
         service = self._cr_service()
         if service:
-            for method_name in ("get_last_consecutivo_by_document_type", "get_last_consecutive_by_document_type"):
-                method = getattr(service, method_name, False)
-                if not method:
-                    continue
-                try:
-                    result = method(company_id=self.company_id.id, document_type=doc_code)
-                except TypeError:
-                    result = method(self.company_id.id, doc_code)
+            found, result = self._cr_call_backend(
+                service, "last_consecutive", kwargs={"company_id": self.company_id.id, "document_type": doc_code}
+            )
+            if found:
                 value = result.get("consecutivo") if isinstance(result, dict) else result
                 number = self._cr_extract_last_consecutive_number(value)
                 if number is not None:
@@ -759,20 +983,16 @@ class PosOrder(models.Model):
 
     def _cr_generate_fe_consecutivo(self, document_type=None):
         self.ensure_one()
-        branch = str(getattr(self.company_id, "fp_branch_code", "") or "1")
-        terminal = str(getattr(self.company_id, "fp_terminal_code", "") or "1")
+        fe_context = self.company_id._cr_get_fe_context()
         sequence = self._cr_get_next_consecutivo_by_document_type(document_type)
         doc_code = self._cr_get_fe_document_code(document_type=document_type)
-        return f"{branch.zfill(3)}{terminal.zfill(5)}{doc_code}{str(sequence).zfill(10)}"
+        return f"{fe_context['branch']}{fe_context['terminal']}{doc_code}{str(sequence).zfill(10)}"
 
     def _cr_generate_fe_clave(self, consecutivo):
         self.ensure_one()
-        company_partner = self.company_id.partner_id
-        vat_raw = self.company_id.vat or (company_partner and company_partner.vat) or ""
-        vat_digits = "".join(char for char in str(vat_raw) if char.isdigit())[-12:].zfill(12)
-        country_code = "506"
-        if self.company_id.country_id and getattr(self.company_id.country_id, "phone_code", False):
-            country_code = str(self.company_id.country_id.phone_code).zfill(3)
+        fe_context = self.company_id._cr_get_fe_context()
+        vat_digits = fe_context["vat_digits"]
+        country_code = fe_context["country_code"]
         issue_date = fields.Date.context_today(self)
         issue_ddmmyy = issue_date.strftime("%d%m%y")
         security_code = str(self.id or 0).zfill(8)[-8:]
@@ -865,6 +1085,8 @@ class PosOrder(models.Model):
         return any(fragment in msg for fragment in fragments)
 
     def action_cr_send_hacienda(self):
+        if len(self) > self._CR_SYNC_ACTION_LIMIT:
+            return self.action_cr_enqueue_send_hacienda()
         for order in self:
             if order.invoice_status == "invoiced":
                 order._cr_sync_from_invoice_only()
@@ -873,6 +1095,8 @@ class PosOrder(models.Model):
         return True
 
     def action_cr_check_hacienda_status(self):
+        if len(self) > self._CR_SYNC_ACTION_LIMIT:
+            return self.action_cr_enqueue_check_hacienda_status()
         for order in self:
             if order.invoice_status == "invoiced":
                 order._cr_sync_from_invoice_only()
@@ -880,6 +1104,22 @@ class PosOrder(models.Model):
             order._cr_check_pending_te_status()
         return True
 
+    def action_cr_enqueue_send_hacienda(self):
+        return self.env["pos.fe.bulk.job"]._cr_enqueue(self, "send")
+
+    def action_cr_enqueue_check_hacienda_status(self):
+        return self.env["pos.fe.bulk.job"]._cr_enqueue(self, "status")
+
+    def _cr_run_fe_bulk_operation(self, operation):
+        """Run one order of a ``pos.fe.bulk.job``; return True when the operation succeeded."""
+        self.ensure_one()
+        if self.invoice_status == "invoiced":
+            self._cr_sync_from_invoice_only()
+            return True
+        if operation == "send":
+            return bool(self._cr_dispatch_pending_te(force=True))
+        return bool(self._cr_check_pending_te_status())
+
     def action_cr_open_fe_document(self):
         self.ensure_one()
         move = self._cr_get_real_invoice_move() or self.cr_ticket_move_id
@@ -911,6 +1151,7 @@ class PosOrder(models.Model):
             if not order._cr_get_customer_email():
                 raise UserError(_("El cliente no tiene correo electrónico válido para reenviar el comprobante."))
             order.write({"cr_fe_email_sent": False, "cr_fe_email_error": False})
+            self.env["pos.fe.email"]._cr_ensure(order, order._cr_get_customer_email(), requeue=True)
             if not order._cr_try_send_accepted_email():
                 raise UserError(order.cr_fe_email_error or _("No se pudo enviar el correo del comprobante electrónico."))
         return True
@@ -918,6 +1159,52 @@ class PosOrder(models.Model):
     def _cr_fe_status_label(self, status):
         return dict(self._fields["cr_fe_status"].selection).get(status, status)
 
+    def _cr_fe_transition(self, status, values=None, force=False):
+        """Move the orders to FE ``status`` and apply ``values`` in a single write.
+
+        Staying in the same status is always allowed. Orders whose current status does
+        not allow the move (see ``_CR_FE_TRANSITIONS``, plus ``_CR_FE_FORCED_TRANSITIONS``
+        with ``force``) keep their status and FE data: ``values`` are not written to
+        them. Returns the orders moved.
+        """
+        values = dict(values or {})
+
+        def _is_allowed(order):
+            current = order.cr_fe_status or "draft"
+            targets = self._CR_FE_TRANSITIONS.get(current, ())
+            if force:
+                targets += self._CR_FE_FORCED_TRANSITIONS.get(current, ())
+            return status == order.cr_fe_status or status in targets
+
+        allowed = self.filtered(_is_allowed)
+        for order in self - allowed:
+            self._logger.warning(
+                "POS order %s: FE transition %s -> %s not allowed; status and FE data kept.",
+                order.id,
+                order.cr_fe_status,
+                status,
+            )
+        if allowed:
+            allowed.write({**values, "cr_fe_status": status})
+        return allowed
+
+    def _cr_post_fe_terminal_summary(self):
+        """One chatter message when the order reaches a terminal FE state (accepted, rejected, error)."""
+        self.ensure_one()
+        status = self.cr_fe_status
+        if status == "accepted":
+            body = _("Documento aceptado por Hacienda.")
+        elif status == "rejected":
+            body = _("Documento rechazado por Hacienda.")
+        else:
+            body = self.cr_fe_last_error or ""
+        response = self.cr_fe_response_attachment_id
+        return self._cr_post_fe_event(
+            title=_("Estado FE: %s") % self._cr_fe_status_label(status),
+            body=body,
+            attachments=[response] if response else None,
+        )
+
     def _cr_post_fe_event(self, title, body=None, attachments=None):
         self.ensure_one()
         safe_title = escape(title or "")
@@ -1011,14 +1298,8 @@ class PosOrder(models.Model):
         ):
             return self.cr_fe_pdf_attachment_id
 
-        existing = self.env["ir.attachment"].search(
-            [
-                ("res_model", "=", "pos.order"),
-                ("res_id", "=", self.id),
-                ("mimetype", "=", "application/pdf"),
-                ("name", "=", filename),
-            ],
-            limit=1,
+        existing = self._cr_get_fe_document_attachment(
+            "pdf", legacy_domain=[("mimetype", "=", "application/pdf"), ("name", "=", filename)]
         )
         if existing:
             if self.id and self.cr_fe_pdf_attachment_id != existing:
@@ -1054,10 +1335,38 @@ class PosOrder(models.Model):
                 "mimetype": "application/pdf",
             }
         )
+        self._cr_register_fe_document("pdf", attachment, pdf_content)
         if self.id and self.cr_fe_pdf_attachment_id != attachment:
             self.sudo().write({"cr_fe_pdf_attachment_id": attachment.id})
         return attachment
 
+    def _cr_get_fe_document_attachment(self, kind, legacy_domain=None):
+        """Return the attachment registered in ``pos.fe.document`` for ``kind`` (indexed lookup).
+
+        ``legacy_domain`` matches, among the order attachments, the one created under the
+        expected name before the artifact store existed; it is registered on first use so
+        legacy orders reuse it instead of getting a duplicate.
+        """
+        self.ensure_one()
+        attachment = self.env["pos.fe.document"]._cr_get(self, kind).attachment_id
+        if attachment and attachment.exists():
+            return attachment
+        if legacy_domain and self.id:
+            attachment = self.env["ir.attachment"].sudo().search(
+                [("res_model", "=", "pos.order"), ("res_id", "=", self.id), *legacy_domain],
+                order="id desc",
+                limit=1,
+            )
+            if attachment and attachment.raw:
+                self._cr_register_fe_document(kind, attachment, attachment.raw)
+                return attachment.sudo(False)
+        return self.env["ir.attachment"]
+
+    def _cr_register_fe_document(self, kind, attachment, payload, source_hash=False):
+        """Record ``attachment`` as the ``kind`` artifact, hashing the in-memory ``payload`` once."""
+        self.ensure_one()
+        return self.env["pos.fe.document"]._cr_register(self, kind, attachment, payload, source_hash=source_hash)
+
     def _cr_pdf_attachment_name(self):
         self.ensure_one()
         order_name = (self.name or self.pos_reference or f"POS-{self.id}").replace("/", "-")
@@ -1074,15 +1383,9 @@ class PosOrder(models.Model):
             and self.cr_fe_pdf_attachment_id.mimetype == "application/pdf"
         ):
             return self.cr_fe_pdf_attachment_id
-        return self.env["ir.attachment"].search(
-            [
-                ("res_model", "=", "pos.order"),
-                ("res_id", "=", self.id),
-                ("mimetype", "=", "application/pdf"),
-                ("name", "like", f"Ticket_{(self.name or self.pos_reference or f'POS-{self.id}').replace('/', '-')}_%"),
-            ],
-            order="id desc",
-            limit=1,
+        order_name = (self.name or self.pos_reference or f"POS-{self.id}").replace("/", "-")
+        return self._cr_get_fe_document_attachment(
+            "pdf", legacy_domain=[("mimetype", "=", "application/pdf"), ("name", "like", f"Ticket_{order_name}_%")]
         )
 
     def _cr_wrap_receipt_html_for_pdf(self):
@@ -1100,12 +1403,114 @@ class PosOrder(models.Model):
             "</head><body>%s</body></html>"
         ) % html
 
+    def _cr_get_ticket_pdf_engine(self):
+        self.ensure_one()
+        return (self.config_id and self.config_id.cr_fe_ticket_pdf_engine) or "qweb"
+
+    def _cr_get_ticket_render_data(self):
+        """Plain data of the POS ticket report, consumed by the native (ReportLab) renderer."""
+        self.ensure_one()
+        currency = self.currency_id or self.company_id.currency_id
+        company = self.company_id
+        company_partner = company.partner_id
+        partner = self.partner_id
+
+        def money(amount):
+            return format_amount(self.env, amount or 0.0, currency)
+
+        def address(record):
+            text = record._display_address(without_company=True) if record else ""
+            return (text or "").replace("\n", " ").strip()
+
+        doc_type_map = {
+            "te": "Tiquete electrónico",
+            "fe": "Factura electrónica",
+            "nc": "Nota de crédito electrónica",
+            "nd": "Nota de débito electrónica",
+        }
+        company_lines = [
+            ("Identificación", company.vat),
+            ("Correo", company.email or company_partner.email),
+            ("Teléfono", company.phone or company_partner.phone),
+            ("Dirección", address(company_partner)),
+        ]
+        document_lines = [
+            ("Documento", doc_type_map.get(self.cr_fe_document_type or "te", "Comprobante electrónico")),
+            ("Consecutivo", self.cr_fe_consecutivo),
+            ("Orden", self.name or self.pos_reference),
+            (
+                "Fecha",
+                self.date_order
+                and format_datetime(self.env, self.date_order, tz=self.env.context.get("tz") or self.env.user.tz),
+            ),
+        ]
+        customer_lines = [
+            ("Nombre", partner.display_name if partner else "Consumidor Final"),
+            ("Identificación", partner.vat),
+            ("Teléfono", self._cr_get_partner_phone(partner)),
+            ("Correo", partner.email),
+            ("Dirección", address(partner)),
+        ]
+
+        lines = []
+        tax_summary = defaultdict(lambda: [0.0, 0.0])
+        for line in self.lines:
+            taxes = line.tax_ids_after_fiscal_position
+            tax_percent = sum(taxes.mapped("amount")) if taxes else 0.0
+            lines.append(
+                {
+                    "qty": "{:g}".format(line.qty),
+                    "name": line.full_product_name or line.product_id.display_name,
+                    "amount": money(line.price_subtotal_incl),
+                    "tax": "{:g}%".format(tax_percent),
+                }
+            )
+            bucket = tax_summary[tax_percent]
+            bucket[0] += line.price_subtotal
+            bucket[1] += line.price_subtotal_incl - line.price_subtotal
+
+        other_charges_amount = self.cr_other_charges_amount or 0.0
+        totals = [
+            ("Subtotal", money(self.amount_total - self.amount_tax - other_charges_amount)),
+            ("Impuesto", money(self.amount_tax)),
+        ]
+        if other_charges_amount:
+            totals.append(("Servicio 10%", money(other_charges_amount)))
+        totals.append(("Total", money(self.amount_total)))
+
+        return {
+            "title": self._cr_pdf_attachment_name(),
+            "company_name": company.name,
+            "company_lines": [(label, value) for label, value in company_lines if value],
+            "document_lines": [(label, value) for label, value in document_lines if value],
+            "customer_lines": [(label, value) for label, value in customer_lines if value],
+            "lines": lines,
+            "totals": totals,
+            "tax_summary": [
+                ("IVA {:g}%".format(percent) if percent else "Exento", money(base), money(tax))
+                for percent, (base, tax) in sorted(tax_summary.items())
+            ],
+            "other_charges": other_charges_amount and money(other_charges_amount),
+            "clave": self.cr_fe_clave,
+            "legend": [
+                "Autorizado mediante la resolución MH-DGT-RES-0027-2024 del 19/11/2024",
+                "Versión XML 4.4",
+            ],
+        }
+
     def _cr_render_receipt_pdf_content(self):
         self.ensure_one()
         # Enterprise-safe rendering strategy:
+        # 0) Native in-process renderer when selected on the POS config (falls back to QWeb on error).
         # 1) Force deterministic QWeb PDF rendering for pos.order (mail attachment quality).
         # 2) Reuse existing attachment only if report rendering is unavailable.
         # 3) Keep POS HTML-to-PDF as last-resort compatibility fallback.
+        if self._cr_get_ticket_pdf_engine() == "native":
+            try:
+                return render_ticket_pdf(self._cr_get_ticket_render_data())
+            except Exception:  # noqa: BLE001
+                self._logger.exception("Native ticket PDF rendering failed for POS order %s; using QWeb.", self.id)
+
         report = self.env.ref("cr_pos_einvoice.action_report_pos_order_ticket_cr", raise_if_not_found=False)
         if report and report.report_name and report.model == "pos.order" and report.report_type == "qweb-pdf":
             report_engine = self.env["ir.actions.report"].sudo()
@@ -1128,7 +1533,47 @@ class PosOrder(models.Model):
 
         return b""
 
-    def _cr_upsert_receipt_pdf_attachment(self, pdf_content):
+    def _cr_get_receipt_render_hash(self):
+        """Hash of every input rendered on the POS ticket PDF.
+
+        The order ``write_date`` is deliberately not used: storing the PDF itself writes on the
+        order, which would invalidate the cache right after every render.
+        """
+        self.ensure_one()
+        company_partner = self.company_id.partner_id
+        source = [
+            self._CR_RECEIPT_REPORT_VERSION,
+            self.name,
+            self.pos_reference,
+            self.date_order,
+            self.amount_total,
+            self.amount_tax,
+            self.cr_other_charges_amount,
+            self.currency_id.id,
+            self.cr_fe_document_type,
+            self.cr_fe_clave,
+            self.cr_fe_consecutivo,
+            self._cr_normalize_hacienda_status(self.cr_fe_status),
+            self._cr_get_ticket_pdf_engine(),
+            self.partner_id.id,
+            self.partner_id.write_date,
+            self.company_id.write_date,
+            company_partner.write_date,
+            sorted((line.id, str(line.write_date)) for line in self.lines),
+        ]
+        return hashlib.sha256(repr(source).encode("utf-8")).hexdigest()
+
+    def _cr_get_valid_receipt_pdf_attachment(self, render_hash=None):
+        """Return the cached receipt PDF if it was rendered from the current inputs."""
+        self.ensure_one()
+        document = self.env["pos.fe.document"]._cr_get(self, "pdf")
+        if not document.source_hash or not document.attachment_id.exists():
+            return self.env["ir.attachment"]
+        if document.source_hash != (render_hash or self._cr_get_receipt_render_hash()):
+            return self.env["ir.attachment"]
+        return document.attachment_id
+
+    def _cr_upsert_receipt_pdf_attachment(self, pdf_content, source_hash=False):
         self.ensure_one()
         if not pdf_content:
             return self.env["ir.attachment"]
@@ -1144,23 +1589,111 @@ class PosOrder(models.Model):
         }
         if existing:
             existing.write(values)
+            self._cr_register_fe_document("pdf", existing, pdf_content, source_hash=source_hash)
             if self.id and self.cr_fe_pdf_attachment_id != existing:
                 self.sudo().write({"cr_fe_pdf_attachment_id": existing.id})
             return existing
         attachment = self.env["ir.attachment"].create(values)
+        self._cr_register_fe_document("pdf", attachment, pdf_content, source_hash=source_hash)
         if self.id and self.cr_fe_pdf_attachment_id != attachment:
             self.sudo().write({"cr_fe_pdf_attachment_id": attachment.id})
         return attachment
 
+    def _compute_cr_receipt_html(self):
+        for order in self:
+            attachment = order._cr_get_fe_document_attachment("receipt_html") if order.id else False
+            raw = attachment and attachment.raw
+            order.cr_receipt_html = gzip.decompress(raw).decode("utf-8") if raw else False
+
+    def _inverse_cr_receipt_html(self):
+        for order in self:
+            order._cr_store_receipt_html(order.cr_receipt_html)
+
+    def _cr_store_receipt_html(self, receipt_html):
+        """Store the captured receipt HTML gzip-compressed in the filestore, keyed by order.
+
+        Nothing is written on the ``pos_order`` row; an empty value removes the stored capture.
+        """
+        self.ensure_one()
+        attachment = self._cr_get_fe_document_attachment("receipt_html")
+        html = (receipt_html or "").strip()[: self._CR_RECEIPT_HTML_MAX_SIZE]
+        if not html:
+            if attachment:
+                attachment.sudo().unlink()
+                self.invalidate_recordset(["cr_receipt_html"])
+            return self.env["ir.attachment"]
+
+        payload = gzip.compress(html.encode("utf-8"), compresslevel=6)
+        values = {
+            "name": f"receipt-{self.id}.html.gz",
+            "type": "binary",
+            "raw": payload,
+            "res_model": "pos.order",
+            "res_id": self.id,
+            "mimetype": "application/gzip",
+        }
+        if attachment:
+            attachment.sudo().write(values)
+        else:
+            attachment = self.env["ir.attachment"].sudo().create(values)
+        self._cr_register_fe_document("receipt_html", attachment, payload)
+        self.invalidate_recordset(["cr_receipt_html"])
+        return attachment
+
+    @api.model
+    def _cron_cr_pos_purge_receipt_html(self, limit=1000):
+        """Delete captured receipt HTML older than the configured retention (days)."""
+        days = int(
+            self.env["ir.config_parameter"].sudo().get_param(
+                "cr_pos_einvoice.receipt_html_retention_days", self._CR_RECEIPT_HTML_RETENTION_DAYS
+            )
+            or 0
+        )
+        if days <= 0:
+            return True
+        documents = self.env["pos.fe.document"].sudo().search(
+            [("kind", "=", "receipt_html"), ("created_at", "<", fields.Datetime.now() - timedelta(days=days))],
+            limit=limit,
+        )
+        # Unlinking the attachment cascades to the pos.fe.document row.
+        documents.attachment_id.unlink()
+        if len(documents) == limit:
+            self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_purge_receipt_html")._trigger()
+        return True
+
+    @api.model
+    def _cr_decode_receipt_capture(self, data, encoding=None):
+        """Decode a POS capture upload (``gzip+base64`` from CompressionStream, or plain text)."""
+        if encoding == "gzip+base64":
+            # Bounded inflate: never expand more than the capture size limit.
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            raw = decompressor.decompress(base64.b64decode(data or ""), self._CR_RECEIPT_HTML_MAX_SIZE)
+            return raw.decode("utf-8", errors="replace")
+        return data or ""
+
     @api.model
-    def cr_pos_store_receipt_html(self, order_id, receipt_html):
+    def cr_pos_store_receipt_html(self, order_id, receipt_html, options=None):
+        """Store the receipt HTML captured by the POS.
+
+        ``options`` (sent by receipt_capture_patch.js): ``encoding`` of ``receipt_html`` and
+        ``header_digest`` of the static receipt header, uploaded once per content digest through
+        ``pos.config.cr_pos_store_receipt_header``. When that header is unknown the call returns
+        ``missing_header`` so the client uploads it and retries.
+        """
         order = self.browse(order_id).exists()
         if not order:
             return {"ok": False}
-        sanitized_html = (receipt_html or "").strip()
-        order.sudo().write({"cr_receipt_html": sanitized_html[:5_000_000]})
+        options = options or {}
+        receipt_html = self._cr_decode_receipt_capture(receipt_html, options.get("encoding"))
+        header_digest = options.get("header_digest")
+        if header_digest:
+            header = self.env["pos.config"]._cr_get_receipt_header(header_digest)
+            if header is False:
+                return {"ok": False, "missing_header": True}
+            receipt_html = receipt_html.replace(self._CR_RECEIPT_HEADER_PLACEHOLDER, header, 1)
+        order.sudo()._cr_store_receipt_html(receipt_html)
         if order.cr_fe_status == "accepted":
-            order.cr_pos_generate_receipt_pdf_if_accepted([order.id])
+            order._cr_enqueue_receipt_pdf()
         return {"ok": True}
 
     @api.model
@@ -1170,14 +1703,148 @@ class PosOrder(models.Model):
             if order._cr_normalize_hacienda_status(order.cr_fe_status) != "accepted":
                 continue
             try:
-                pdf_content = order._cr_render_receipt_pdf_content()
-                attachment = order._cr_upsert_receipt_pdf_attachment(pdf_content)
-                if attachment and order.cr_receipt_html:
-                    order.sudo().write({"cr_receipt_html": False})
+                render_hash = order._cr_get_receipt_render_hash()
+                if order._cr_get_valid_receipt_pdf_attachment(render_hash):
+                    order._cr_store_receipt_pdf(False)
+                    continue
+                order._cr_store_receipt_pdf(order._cr_render_receipt_pdf_content(), source_hash=render_hash)
             except Exception:  # noqa: BLE001
                 order._logger.exception("Error generating accepted receipt PDF for POS order %s", order.id)
         return True
 
+    def _cr_store_receipt_pdf(self, pdf_content, source_hash=False):
+        """Upsert the rendered receipt PDF and clear the captured HTML and the render queue flag.
+
+        With an empty ``pdf_content`` only the bookkeeping is done (cached PDF still valid).
+        """
+        self.ensure_one()
+        attachment = (
+            self._cr_upsert_receipt_pdf_attachment(pdf_content, source_hash=source_hash)
+            if pdf_content
+            else self._cr_get_existing_receipt_pdf_attachment()
+        )
+        if attachment:
+            self.sudo()._cr_store_receipt_html(False)
+        if self.cr_fe_pdf_pending or self.cr_fe_pdf_attempts:
+            self.sudo().write({"cr_fe_pdf_pending": False, "cr_fe_pdf_attempts": 0, "cr_fe_pdf_next_try": False})
+        return attachment
+
+    def _cr_enqueue_receipt_pdf(self):
+        """Queue accepted orders for background PDF rendering and wake up the render cron."""
+        orders = self.filtered(lambda order: order.id and not order.cr_fe_pdf_pending)
+        if not orders:
+            return False
+        orders.sudo().write({"cr_fe_pdf_pending": True, "cr_fe_pdf_attempts": 0, "cr_fe_pdf_next_try": False})
+        cron = self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_render_pending_receipt_pdfs", raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return True
+
+    def _cr_render_receipt_pdf_batch(self):
+        """Render the POS ticket of every QWeb-engine order in ``self`` with a single wkhtmltopdf run.
+
+        The report is split back per order using the PDF outlines. Returns ``{order_id: pdf_bytes}``;
+        orders missing from the result (including native-engine ones) must be rendered individually.
+        """
+        orders = self.filtered(lambda order: order._cr_get_ticket_pdf_engine() == "qweb")
+        if len(orders) < 2:
+            return {}
+        report = self.env.ref("cr_pos_einvoice.action_report_pos_order_ticket_cr", raise_if_not_found=False)
+        if not (report and report.report_name and report.model == "pos.order" and report.report_type == "qweb-pdf"):
+            return {}
+        if (odoo_config["test_enable"] or odoo_config["test_file"]) and not self.env.context.get("force_report_rendering"):
+            # Same guard as ir.actions.report._render_qweb_pdf: no wkhtmltopdf workers during tests.
+            return {}
+
+        try:
+            streams = self.env["ir.actions.report"].sudo()._render_qweb_pdf_prepare_streams(
+                report.report_name,
+                {"report_type": "pdf"},
+                res_ids=orders.ids,
+            )
+        except Exception:  # noqa: BLE001
+            self._logger.exception("Batched receipt PDF rendering failed for POS orders %s", orders.ids)
+            return {}
+
+        contents = {}
+        for res_id, stream_data in streams.items():
+            stream = stream_data.get("stream")
+            if stream is None:
+                continue
+            if res_id in orders.ids:
+                contents[res_id] = stream.getvalue()
+            stream.close()
+        return contents
+
+    @api.model
+    def _cron_cr_pos_render_pending_receipt_pdfs(self, limit=200):
+        orders = self.search(
+            [
+                ("cr_fe_pdf_pending", "=", True),
+                "|",
+                ("cr_fe_pdf_next_try", "=", False),
+                ("cr_fe_pdf_next_try", "<=", fields.Datetime.now()),
+            ],
+            order="id",
+            limit=limit,
+        )
+        accepted = orders.filtered(lambda order: order._cr_normalize_hacienda_status(order.cr_fe_status) == "accepted")
+        if orders - accepted:
+            (orders - accepted).sudo().write({"cr_fe_pdf_pending": False})
+
+        render_hashes = {order.id: order._cr_get_receipt_render_hash() for order in accepted}
+        cached = accepted.filtered(lambda order: order._cr_get_valid_receipt_pdf_attachment(render_hashes[order.id]))
+        for order in cached:
+            order._cr_store_receipt_pdf(False)
+        ready = cached
+
+        to_render = accepted - cached
+        batch_size = self._CR_RECEIPT_PDF_BATCH_SIZE
+        for offset in range(0, len(to_render), batch_size):
+            batch = to_render[offset : offset + batch_size]
+            rendered = batch._cr_render_receipt_pdf_batch()
+            for order in batch:
+                try:
+                    with self.env.cr.savepoint():
+                        pdf_content = rendered.get(order.id) or order._cr_render_receipt_pdf_content()
+                        order._cr_store_receipt_pdf(pdf_content, source_hash=render_hashes[order.id])
+                except Exception:  # noqa: BLE001
+                    self._logger.exception("Error generating queued receipt PDF for POS order %s", order.id)
+                    if order._cr_register_receipt_pdf_failure():
+                        ready |= order
+                    continue
+                ready |= order
+
+        ready._cr_enqueue_accepted_email()
+        # Only chain another run while this one made progress, so permanent failures cannot loop it.
+        if ready and len(orders) == limit:
+            self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_render_pending_receipt_pdfs")._trigger()
+        return True
+
+    def _cr_register_receipt_pdf_failure(self):
+        """Back off a failed queued render; return True when the order gives up on it.
+
+        After ``_CR_RECEIPT_PDF_MAX_ATTEMPTS`` failures the order leaves the render queue
+        and its email goes out with the existing (or fallback) PDF.
+        """
+        self.ensure_one()
+        attempts = self.cr_fe_pdf_attempts + 1
+        if attempts >= self._CR_RECEIPT_PDF_MAX_ATTEMPTS:
+            self._logger.warning(
+                "Giving up queued receipt PDF rendering for POS order %s after %s attempts; using the existing PDF.",
+                self.id,
+                attempts,
+            )
+            self.sudo().write({"cr_fe_pdf_pending": False, "cr_fe_pdf_attempts": attempts, "cr_fe_pdf_next_try": False})
+            return True
+        self.sudo().write(
+            {
+                "cr_fe_pdf_attempts": attempts,
+                "cr_fe_pdf_next_try": fields.Datetime.now() + timedelta(minutes=min(60, attempts * 10)),
+            }
+        )
+        return False
+
     def _cr_get_email_attachments(self):
         self.ensure_one()
         attachments = self.env["ir.attachment"]
@@ -1186,7 +1853,7 @@ class PosOrder(models.Model):
                 attachments |= attachment
 
         # Prefer the FE-accepted receipt PDF linked directly to pos.order.
-        # If FE is accepted, force generation/upsert first so mail can include it.
+        # If FE is accepted, make sure it is up to date; the render cache skips wkhtmltopdf when it is.
         if self._cr_normalize_hacienda_status(self.cr_fe_status) == "accepted":
             self.cr_pos_generate_receipt_pdf_if_accepted([self.id])
         pdf_attachment = self._cr_get_existing_receipt_pdf_attachment()
@@ -1207,11 +1874,19 @@ class PosOrder(models.Model):
         )
 
     def _cr_acquire_email_send_lock(self):
-        """Serialize FE email dispatch per POS order to avoid duplicate sends."""
+        """Serialize FE email dispatch per (order, recipient) to avoid duplicate sends.
+
+        The lock is taken on the ``pos.fe.email`` ledger row, never on ``pos_order``; the email cron
+        skips rows locked here (``FOR UPDATE SKIP LOCKED``) and vice versa.
+        """
         self.ensure_one()
+        recipient = self._cr_get_customer_email()
+        if not recipient:
+            return True
         try:
             with self.env.cr.savepoint(flush=False):
-                self.env.cr.execute("SELECT id FROM pos_order WHERE id = %s FOR UPDATE NOWAIT", (self.id,))
+                entry = self.env["pos.fe.email"]._cr_ensure(self, recipient)
+                self.env.cr.execute("SELECT id FROM pos_fe_email WHERE id = %s FOR UPDATE NOWAIT", (entry.id,))
             return True
         except LockNotAvailable:
             self._logger.info(
@@ -1227,7 +1902,32 @@ class PosOrder(models.Model):
             )
             return False
 
+    def _cr_enqueue_accepted_email(self):
+        """Queue the accepted-document email of each order; the email cron sends them in batches."""
+        queued = False
+        for order in self:
+            if not order._cr_should_send_accepted_email():
+                continue
+            entry = self.env["pos.fe.email"]._cr_ensure(order, order._cr_get_customer_email())
+            queued = queued or entry.state == "queued"
+        if queued:
+            self.env["pos.fe.email"]._cr_trigger_delivery()
+        return queued
+
+    def _cr_prepare_accepted_email_values(self, recipient, attachments):
+        self.ensure_one()
+        return {
+            "subject": self._cr_get_email_subject(),
+            "email_to": recipient,
+            "body_html": self._cr_get_email_body_html(),
+            "auto_delete": False,
+            "model": "pos.order",
+            "res_id": self.id,
+            "attachment_ids": [(6, 0, attachments.ids)],
+        }
+
     def _cr_try_send_accepted_email(self):
+        """Send the accepted-document email right away (manual resend); automatic delivery is queued."""
         self.ensure_one()
         if not self._cr_acquire_email_send_lock():
             return False
@@ -1237,43 +1937,31 @@ class PosOrder(models.Model):
             return False
 
         recipient = self._cr_get_customer_email()
-        attachments = self._cr_get_email_attachments()
-        existing_mail = self._cr_find_existing_sent_fe_email(recipient)
-        if existing_mail:
+        existing_entry = self._cr_find_existing_sent_fe_email(recipient)
+        if existing_entry:
             self._logger.info(
-                "Skipping duplicate FE email for POS order %s; mail %s already exists in state %s.",
+                "Skipping duplicate FE email for POS order %s; already sent to %s on %s.",
                 self.id,
-                existing_mail.id,
-                existing_mail.state,
+                recipient,
+                existing_entry.sent_at,
             )
             self._cr_mark_accepted_email_sent()
             return True
+        entry = self.env["pos.fe.email"]._cr_ensure(self, recipient)
+        attachments = self._cr_get_email_attachments()
         if not attachments:
-            self._cr_set_email_delivery_error(_("No se encontraron adjuntos XML/PDF para el envío por correo."))
+            message = _("No se encontraron adjuntos XML/PDF para el envío por correo.")
+            entry._cr_mark_error(message)
+            self._cr_set_email_delivery_error(message)
             return False
 
         try:
-            mail = (
-                self.env["mail.mail"]
-                .sudo()
-                .create(
-                    {
-                        "subject": self._cr_get_email_subject(),
-                        "email_to": recipient,
-                        "body_html": self._cr_get_email_body_html(),
-                        "auto_delete": False,
-                        "model": "pos.order",
-                        "res_id": self.id,
-                        "attachment_ids": [(6, 0, attachments.ids)],
-                    }
-                )
-            )
+            mail = self.env["mail.mail"].sudo().create(self._cr_prepare_accepted_email_values(recipient, attachments))
             mail.send()
+            entry._cr_mark_sent(mail)
             self._cr_mark_accepted_email_sent()
-            self._cr_post_fe_event(
-                title=_("Correo FE enviado"),
-                body=_("Se envió TE/NC aceptado al cliente: %s") % recipient,
-                attachments=attachments,
+            self.env["pos.fe.event"]._cr_log(
+                [{"order_id": self.id, "event": "email_sent", "message": recipient}]
             )
             return True
         except (SerializationFailure, InFailedSqlTransaction) as error:
@@ -1285,24 +1973,16 @@ class PosOrder(models.Model):
             return False
         except Exception as error:  # noqa: BLE001
             self._logger.exception("Error enviando correo FE para POS order %s", self.id)
+            entry._cr_mark_error(str(error))
             self._cr_set_email_delivery_error(str(error))
             return False
 
     def _cr_find_existing_sent_fe_email(self, recipient):
+        """Indexed dedupe lookup on the ``pos.fe.email`` ledger."""
         self.ensure_one()
-        return (
-            self.env["mail.mail"]
-            .sudo()
-            .search(
-                [
-                    ("model", "=", "pos.order"),
-                    ("res_id", "=", self.id),
-                    ("email_to", "=", recipient),
-                    ("state", "in", ["outgoing", "sent"]),
-                ],
-                order="id desc",
-                limit=1,
-            )
+        return self.env["pos.fe.email"].sudo().search(
+            [("order_id", "=", self.id), ("email_to", "=", recipient), ("state", "=", "sent")],
+            limit=1,
         )
 
     def _cr_mark_accepted_email_sent(self):
@@ -1342,71 +2022,78 @@ class PosOrder(models.Model):
         return False
 
     def write(self, vals):
-        """Post FE milestones to chatter (generated/sent/accepted/rejected/error)."""
-        tracked_fields = {"cr_fe_status", "cr_fe_xml_attachment_id", "cr_fe_response_attachment_id", "cr_fe_pdf_attachment_id"}
+        """Log FE milestones (XML generated, status changes, MH response) to ``pos.fe.event``.
+
+        Events of the whole recordset are inserted in one batch; the chatter only
+        gets a summary when the order reaches a terminal FE state.
+        """
+        tracked_fields = {"cr_fe_status", "cr_fe_xml_attachment_id", "cr_fe_response_attachment_id"}
         needs_track = bool(tracked_fields.intersection(vals))
+        accepted_orders = self.browse()
         old = {}
         if needs_track:
             for order in self:
                 old[order.id] = {
                     "status": order.cr_fe_status,
-                    "xml": order.cr_fe_xml_attachment_id.id if order.cr_fe_xml_attachment_id else False,
-                    "resp": order.cr_fe_response_attachment_id.id if order.cr_fe_response_attachment_id else False,
+                    "status_changed_at": order.cr_fe_status_changed_at,
+                    "xml": order.cr_fe_xml_attachment_id.id,
+                    "resp": order.cr_fe_response_attachment_id.id,
                 }
+        now = fields.Datetime.now()
+        if "cr_fe_status" in vals and "cr_fe_status_changed_at" not in vals:
+            vals = dict(vals, cr_fe_status_changed_at=now)
+
+        if self._CR_REFERENCE_MEMO_FIELDS.intersection(vals):
+            # Also covers refunds of these orders: their reference derives from the origin.
+            self._cr_clear_reference_memo()
+
+        if SUMMARY_ORDER_FIELDS.intersection(vals):
+            self.env["pos.fe.daily.summary"]._cr_mark_orders_dirty(self)
 
         res = super().write(vals)
 
         if needs_track:
+            events = []
             for order in self:
-                prev = old.get(order.id, {})
-                if not prev:
-                    continue
-
-                # XML generated (first time linked)
+                prev = old[order.id]
                 new_xml = order.cr_fe_xml_attachment_id
-                if (not prev.get("xml")) and new_xml:
-                    order._cr_post_fe_event(
-                        title=_("Documento FE generado"),
-                        body=_("Se generó el XML firmado (%s).") % (new_xml.name or ""),
-                        attachments=[new_xml],
-                    )
+                if not prev["xml"] and new_xml:
+                    events.append({"order_id": order.id, "event": "xml_generated", "event_date": now, "attachment_id": new_xml.id})
 
-                # Status transitions
-                if "cr_fe_status" in vals and prev.get("status") != order.cr_fe_status:
-                    label = order._cr_fe_status_label(order.cr_fe_status)
-                    extra = ""
-                    if order.cr_fe_status in ("sent", "processing"):
-                        extra = _("Documento enviado a Hacienda.")
-                    elif order.cr_fe_status == "accepted":
-                        extra = _("Documento aceptado por Hacienda.")
-                    elif order.cr_fe_status == "rejected":
-                        extra = _("Documento rechazado por Hacienda.")
-                    elif order.cr_fe_status in ("error", "error_retry"):
-                        extra = order.cr_fe_last_error or ""
-
-                    order._cr_post_fe_event(
-                        title=_("Estado FE: %s") % label,
-                        body=extra,
-                        attachments=[order.cr_fe_response_attachment_id] if order.cr_fe_response_attachment_id else None,
+                if "cr_fe_status" in vals and prev["status"] != order.cr_fe_status:
+                    since = prev["status_changed_at"]
+                    events.append(
+                        {
+                            "order_id": order.id,
+                            "event": "status",
+                            "event_date": now,
+                            "status": order.cr_fe_status,
+                            "previous_status": prev["status"],
+                            "duration": (now - since).total_seconds() if since else 0.0,
+                            "message": order.cr_fe_last_error if order.cr_fe_status in ("error", "error_retry") else False,
+                        }
                     )
+                    if order.cr_fe_status in self._CR_FE_TERMINAL_STATUSES:
+                        order._cr_post_fe_terminal_summary()
                     if (
                         order.cr_fe_status == "accepted"
                         and not self.env.context.get("cr_fe_skip_email_delivery")
                     ):
-                        order.cr_pos_generate_receipt_pdf_if_accepted([order.id])
-                        order._cr_try_send_accepted_email()
+                        accepted_orders |= order
 
-                # Response received (first time linked)
                 new_resp = order.cr_fe_response_attachment_id
-                if (not prev.get("resp")) and new_resp:
-                    order._cr_post_fe_event(
-                        title=_("Respuesta Hacienda recibida"),
-                        body=_("Se almacenó la respuesta MH (%s).") % (new_resp.name or ""),
-                        attachments=[new_resp],
+                if not prev["resp"] and new_resp:
+                    events.append(
+                        {"order_id": order.id, "event": "response_received", "event_date": now, "attachment_id": new_resp.id}
                     )
+            self.env["pos.fe.event"]._cr_log(events)
+
+        if accepted_orders:
+            # PDF rendering and email delivery run in the render cron, outside the status transaction.
+            accepted_orders._cr_enqueue_receipt_pdf()
 
         if "lines" in vals:
-            self._cr_capture_reference_snapshot()
+            self._cr_get_refund_candidates()._cr_capture_reference_snapshot()
 
         reference_fields = {
             "cr_fe_reference_document_type",
@@ -1445,8 +2132,10 @@ class PosOrder(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         records = super().create(vals_list)
-        records._cr_prefill_reference_from_origin_order()
-        records._cr_capture_reference_snapshot()
+        self.env["pos.fe.daily.summary"]._cr_mark_orders_dirty(records, created=True)
+        refunds = records._cr_get_refund_candidates()
+        refunds._cr_prefill_reference_from_origin_order()
+        refunds._cr_capture_reference_snapshot()
         return records
 
     @api.model
@@ -1455,8 +2144,9 @@ class PosOrder(models.Model):
         records = self.browse([item.get("id") if isinstance(item, dict) else item for item in result]).exists()
         # Refund references must be available as soon as the order is created,
         # even when the POS keeps it in draft before registering a payment.
-        records._cr_prefill_reference_from_origin_order()
-        records._cr_capture_reference_snapshot()
+        refunds = records._cr_get_refund_candidates()
+        refunds._cr_prefill_reference_from_origin_order()
+        refunds._cr_capture_reference_snapshot()
         if draft:
             # Refund orders are often created in draft first ("Devolver") and
             # finalized later. Return FE reference fields immediately so OWL POS
@@ -1583,13 +2273,6 @@ class PosOrder(models.Model):
 
         company_partner = order.company_id.partner_id
         receptor_partner = order.partner_id
-        emisor_address_parts = [
-            company_partner.street,
-            (getattr(company_partner, "fp_neighborhood_id", False) and getattr(company_partner.fp_neighborhood_id, "name", False)) or False,
-            (getattr(company_partner, "fp_district_id", False) and getattr(company_partner.fp_district_id, "name", False)) or False,
-            (getattr(company_partner, "fp_canton_id", False) and getattr(company_partner.fp_canton_id, "name", False)) or False,
-            (getattr(company_partner, "fp_province_id", False) and getattr(company_partner.fp_province_id, "name", False)) or False,
-        ]
         receptor_address_parts = [
             receptor_partner.street if receptor_partner else False,
             ((getattr(receptor_partner, "fp_neighborhood_id", False) and getattr(receptor_partner.fp_neighborhood_id, "name", False)) if receptor_partner else False),
@@ -1615,7 +2298,7 @@ class PosOrder(models.Model):
             "cr_fe_emisor_vat": order.company_id.vat,
             "cr_fe_emisor_email": company_partner.email,
             "cr_fe_emisor_phone": order._cr_get_partner_phone(company_partner),
-            "cr_fe_emisor_address": ", ".join([part for part in emisor_address_parts if part]),
+            "cr_fe_emisor_address": order.company_id._cr_get_fe_context()["emisor_address"],
             "cr_fe_receptor_name": receptor_partner.name if receptor_partner else False,
             "cr_fe_receptor_vat": receptor_partner.vat if receptor_partner else False,
             "cr_fe_receptor_email": receptor_partner.email if receptor_partner else False,
@@ -1731,13 +2414,10 @@ class PosOrder(models.Model):
             return
 
         # Odoo versions/modules may expose a different field name.
-        tip_field = None
-        for candidate in ("tip_amount", "amount_tip"):
-            if candidate in self._fields:
-                tip_field = candidate
-                break
-        if not tip_field:
+        tip_fields = self._cr_field_aliases()["order_tip_amount"]
+        if not tip_fields:
             return
+        tip_field = tip_fields[0]
 
         if sanitized_order.get(tip_field) not in (None, False, ""):
             # Respect value already computed by POS core/UI.
@@ -2222,6 +2902,16 @@ class PosOrder(models.Model):
         return normalized
 
     def _cr_get_other_charges_payload(self):
+        """OtrosCargos of the order, read from the stored resolution.
+
+        Unsaved (onchange/test) records have no stored value and resolve live.
+        """
+        self.ensure_one()
+        if not self.id:
+            return self._cr_resolve_other_charges()
+        return [dict(charge) for charge in self.cr_other_charges_resolved_json or []]
+
+    def _cr_resolve_other_charges(self):
         self.ensure_one()
         marked_line_charge = self._cr_build_service_charge_from_marked_lines()
         explicit_charges = self._cr_normalize_other_charges(self.cr_other_charges_json)
@@ -2269,18 +2959,7 @@ class PosOrder(models.Model):
         materializing OtrosCargos code 06 deterministically.
         """
         self.ensure_one()
-        for field_name in (
-            "cr_other_charge_amount",
-            "other_charge_amount",
-            "fp_other_charge_amount",
-            "l10n_cr_other_charge_amount",
-            "tip_amount",
-            "amount_tip",
-            "cr_tip_amount",
-            "tip",
-        ):
-            if field_name not in self._fields:
-                continue
+        for field_name in self._cr_field_aliases()["order_declared_other_charge_amount"]:
             try:
                 amount = float(self[field_name] or 0.0)
             except (TypeError, ValueError):
@@ -2294,8 +2973,8 @@ class PosOrder(models.Model):
         config = self.config_id or self.session_id.config_id
         if not config:
             return self.env["product.product"]
-        for field_name in ("cr_tip_product_id", "pos_tip_product_id", "tip_product_id"):
-            if field_name in config._fields and config[field_name]:
+        for field_name in self._cr_field_aliases()["config_tip_product"]:
+            if config[field_name]:
                 return config[field_name]
         return self.env["product.product"]
 
@@ -2303,25 +2982,7 @@ class PosOrder(models.Model):
         """Detect products flagged as Otros Cargos in compatible FE modules."""
         if not product:
             return False
-        product_tmpl = product.product_tmpl_id
-        candidate_markers = (
-            "is_other_charge",
-            "is_other_charges",
-            "is_otros_cargos",
-            "is_otro_cargo",
-            "l10n_cr_is_other_charge",
-            "l10n_cr_other_charge",
-            "fp_is_other_charge",
-            "fe_is_other_charge",
-            "cr_is_other_charge",
-            "cr_is_other_charge_line",
-        )
-        for marker in candidate_markers:
-            if marker in product._fields and product[marker]:
-                return True
-            if product_tmpl and marker in product_tmpl._fields and product_tmpl[marker]:
-                return True
-        return False
+        return product.cr_fe_charge_role == "other_charge"
 
     def _cr_is_tip_line(self, line, tip_product=False):
         """Centralized predicate to detect native/custom POS tip lines safely."""
@@ -2331,16 +2992,8 @@ class PosOrder(models.Model):
             tip_product = self._cr_get_tip_product()
         if tip_product and line.product_id == tip_product:
             return True
-        # Compatibility with custom POS modules that annotate line flags.
-        for marker in ("is_tip", "is_tip_line", "cr_is_tip_line"):
-            if marker in line._fields and line[marker]:
-                return True
-        for marker in self._CR_OTHER_CHARGE_LINE_MARKERS:
-            if marker in line._fields and line[marker]:
-                return True
-        if self._cr_is_other_charge_product(line.product_id):
-            return True
-        return False
+        # Line markers and the product FE role, resolved when the line was stored.
+        return line.cr_is_fe_charge_line
 
     def _cr_get_tip_line_ids(self):
         self.ensure_one()
@@ -2383,12 +3036,7 @@ class PosOrder(models.Model):
         return percent if percent > 0 else 10.0
 
     def _cr_is_tip_name_candidate(self, line):
-        if not line or not line.product_id:
-            return False
-        product_name = line.product_id.display_name or line.product_id.name or ""
-        normalized_name = unicodedata.normalize("NFKD", product_name).encode("ascii", "ignore").decode("ascii").lower()
-        tip_keywords = ("propina", "servicio", "tip", "service charge")
-        return any(keyword in normalized_name for keyword in tip_keywords)
+        return bool(line) and line.product_id.cr_fe_charge_role == "tip_name"
 
     def _cr_guess_tip_line_ids(self):
         """Fallback for sessions where tip product isn't configured on POS config.
@@ -2863,7 +3511,10 @@ class PosOrder(models.Model):
             return False
 
     def _cr_get_refund_reference_data(self):
-        """Return normalized FE reference data for refund orders."""
+        """Return normalized FE reference data for refund orders, memoized per transaction."""
+        return self._cr_get_reference_memo("refund", self._cr_resolve_refund_reference_data)
+
+    def _cr_resolve_refund_reference_data(self):
         self.ensure_one()
         if not self._cr_is_credit_note_order():
             return {}
@@ -3001,7 +3652,7 @@ class PosOrder(models.Model):
     def _cr_dispatch_einvoice_flow(self):
         for order in self:
             if order.config_id and not order.config_id.cr_fe_enabled:
-                order.cr_fe_status = "not_applicable"
+                order._cr_fe_transition("not_applicable")
                 continue
 
             if order._cr_requires_account_move_flow():
@@ -3009,40 +3660,44 @@ class PosOrder(models.Model):
                 if invoice:
                     order._cr_sync_from_invoice_only()
                 else:
-                    order.write(
-                        {
-                            "cr_fe_status": "not_applicable",
-                            "cr_fe_error_code": False,
-                            "cr_fe_last_error": False,
-                            "cr_fe_next_try": False,
-                        }
+                    order._cr_fe_transition(
+                        "not_applicable",
+                        {"cr_fe_error_code": False, "cr_fe_last_error": False, "cr_fe_next_try": False},
                     )
                 continue
 
             order._cr_trigger_te_flow_nonblocking()
 
-    def _cr_sync_from_invoice_only(self):
+    def _cr_sync_from_invoice_only(self, prepared_invoices=()):
+        """Mirror the FE data of each order's invoice on the order.
+
+        ``prepared_invoices`` are invoices whose FE values the caller already wrote
+        (batched post hook of account.move); they are not written again.
+        """
         for order in self:
             invoice = order._cr_get_real_invoice_move()
             if not invoice:
                 message = _("Pedido marcado como facturado, pero no existe account.move asociado.")
-                order.write({"cr_fe_status": "error", "cr_fe_error_code": "invoice_missing", "cr_fe_last_error": message})
+                order._cr_fe_transition("error", {"cr_fe_error_code": "invoice_missing", "cr_fe_last_error": message})
                 self._logger.error("POS FE inconsistencia en pedido %s: %s", order.name, message)
                 continue
 
-            order._cr_prepare_invoice_fe_values(invoice)
+            if invoice not in prepared_invoices:
+                order._cr_prepare_invoice_fe_values(invoice)
             mapped_status = "pending"
             if "fp_api_state" in invoice._fields and invoice.fp_api_state:
                 mapped_status = order._cr_normalize_hacienda_status(invoice.fp_api_state)
             elif "fp_invoice_status" in invoice._fields and invoice.fp_invoice_status:
                 mapped_status = order._cr_normalize_hacienda_status(invoice.fp_invoice_status)
 
-            order.write(
-                {
+            # The invoice is authoritative: a rejected, corrected and re-sent invoice moves its order too.
+            order._cr_fe_transition(
+                mapped_status,
+                force=True,
+                values={
                     "cr_fe_document_type": "nc" if invoice.move_type == "out_refund" else "fe",
                     "cr_fe_clave": invoice.fp_external_id if "fp_external_id" in invoice._fields else order.cr_fe_clave,
                     "cr_fe_consecutivo": invoice.fp_consecutive_number if "fp_consecutive_number" in invoice._fields else order.cr_fe_consecutivo,
-                    "cr_fe_status": mapped_status,
                     "cr_fe_error_code": False,
                     "cr_fe_xml_attachment_id": invoice.fp_xml_attachment_id.id if "fp_xml_attachment_id" in invoice._fields and invoice.fp_xml_attachment_id else order.cr_fe_xml_attachment_id.id,
                     "cr_fe_response_attachment_id": invoice.fp_response_xml_attachment_id.id
@@ -3056,35 +3711,30 @@ class PosOrder(models.Model):
             if not order._cr_should_emit_ticket():
                 continue
             try:
-                order._cr_prepare_te_document()
-                order.write(
-                    {
-                        "cr_fe_status": "pending",
-                        "cr_fe_last_error": False,
-                        "cr_fe_error_code": False,
-                        "cr_fe_next_try": fields.Datetime.now(),
-                    }
-                )
+                # A prepared document already moved to "pending" in its own transition write.
+                if not order._cr_prepare_te_document():
+                    order._cr_fe_transition(
+                        "pending",
+                        {"cr_fe_last_error": False, "cr_fe_error_code": False, "cr_fe_next_try": fields.Datetime.now()},
+                    )
             except UserError as error:
                 if order._cr_is_reference_pending_error(error):
-                    order.write(
+                    order._cr_fe_transition(
+                        "error_retry",
                         {
-                            "cr_fe_status": "error_retry",
                             "cr_fe_error_code": "reference_pending",
                             "cr_fe_last_error": order._cr_build_reference_pending_message(),
                             "cr_fe_next_try": fields.Datetime.now() + timedelta(minutes=5),
-                        }
+                        },
                     )
                     continue
-                order.write(
-                    {
-                        "cr_fe_status": "error",
-                        "cr_fe_error_code": "validation",
-                        "cr_fe_last_error": str(error),
-                    }
-                )
+                order._cr_fe_transition("error", {"cr_fe_error_code": "validation", "cr_fe_last_error": str(error)})
 
     def _cr_prepare_invoice_fe_values(self, invoice):
+        invoice.write(self._cr_get_invoice_fe_values(invoice))
+
+    def _cr_get_invoice_fe_values(self, invoice):
+        """FE values (POS link, document type, payment codes) to write on the order's invoice."""
         vals = {
             "cr_pos_order_id": self.id,
             "cr_pos_document_type": "nc" if invoice.move_type == "out_refund" else "fe",
@@ -3098,7 +3748,7 @@ class PosOrder(models.Model):
             vals["fp_payment_method"] = self._cr_pos_payment_method_code()
         if "fp_sale_condition" in invoice._fields:
             vals["fp_sale_condition"] = self._cr_pos_payment_condition_code()
-        invoice.write({k: v for k, v in vals.items() if v})
+        return {k: v for k, v in vals.items() if v}
 
     def _cr_get_primary_payment_method(self):
         self.ensure_one()
@@ -3148,14 +3798,15 @@ class PosOrder(models.Model):
                 )
             )
 
-        idempotency_key = self._cr_get_or_create_idempotency_key()
+        # Key, XML link and status are stored together by the transition write below.
+        idempotency_key = self._cr_get_or_create_idempotency_key(persist=False)
         doc_type = self._cr_get_pos_document_type()
         consecutivo = self.cr_fe_consecutivo or self._cr_generate_fe_consecutivo(document_type=doc_type)
         clave = self.cr_fe_clave or self._cr_generate_fe_clave(consecutivo)
         payload = self._cr_build_pos_payload(consecutivo=consecutivo, clave=clave, document_type=doc_type)
 
-        result = self._cr_call_service_method(
-            ["build_pos_xml_from_order", "prepare_pos_document", "prepare_from_pos_order", "enqueue_from_pos_order"],
+        result = self.with_context(cr_fe_defer_xml_link=True)._cr_call_service_method(
+            "build_xml",
             self.id,
             consecutivo=consecutivo,
             idempotency_key=idempotency_key,
@@ -3166,7 +3817,6 @@ class PosOrder(models.Model):
         )
 
         values = {
-            "cr_fe_status": "pending",
             "cr_fe_document_type": doc_type,
             "cr_fe_idempotency_key": idempotency_key,
             "cr_fe_consecutivo": consecutivo,
@@ -3178,29 +3828,72 @@ class PosOrder(models.Model):
             "cr_fe_next_try": fields.Datetime.now(),
         }
         try:
-            self.write(values)
+            self._cr_fe_transition("pending", values)
         except IntegrityError as error:
             self.env.cr.rollback()
             raise UserError(_("La llave de idempotencia ya fue utilizada para esta compañía.")) from error
         self._cr_sync_last_consecutivo_in_einvoice_config(doc_type, consecutivo)
         return True
 
+    def _cr_compute_lines_taxes(self, lines=None):
+        """Compute the taxes of all lines of the orders in one pass of the account.tax engine.
+
+        ``lines`` restricts the computation to some lines of ``self``. Returns
+        ``{line_id: {"total_excluded", "total_included", "taxes"}}``, where ``taxes``
+        has the ``compute_all()`` keys used by the FE payload (id, name, amount, base).
+        Tax details are computed once per company; amounts stay identical to the
+        per-line ``compute_all(price_unit, quantity=qty)`` the XML amounts were built
+        from: undiscounted base and each line rounded on its own, so round-globally
+        companies do not get rounding differences spread across lines.
+        """
+        AccountTax = self.env["account.tax"]
+        lines = self.lines if lines is None else lines
+        result = {}
+        for company, company_lines in lines.grouped(lambda line: line.order_id.company_id).items():
+            base_lines = [
+                AccountTax._prepare_base_line_for_taxes_computation(
+                    line,
+                    tax_ids=line.tax_ids_after_fiscal_position,
+                    price_unit=line.price_unit,
+                    quantity=line.qty,
+                    # Passed explicitly: the helper would otherwise read ``line.discount``.
+                    discount=0.0,
+                    currency_id=line.order_id.pricelist_id.currency_id or company.currency_id,
+                    product_id=line.product_id,
+                    partner_id=line.order_id.partner_id,
+                )
+                for line in company_lines
+            ]
+            AccountTax._add_tax_details_in_base_lines(base_lines, company)
+            for base_line in base_lines:
+                AccountTax._round_base_lines_tax_details([base_line], company)
+                tax_details = base_line["tax_details"]
+                result[base_line["record"].id] = {
+                    "total_excluded": tax_details["total_excluded_currency"],
+                    "total_included": tax_details["total_included_currency"],
+                    "taxes": [
+                        {
+                            "id": tax_data["tax"].id,
+                            "name": tax_data["tax"].name,
+                            "sequence": tax_data["tax"].sequence,
+                            "amount": tax_data["tax_amount_currency"],
+                            "base": tax_data["base_amount_currency"],
+                            "price_include": tax_data["tax"].price_include,
+                        }
+                        for tax_data in tax_details["taxes_data"]
+                    ],
+                }
+        return result
+
     def _cr_build_pos_payload(self, consecutivo, clave, document_type):
         self.ensure_one()
         tip_line_ids = self._cr_get_tip_line_ids()
+        # FE CR v4.4: native tip product lines are represented in `OtrosCargos`
+        # (code 06), not in `DetalleServicio`.
+        detail_lines = self.lines.filtered(lambda line: line.id not in tip_line_ids)
+        line_taxes = self._cr_compute_lines_taxes(detail_lines)
         lines = []
-        for line in self.lines:
-            if line.id in tip_line_ids:
-                # FE CR v4.4: native tip product line must be represented in
-                # `OtrosCargos` (code 06), not in `DetalleServicio`.
-                continue
-            taxes = line.tax_ids_after_fiscal_position.compute_all(
-                line.price_unit,
-                currency=self.pricelist_id.currency_id,
-                quantity=line.qty,
-                product=line.product_id,
-                partner=self.partner_id,
-            )
+        for line in detail_lines:
             lines.append(
                 {
                     "line_id": line.id,
@@ -3212,7 +3905,7 @@ class PosOrder(models.Model):
                     "discount": line.discount,
                     "subtotal": line.price_subtotal,
                     "subtotal_incl": line.price_subtotal_incl,
-                    "taxes": taxes.get("taxes", []),
+                    "taxes": line_taxes[line.id]["taxes"],
                 }
             )
 
@@ -3294,9 +3987,10 @@ class PosOrder(models.Model):
     ):
         """Build and sign TE/FE/NC XML for a POS order and store it as attachment on the order.
 
-        Idempotency: if the order already has a signed XML attachment (or one exists with the same
-        expected filename), reuse it instead of creating duplicates. This avoids double XML files when
-        POS triggers prepare+send in quick succession across different transactions.
+        Idempotency: if the order already has a signed XML attachment (or one is registered in
+        ``pos.fe.document``), reuse it instead of creating duplicates. This avoids double XML files when
+        POS triggers prepare+send in quick succession across different transactions. The digest is
+        stored on the artifact at creation time, so reuse never decodes the XML payload again.
         """
         order = self.browse(order_id)
         order.ensure_one()
@@ -3311,32 +4005,32 @@ class PosOrder(models.Model):
         }.get((document_type or order.cr_fe_document_type or order._cr_get_pos_document_type() or "").lower(), "DOC")
         expected_name = f"{doc_prefix}-{consecutivo}-firmado.xml"
 
+        document = order.env["pos.fe.document"]._cr_get(order, "xml")
+
         # 1) Reuse the attachment already linked on the order (most common case).
-        if order.cr_fe_xml_attachment_id and order.cr_fe_xml_attachment_id.datas:
-            xml_bytes = base64.b64decode(order.cr_fe_xml_attachment_id.datas)
-            digest = hashlib.sha256(xml_bytes).hexdigest()
-            return {"ok": True, "xml_attachment_id": order.cr_fe_xml_attachment_id.id, "digest": digest, "reused": True}
-
-        # 2) Reuse any existing attachment with the expected name (race-safe).
-        existing = (
-            order.env["ir.attachment"]
-            .sudo()
-            .search(
-                [
-                    ("res_model", "=", "pos.order"),
-                    ("res_id", "=", order.id),
-                    ("mimetype", "=", "application/xml"),
-                    ("name", "=", expected_name),
-                ],
-                order="id desc",
-                limit=1,
-            )
+        linked = order.cr_fe_xml_attachment_id
+        if linked:
+            if document.attachment_id != linked or not document.digest:
+                # Legacy attachment created before the artifact store: hash it once and register it.
+                if not linked.datas:
+                    linked = False
+                else:
+                    document = order._cr_register_fe_document("xml", linked, base64.b64decode(linked.datas))
+            if linked:
+                return {"ok": True, "xml_attachment_id": linked.id, "digest": document.digest, "reused": True}
+
+        # 2) Reuse the artifact registered by a concurrent transaction (race-safe), or an
+        # unlinked attachment with the expected name created before the artifact store.
+        # With ``cr_fe_defer_xml_link`` the caller links the XML in its own transition write.
+        defer_link = self.env.context.get("cr_fe_defer_xml_link")
+        existing = order._cr_get_fe_document_attachment(
+            "xml", legacy_domain=[("mimetype", "=", "application/xml"), ("name", "=", expected_name)]
         )
-        if existing and existing.datas:
-            order.sudo().write({"cr_fe_xml_attachment_id": existing.id})
-            xml_bytes = base64.b64decode(existing.datas)
-            digest = hashlib.sha256(xml_bytes).hexdigest()
-            return {"ok": True, "xml_attachment_id": existing.id, "digest": digest, "reused": True}
+        if existing:
+            document = order.env["pos.fe.document"]._cr_get(order, "xml")
+            if not defer_link:
+                order.sudo().write({"cr_fe_xml_attachment_id": existing.id})
+            return {"ok": True, "xml_attachment_id": existing.id, "digest": document.digest, "reused": True}
 
         move = order._cr_build_virtual_move(document_type=document_type, consecutivo=consecutivo, clave=clave)
         xml_text = move._fp_generate_invoice_xml(clave=clave)
@@ -3344,7 +4038,6 @@ class PosOrder(models.Model):
         signed_xml_text = move._fp_sign_xml(xml_text)
 
         xml_bytes = signed_xml_text.encode("utf-8")
-        digest = hashlib.sha256(xml_bytes).hexdigest()
 
         attachment = order.env["ir.attachment"].create(
             {
@@ -3356,14 +4049,16 @@ class PosOrder(models.Model):
                 "mimetype": "application/xml",
             }
         )
-        order.write(
-            {
-                "cr_fe_xml_attachment_id": attachment.id,
-                "cr_fe_error_code": False,
-                "cr_fe_last_error": False,
-            }
-        )
-        return {"ok": True, "xml_attachment_id": attachment.id, "digest": digest, "reused": False}
+        document = order._cr_register_fe_document("xml", attachment, xml_bytes)
+        if not defer_link:
+            order.write(
+                {
+                    "cr_fe_xml_attachment_id": attachment.id,
+                    "cr_fe_error_code": False,
+                    "cr_fe_last_error": False,
+                }
+            )
+        return {"ok": True, "xml_attachment_id": attachment.id, "digest": document.digest, "reused": False}
 
     def _cr_sanitize_ticket_receptor_activity(self, xml_text, *, document_type=None):
         """For TE, enforce omission of <CodigoActividadReceptor> in emitted XML.
@@ -3476,7 +4171,7 @@ class PosOrder(models.Model):
         """
         self.ensure_one()
         Partner = self.env["res.partner"].sudo()
-        partner = Partner.search([("name", "=", "Cliente general"), ("company_id", "=", False)], limit=1)
+        partner = Partner.browse(self.company_id._cr_get_fe_context()["general_partner_id"]).exists()
 
         clean_vals = {
             "name": "Cliente general",
@@ -3506,11 +4201,14 @@ class PosOrder(models.Model):
         clean_vals = {key: value for key, value in clean_vals.items() if key in available_fields}
 
         if partner:
-            # Ensure it stays "clean" for TE payloads.
-            partner.write(clean_vals)
+            # Ensure it stays "clean" for TE payloads; only write when someone edited it.
+            if partner.name != clean_vals["name"] or any(partner[key] for key in clean_vals if key != "name"):
+                partner.write(clean_vals)
             return partner
 
-        return Partner.create(clean_vals)
+        partner = Partner.create(clean_vals)
+        self.env["res.company"]._cr_clear_fe_context()
+        return partner
 
     def _cr_get_move_other_charges_field(self, move):
         """Return the account.move field used by FE XML generator for OtrosCargos."""
@@ -3518,36 +4216,10 @@ class PosOrder(models.Model):
         if not move:
             return False, False
 
-        supported_types = {"char", "text", "html", "json", "serialized", "one2many", "many2many"}
-        preferred_names = (
-            "fp_other_charges",
-            "other_charges",
-            "otros_cargos",
-            "l10n_cr_other_charges",
-            "cr_other_charges_json",
-            "fp_other_charges_json",
-            "other_charges_json",
-            "otros_cargos_json",
-            "l10n_cr_other_charges_json",
-        )
-        for field_name in preferred_names:
-            field = move._fields.get(field_name)
-            if field and field.type in supported_types:
-                return field_name, field
-
-        for field_name, field in move._fields.items():
-            if field.type not in supported_types:
-                continue
-            normalized = field_name.lower()
-            looks_like_other_charges = (
-                ("other" in normalized and "charge" in normalized)
-                or ("otros" in normalized and "cargos" in normalized)
-                or ("otro" in normalized and "cargo" in normalized)
-            )
-            if looks_like_other_charges:
-                return field_name, field
-
-        return False, False
+        field_names = self._cr_field_aliases()["move_other_charges"]
+        if not field_names:
+            return False, False
+        return field_names[0], move._fields[field_names[0]]
 
     def _cr_set_other_charges_on_virtual_move(self, move, other_charges):
         """Set OtrosCargos payload in the concrete field expected by l10n_cr_einvoice."""
@@ -3626,9 +4298,7 @@ class PosOrder(models.Model):
         """Build a non-persisted account.move that reuses l10n_cr_einvoice XML generator for POS data."""
         self.ensure_one()
         company = self.company_id
-        journal = self.env["account.journal"].with_company(company).search(
-            [("type", "=", "sale"), ("company_id", "=", company.id)], limit=1
-        )
+        journal = self.env["account.journal"].browse(company._cr_get_fe_context()["journal_id"])
         is_credit_note = (document_type or "").lower() == "nc" or self.amount_total < 0
         tip_line_ids = self._cr_get_tip_line_ids()
         move_line_fields = self.env["account.move.line"]._fields
@@ -3715,37 +4385,28 @@ class PosOrder(models.Model):
         file_consecutivo = consecutivo or self.cr_fe_consecutivo or clave
         expected_name = f"{doc_prefix}-{file_consecutivo}-respuesta-hacienda.xml"
 
-        if self.cr_fe_response_attachment_id and self.cr_fe_response_attachment_id.datas:
+        if self.cr_fe_response_attachment_id and self.cr_fe_response_attachment_id.exists():
             return self.cr_fe_response_attachment_id.id
 
-        existing = (
-            self.env["ir.attachment"]
-            .sudo()
-            .search(
-                [
-                    ("res_model", "=", "pos.order"),
-                    ("res_id", "=", self.id),
-                    ("mimetype", "=", "application/xml"),
-                    ("name", "=", expected_name),
-                ],
-                order="id desc",
-                limit=1,
-            )
+        existing = self._cr_get_fe_document_attachment(
+            "response", legacy_domain=[("mimetype", "=", "application/xml"), ("name", "=", expected_name)]
         )
-        if existing and existing.datas:
+        if existing:
             self.cr_fe_response_attachment_id = existing.id
             return existing.id
 
+        xml_bytes = xml_text.encode("utf-8")
         attachment = self.env["ir.attachment"].create(
             {
                 "name": expected_name,
                 "type": "binary",
-                "datas": base64.b64encode(xml_text.encode("utf-8")),
+                "datas": base64.b64encode(xml_bytes),
                 "res_model": "pos.order",
                 "res_id": self.id,
                 "mimetype": "application/xml",
             }
         )
+        self._cr_register_fe_document("response", attachment, xml_bytes)
         self.cr_fe_response_attachment_id = attachment.id
         return attachment.id
 
@@ -3760,12 +4421,7 @@ class PosOrder(models.Model):
                 self._cr_prepare_te_document()
             self._cr_validate_before_send()
             result = self._cr_call_service_method(
-                [
-                    "send_to_hacienda",
-                    "enqueue_from_pos_order",
-                    "send_from_pos_order",
-                    "process_pos_order",
-                ],
+                "send",
                 self.id,
                 document_type=self.cr_fe_document_type or self._cr_get_pos_document_type(),
                 idempotency_key=self.cr_fe_idempotency_key,
@@ -3773,51 +4429,78 @@ class PosOrder(models.Model):
                 prefer_local=(self.cr_fe_document_type or self._cr_get_pos_document_type()) == "nc",
             )
             normalized_status = self._cr_normalize_hacienda_status((result or {}).get("status"), default_status=True)
-            self.write(
+            retries = 0 if result.get("ok") else self.cr_fe_retry_count + 1
+            if result.get("ok"):
+                error_code = False
+            elif self._cr_is_transport_failure(result=result):
+                error_code = "transport_error"
+            else:
+                error_code = "send_error"
+            self._cr_fe_transition(
+                normalized_status if result.get("ok") else "error_retry",
                 {
-                    "cr_fe_status": normalized_status if result.get("ok") else "error_retry",
-                    "cr_fe_retry_count": 0 if result.get("ok") else self.cr_fe_retry_count,
+                    "cr_fe_retry_count": retries,
                     "cr_fe_last_error": False if result.get("ok") else result.get("reason"),
-                    "cr_fe_error_code": False if result.get("ok") else "send_error",
-                    "cr_fe_next_try": fields.Datetime.now() + timedelta(minutes=5) if not result.get("ok") else False,
+                    "cr_fe_error_code": error_code,
+                    "cr_fe_next_try": fields.Datetime.now() + timedelta(minutes=min(60, retries * 5)) if not result.get("ok") else False,
                     "cr_fe_last_send_date": fields.Datetime.now(),
                     "cr_fe_response_attachment_id": result.get("response_attachment_id") or self.cr_fe_response_attachment_id.id,
-                }
+                },
+                force=force,
             )
             return bool(result.get("ok"))
         except UserError as error:
             if self._cr_should_delay_credit_note_xml():
-                self.write(
+                self._cr_fe_transition(
+                    "error_retry",
                     {
-                        "cr_fe_status": "error_retry",
                         "cr_fe_error_code": "reference_pending",
                         "cr_fe_last_error": self._cr_build_reference_pending_message(),
                         "cr_fe_next_try": fields.Datetime.now() + timedelta(minutes=5),
-                    }
+                    },
+                    force=force,
                 )
                 return False
-            self.write(
-                {
-                    "cr_fe_status": "error",
-                    "cr_fe_error_code": "validation",
-                    "cr_fe_last_error": str(error),
-                    "cr_fe_next_try": False,
-                }
+            self._cr_fe_transition(
+                "error",
+                {"cr_fe_error_code": "validation", "cr_fe_last_error": str(error), "cr_fe_next_try": False},
+                force=force,
             )
             return False
         except Exception as error:  # noqa: BLE001
             retries = self.cr_fe_retry_count + 1
-            self.write(
+            self._cr_fe_transition(
+                "error_retry",
                 {
-                    "cr_fe_status": "error_retry",
                     "cr_fe_retry_count": retries,
-                    "cr_fe_error_code": "send_exception",
+                    "cr_fe_error_code": "transport_error" if self._cr_is_transport_failure(error=error) else "send_exception",
                     "cr_fe_last_error": str(error),
                     "cr_fe_next_try": fields.Datetime.now() + timedelta(minutes=min(60, retries * 5)),
-                }
+                },
+                force=force,
             )
             return False
 
+    @api.model
+    def _cr_is_transport_failure(self, error=None, result=None):
+        """Return True when a send failed for a reason shared by the whole company.
+
+        Network errors, timeouts, MH 5xx and rejected credentials/certificates count;
+        per-document validation rejections do not, so they never pause the company.
+        """
+        # requests/urllib3/ssl errors are OSError subclasses.
+        if isinstance(error, OSError):
+            return True
+        status_code = (result or {}).get("status_code") or (result or {}).get("http_status")
+        try:
+            status_code = int(status_code or 0)
+        except (TypeError, ValueError):
+            status_code = 0
+        if status_code >= 500 or status_code in (401, 403):
+            return True
+        message = str(error if error is not None else (result or {}).get("reason") or "").lower()
+        return any(marker in message for marker in self._CR_TRANSPORT_ERROR_MARKERS)
+
     def _cr_check_pending_te_status(self):
         self.ensure_one()
         if self._cr_requires_account_move_flow():
@@ -3826,7 +4509,7 @@ class PosOrder(models.Model):
         status = False
         try:
             status = self._cr_call_service_method(
-                ["consult_status", "check_status_from_pos_order", "check_status", "get_pos_order_status"],
+                "status",
                 self.id,
                 idempotency_key=self.cr_fe_idempotency_key,
                 prefer_local=(self.cr_fe_document_type or self._cr_get_pos_document_type()) == "nc",
@@ -3838,13 +4521,12 @@ class PosOrder(models.Model):
         if isinstance(status, dict):
             normalized = self._cr_normalize_hacienda_status(status.get("status"), default_status=False)
             values = {
-                "cr_fe_status": normalized,
                 "cr_fe_error_code": False if normalized in self._CR_FINAL_STATES else self.cr_fe_error_code,
                 "cr_fe_next_try": False if normalized in ("accepted", "rejected") else fields.Datetime.now() + timedelta(minutes=5),
             }
             if status.get("response_attachment_id"):
                 values["cr_fe_response_attachment_id"] = status.get("response_attachment_id")
-            self.write(values)
+            self._cr_fe_transition(normalized, values)
         return True
 
     @api.model
@@ -3856,11 +4538,7 @@ class PosOrder(models.Model):
             ("cr_fe_next_try", "=", False),
             ("cr_fe_next_try", "<=", fields.Datetime.now()),
         ]
-        orders = self.search(domain, order="cr_fe_next_try asc, id asc")
-        orders = orders.filtered(lambda order: not order._cr_has_real_invoice_move() and not order._cr_requires_account_move_flow())
-        if limit:
-            orders = orders[:limit]
-        return [(order, "pos_ticket") for order in orders]
+        return [(order, "pos_ticket") for order in self._cr_get_fair_ticket_targets(domain, limit=limit)]
 
     @api.model
     def _cr_get_pending_status_ticket_targets(self, limit=50):
@@ -3872,18 +4550,72 @@ class PosOrder(models.Model):
             ("cr_fe_next_try", "=", False),
             ("cr_fe_next_try", "<=", fields.Datetime.now()),
         ]
-        orders = self.search(domain, order="cr_fe_next_try asc, id asc")
-        orders = orders.filtered(lambda order: not order._cr_has_real_invoice_move() and not order._cr_requires_account_move_flow())
-        if limit:
-            orders = orders[:limit]
-        return [(order, "pos_ticket") for order in orders]
+        return [(order, "pos_ticket") for order in self._cr_get_fair_ticket_targets(domain, limit=limit)]
+
+    @api.model
+    def _cr_get_fair_ticket_targets(self, domain, limit=50):
+        """Return up to ``limit`` due tickets, interleaving companies round-robin.
+
+        Each company keeps its own queue (never-tried tickets first, then retries by
+        ``cr_fe_next_try``), so a large backlog in one company only takes its share of
+        the batch (quota left unused by the others goes to it) and failing retries do
+        not hold back new tickets. Companies whose FE dispatch is paused after repeated
+        transport failures are skipped until the pause expires.
+        """
+        domain = domain + [
+            "|",
+            ("account_move", "=", False),
+            "|",
+            ("account_move.move_type", "not in", list(self._CR_INVOICE_MOVE_TYPES)),
+            ("account_move.state", "=", "cancel"),
+        ]
+        queues = []
+        companies = self.env["res.company"].union(*(company for (company,) in self._read_group(domain, ["company_id"])))
+        open_circuits = self.env["pos.fe.circuit"].sudo()._cr_get_open(companies.ids)
+        for company in companies:
+            if company.id in open_circuits:
+                self._logger.info(
+                    "Skipping POS FE dispatch for company %s until %s after repeated transport failures.",
+                    company.id,
+                    open_circuits[company.id],
+                )
+                continue
+            orders = self.search(
+                domain + [("company_id", "=", company.id)],
+                order="cr_fe_next_try asc nulls first, id asc",
+                limit=limit or None,
+            )
+            queues.append(orders.filtered(lambda order: not order._cr_requires_account_move_flow()))
+        targets = [order for batch in zip_longest(*queues) for order in batch if order]
+        return targets[:limit] if limit else targets
+
+    def _cr_dispatch_pending_te(self, force=False):
+        """Send this pending ticket and feed the result into its company's FE circuit."""
+        self.ensure_one()
+        circuit = self.env["pos.fe.circuit"].sudo()
+        company_id = self.company_id.id
+        if circuit._cr_get_open([company_id]):
+            return False
+        result = self._cr_send_pending_te_to_hacienda(force=force)
+        if self.cr_fe_status == "error_retry" and self.cr_fe_error_code == "transport_error":
+            streak, open_until = circuit._cr_register_outcome(company_id, failed=True)
+            if streak >= CR_FE_CIRCUIT_THRESHOLD:
+                self._logger.warning(
+                    "Pausing POS FE dispatch for company %s until %s after %s consecutive transport failures.",
+                    company_id,
+                    open_until,
+                    streak,
+                )
+        elif self.cr_fe_status in ("sent", "processing", "accepted", "rejected"):
+            circuit._cr_register_outcome(company_id, failed=False)
+        return result
 
     @api.model
     def _cron_cr_pos_send_pending_te(self, limit=50):
         for order, _target in self._cr_get_pending_send_ticket_targets(limit=limit):
             try:
                 with self.env.cr.savepoint():
-                    order._cr_send_pending_te_to_hacienda()
+                    order._cr_dispatch_pending_te()
             except SerializationFailure:
                 self._logger.warning(
                     "Skipping POS TE send for order %s due to concurrent update; it will retry in next cron run.",
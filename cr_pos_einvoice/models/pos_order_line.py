@@ -1,5 +1,15 @@
 from odoo import api, fields, models
 
+# Boolean line flags (this module or custom POS modules) marking a tip / Otros Cargos line.
+CR_FE_CHARGE_LINE_MARKERS = (
+    "is_tip",
+    "is_tip_line",
+    "cr_is_tip_line",
+    "fp_is_other_charge_line",
+    "cr_is_other_charge_line",
+    "is_other_charge_line",
+)
+
 
 class PosOrderLine(models.Model):
     _inherit = "pos.order.line"
@@ -9,6 +19,24 @@ class PosOrderLine(models.Model):
         help="Marca la línea como Otros Cargos para generar el bloque `OtrosCargos` en FE CR v4.4.",
         copy=False,
     )
+    cr_is_fe_charge_line = fields.Boolean(
+        string="Cargo FE (propina/otros cargos)",
+        compute="_compute_cr_is_fe_charge_line",
+        store=True,
+        copy=False,
+        help="Línea de propina u Otros Cargos según las marcas de la línea y el rol FE del producto.",
+    )
+
+    # The product role is read, not declared as a dependency: the flag is the role
+    # at the time the line was sold, so later product/POS setting changes never
+    # rewrite lines of documents already sent to Hacienda.
+    @api.depends(lambda self: ["product_id"] + [name for name in CR_FE_CHARGE_LINE_MARKERS if name in self._fields])
+    def _compute_cr_is_fe_charge_line(self):
+        markers = self.env["pos.order"]._cr_field_aliases()["line_tip_markers"]
+        for line in self:
+            line.cr_is_fe_charge_line = line.product_id.cr_fe_charge_role in ("tip", "other_charge") or any(
+                line[marker] for marker in markers
+            )
 
     @api.onchange("product_id")
     def _onchange_cr_other_charge_line_from_product(self):
@@ -19,12 +47,20 @@ class PosOrderLine(models.Model):
     def create(self, vals_list):
         for vals in vals_list:
             self._cr_apply_other_charge_flag_from_product(vals)
+        order_ids = {vals["order_id"] for vals in vals_list if vals.get("order_id")}
+        self.env["pos.fe.daily.summary"]._cr_mark_orders_dirty(self.env["pos.order"].browse(order_ids))
         return super().create(vals_list)
 
     def write(self, vals):
         self._cr_apply_other_charge_flag_from_product(vals)
+        # Line changes recompute the stored FE amounts of their orders.
+        self.env["pos.fe.daily.summary"]._cr_mark_orders_dirty(self.order_id)
         return super().write(vals)
 
+    def unlink(self):
+        self.env["pos.fe.daily.summary"]._cr_mark_orders_dirty(self.order_id)
+        return super().unlink()
+
     def _cr_apply_other_charge_flag_from_product(self, vals):
         """Autofill line marker when product carries the FE other-charge flag.
 
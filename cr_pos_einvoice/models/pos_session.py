@@ -7,7 +7,7 @@ class PosSession(models.Model):
     def _loader_params_pos_config(self):
         params = super()._loader_params_pos_config()
         fields_to_load = params.setdefault("search_params", {}).setdefault("fields", [])
-        for field_name in ("cr_service_charge_percent", "cr_tip_product_id"):
+        for field_name in ("cr_service_charge_percent", "cr_tip_product_id", "cr_fe_capture_receipt_html"):
             if field_name not in fields_to_load:
                 fields_to_load.append(field_name)
         return params
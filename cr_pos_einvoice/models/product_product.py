@@ -0,0 +1,78 @@
+import unicodedata
+
+from odoo import api, fields, models
+
+# Boolean fields (this module, l10n_cr_einvoice or custom modules) flagging a product as Otros Cargos.
+CR_OTHER_CHARGE_PRODUCT_MARKERS = (
+    "is_other_charge",
+    "is_other_charges",
+    "is_otros_cargos",
+    "is_otro_cargo",
+    "l10n_cr_is_other_charge",
+    "l10n_cr_other_charge",
+    "fp_is_other_charge",
+    "fe_is_other_charge",
+    "cr_is_other_charge",
+    "cr_is_other_charge_line",
+)
+CR_TIP_NAME_KEYWORDS = ("propina", "servicio", "tip", "service charge")
+# pos.config fields holding the native tip product.
+CR_POS_TIP_PRODUCT_FIELDS = ("pos_tip_product_id", "tip_product_id")
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    cr_fe_charge_role = fields.Selection(
+        [
+            ("tip", "Propina del POS"),
+            ("other_charge", "Otros cargos"),
+            ("tip_name", "Posible propina (por nombre)"),
+        ],
+        string="Rol FE de cargo",
+        compute="_compute_cr_fe_charge_role",
+        store=True,
+        index=True,
+        help="Propina configurada en algún POS, producto marcado como Otros Cargos, o producto cuyo nombre "
+        "sugiere propina/servicio (solo se usa como respaldo cuando no hay producto de propina configurado).",
+    )
+
+    @api.depends(
+        lambda self: ["name", "default_code"] + [name for name in CR_OTHER_CHARGE_PRODUCT_MARKERS if name in self._fields]
+    )
+    def _compute_cr_fe_charge_role(self):
+        markers = [name for name in CR_OTHER_CHARGE_PRODUCT_MARKERS if name in self._fields]
+        marked = self.filtered(lambda product: any(product[marker] for marker in markers))
+        # Only saved, unmarked products can hold the tip role: look up the POS configs just for them.
+        tip_product_ids = set((self - marked)._origin._cr_get_pos_tip_products().ids)
+        for product in self:
+            if product in marked:
+                product.cr_fe_charge_role = "other_charge"
+            elif product.id in tip_product_ids:
+                product.cr_fe_charge_role = "tip"
+            elif self._cr_is_tip_name(product.default_code, product.name):
+                product.cr_fe_charge_role = "tip_name"
+            else:
+                product.cr_fe_charge_role = False
+
+    @api.model
+    def _cr_is_tip_name(self, *names):
+        normalized = unicodedata.normalize("NFKD", " ".join(filter(None, names))).encode("ascii", "ignore").decode("ascii").lower()
+        return any(keyword in normalized for keyword in CR_TIP_NAME_KEYWORDS)
+
+    def _cr_get_pos_tip_products(self):
+        """Return the products of ``self`` configured as tip product in some POS."""
+        product_ids = [product_id for product_id in self.ids if product_id]
+        tip_fields = [name for name in CR_POS_TIP_PRODUCT_FIELDS if name in self.env["pos.config"]._fields]
+        if not product_ids or not tip_fields:
+            return self.browse()
+        domain = [(name, "in", product_ids) for name in tip_fields]
+        configs = self.env["pos.config"].sudo().with_context(active_test=False).search(
+            ["|"] * (len(domain) - 1) + domain
+        )
+        return configs._cr_get_tip_products() & self
+
+    def _cr_recompute_fe_charge_role(self):
+        """Queue the role of these products for recompute (e.g. after a POS tip product change)."""
+        if self:
+            self.env.add_to_compute(self._fields["cr_fe_charge_role"], self)
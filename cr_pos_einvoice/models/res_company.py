@@ -0,0 +1,62 @@
+from odoo import api, models, tools
+from odoo.tools import frozendict
+
+# Fields whose change alters the cached FE context of a company.
+CR_FE_CONTEXT_COMPANY_FIELDS = {"vat", "partner_id", "country_id", "fp_branch_code", "fp_terminal_code"}
+CR_FE_CONTEXT_PARTNER_FIELDS = {
+    "vat",
+    "street",
+    "fp_neighborhood_id",
+    "fp_district_id",
+    "fp_canton_id",
+    "fp_province_id",
+}
+
+
+class ResCompany(models.Model):
+    _inherit = "res.company"
+
+    @tools.ormcache("self.id")
+    def _cr_get_fe_context(self):
+        """Per-company FE data shared by every POS document (emisor, journal, general customer).
+
+        Cached per registry; invalidated by writes on the company, its partner address,
+        sale journals and the general customer (see ``_cr_clear_fe_context``).
+        """
+        self.ensure_one()
+        company = self.sudo()
+        company_partner = company.partner_id
+        vat_raw = company.vat or company_partner.vat or ""
+        phone_code = company.country_id and getattr(company.country_id, "phone_code", False)
+        journal = self.env["account.journal"].sudo().search(
+            [("type", "=", "sale"), ("company_id", "=", company.id)], limit=1
+        )
+        general_partner = self.env["res.partner"].sudo().search(
+            [("name", "=", "Cliente general"), ("company_id", "=", False)], limit=1
+        )
+        address_parts = [company_partner.street] + [
+            company_partner[field_name].name
+            for field_name in ("fp_neighborhood_id", "fp_district_id", "fp_canton_id", "fp_province_id")
+            if field_name in company_partner._fields and company_partner[field_name]
+        ]
+        return frozendict(
+            {
+                "journal_id": journal.id,
+                "vat_digits": "".join(char for char in str(vat_raw) if char.isdigit())[-12:].zfill(12),
+                "country_code": str(phone_code).zfill(3) if phone_code else "506",
+                "branch": str(getattr(company, "fp_branch_code", "") or "1").zfill(3),
+                "terminal": str(getattr(company, "fp_terminal_code", "") or "1").zfill(5),
+                "general_partner_id": general_partner.id,
+                "emisor_address": ", ".join(part for part in address_parts if part),
+            }
+        )
+
+    @api.model
+    def _cr_clear_fe_context(self):
+        self.env.registry.clear_cache()
+
+    def write(self, vals):
+        result = super().write(vals)
+        if CR_FE_CONTEXT_COMPANY_FIELDS & set(vals):
+            self._cr_clear_fe_context()
+        return result
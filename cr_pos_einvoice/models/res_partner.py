@@ -0,0 +1,15 @@
+from odoo import models
+
+from .res_company import CR_FE_CONTEXT_PARTNER_FIELDS
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    def write(self, vals):
+        result = super().write(vals)
+        if CR_FE_CONTEXT_PARTNER_FIELDS & set(vals) and self.env["res.company"].sudo().with_context(
+            active_test=False
+        ).search_count([("partner_id", "in", self.ids)], limit=1):
+            self.env["res.company"]._cr_clear_fe_context()
+        return result
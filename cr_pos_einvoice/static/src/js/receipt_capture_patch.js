@@ -5,14 +5,71 @@ import { ReceiptScreen } from "@point_of_sale/app/screens/receipt_screen/receipt
 
 const delay = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
-const findReceiptHtml = () => {
-    const receiptNode =
-        document.querySelector(".receipt-screen .pos-receipt") ||
-        document.querySelector(".pos-receipt-container .pos-receipt") ||
-        document.querySelector(".pos-receipt");
-    return receiptNode?.outerHTML || null;
+const RECEIPT_HEADER_MARKER = "cr-receipt-header";
+const RECEIPT_HEADER_PLACEHOLDER = `<!--${RECEIPT_HEADER_MARKER}-->`;
+const RECEIPT_HEADER_SELECTOR = ".pos-receipt-logo, .pos-receipt-contact";
+const UPLOAD_MAX_ATTEMPTS = 5;
+const UPLOAD_RETRY_BASE_MS = 2000;
+
+const findReceiptNode = () =>
+    document.querySelector(".receipt-screen .pos-receipt") ||
+    document.querySelector(".pos-receipt-container .pos-receipt") ||
+    document.querySelector(".pos-receipt");
+
+/**
+ * Split the static receipt header (logo + company contact, usually an inline base64 image)
+ * from the order-specific body. The header is uploaded once per content digest and the
+ * body carries a placeholder that the backend replaces with the stored header.
+ */
+const splitReceiptHtml = (receiptNode) => {
+    const clone = receiptNode.cloneNode(true);
+    const headerNodes = [...clone.querySelectorAll(RECEIPT_HEADER_SELECTOR)].filter(
+        (node) => !node.parentElement?.closest(RECEIPT_HEADER_SELECTOR)
+    );
+    if (!headerNodes.length) {
+        return { body: clone.outerHTML, header: null };
+    }
+    const header = headerNodes.map((node) => node.outerHTML).join("");
+    headerNodes[0].replaceWith(document.createComment(RECEIPT_HEADER_MARKER));
+    headerNodes.slice(1).forEach((node) => node.remove());
+    return { body: clone.outerHTML, header };
+};
+
+const sha256Hex = async (text) => {
+    if (!window.crypto?.subtle) return null;
+    const buffer = await window.crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+    return [...new Uint8Array(buffer)].map((byte) => byte.toString(16).padStart(2, "0")).join("");
+};
+
+const bytesToBase64 = (bytes) => {
+    let binary = "";
+    for (let offset = 0; offset < bytes.length; offset += 0x8000) {
+        binary += String.fromCharCode(...bytes.subarray(offset, offset + 0x8000));
+    }
+    return btoa(binary);
+};
+
+/** gzip + base64 with CompressionStream; plain text on browsers without it. */
+const encodePayload = async (text) => {
+    if (typeof CompressionStream === "undefined") {
+        return { data: text, encoding: "identity" };
+    }
+    const stream = new Blob([text]).stream().pipeThrough(new CompressionStream("gzip"));
+    const bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+    return { data: bytesToBase64(bytes), encoding: "gzip+base64" };
 };
 
+const getReceptorEmail = (order) =>
+    order?.getPartner?.()?.email ||
+    order?.get_partner?.()?.email ||
+    order?.partner_id?.email ||
+    order?.cr_fe_receptor_email ||
+    null;
+
+/** Capture only tickets that can be emailed, unless the POS config asks for every ticket. */
+const shouldCaptureReceipt = (pos, order) =>
+    Boolean(pos?.config?.cr_fe_capture_receipt_html || getReceptorEmail(order));
+
 const resolveOrderId = async (screen) => {
     const order = screen.currentOrder || screen.pos?.get_order?.();
     if (!order) return null;
@@ -32,27 +89,64 @@ patch(ReceiptScreen.prototype, {
 
     async onMounted() {
         await super.onMounted?.(...arguments);
-        await this._crCaptureReceiptHtml();
+        // Not awaited: the capture must never delay the receipt screen.
+        this._crCaptureReceiptHtml();
     },
 
     async _crCaptureReceiptHtml() {
         if (this._crReceiptHtmlCaptured) return;
+        const order = this.currentOrder || this.pos?.get_order?.();
+        if (!shouldCaptureReceipt(this.pos, order)) return;
         const orderId = await resolveOrderId(this);
         if (!Number.isInteger(orderId)) return;
 
-        let html = findReceiptHtml();
-        if (!html) {
+        let receiptNode = findReceiptNode();
+        if (!receiptNode) {
             await delay(150);
-            html = findReceiptHtml();
+            receiptNode = findReceiptNode();
         }
-        if (!html) return;
+        if (!receiptNode) return;
 
-        try {
-            await this.pos.data.call("pos.order", "cr_pos_store_receipt_html", [orderId, html]);
-            this._crReceiptHtmlCaptured = true;
-        } catch {
-            // Best effort: FE PDF can still fallback to backend report rendering.
+        // Snapshot the DOM now; compression and upload run in the background.
+        const { body, header } = splitReceiptHtml(receiptNode);
+        this._crReceiptHtmlCaptured = true;
+        this._crUploadReceiptHtml(orderId, body, header);
+    },
+
+    async _crUploadReceiptHtml(orderId, body, header) {
+        const headerDigest = header ? await sha256Hex(header) : null;
+        const html = header && !headerDigest ? body.replace(RECEIPT_HEADER_PLACEHOLDER, header) : body;
+        const payload = await encodePayload(html);
+        const options = { encoding: payload.encoding, header_digest: headerDigest };
+
+        for (let attempt = 0; attempt < UPLOAD_MAX_ATTEMPTS; attempt++) {
+            if (attempt) {
+                await delay(UPLOAD_RETRY_BASE_MS * 2 ** (attempt - 1));
+            }
+            if (navigator.onLine === false) continue;
+            try {
+                const result = await this.pos.data.call("pos.order", "cr_pos_store_receipt_html", [
+                    orderId,
+                    payload.data,
+                    options,
+                ]);
+                if (result?.missing_header && header) {
+                    const encodedHeader = await encodePayload(header);
+                    await this.pos.data.call("pos.config", "cr_pos_store_receipt_header", [
+                        this.pos.config.id,
+                        headerDigest,
+                        encodedHeader.data,
+                        { encoding: encodedHeader.encoding },
+                    ]);
+                    continue;
+                }
+                return Boolean(result?.ok);
+            } catch {
+                // Network or server error: retry with backoff. FE PDF can still fall back to
+                // backend report rendering if every attempt fails.
+            }
         }
+        return false;
     },
 
     /**
@@ -111,24 +111,37 @@ const formatCrAmount = (value, currencySymbol = "") => {
     return currencySymbol ? `${currencySymbol} ${formatted}` : formatted;
 };
 
+// Receipt labels for the per-tax FE classification stored on account.tax (cr_fe_tax_bucket).
+// Untaxed lines and 0% rates are exento, like in the FE report amounts.
+const FE_TAX_BUCKET_LABELS = {
+    nonsubject: "NoS",
+    exempt: "Exe",
+    exonerated: "Exo",
+};
+
+const formatTaxRateLabel = (rate) => {
+    if (!Number.isFinite(rate) || Math.abs(rate) < 0.0001) return FE_TAX_BUCKET_LABELS.exempt;
+    if (Math.abs(rate - 13) < 0.0001) return "13%";
+    return `${rate}%`;
+};
+
 const classifyTaxBucket = (tax) => {
+    const bucket = tax?.cr_fe_tax_bucket;
+    if (bucket) {
+        return FE_TAX_BUCKET_LABELS[bucket] || formatTaxRateLabel(Number(tax.amount || 0));
+    }
+
+    // Taxes loaded without the FE classification (e.g. stale offline cache): legacy name matching.
     const name = normalizeText(tax?.name)?.toLowerCase() || "";
     const code = normalizeText(tax?.l10n_cr_tax_code || tax?.tax_code)?.toLowerCase() || "";
     if (name.includes("exoner") || code.includes("exo")) return "Exo";
     if (name.includes("exento") || code.includes("exe")) return "Exe";
     if (name.includes("no sujeto") || name.includes("no_sujeto") || code.includes("nos")) return "NoS";
-
-    const rate = Number(tax?.amount || 0);
-    if (Number.isFinite(rate)) {
-        if (Math.abs(rate - 13) < 0.0001) return "13%";
-        if (Math.abs(rate) < 0.0001) return "0%";
-        return `${rate}%`;
-    }
-    return "0%";
+    return formatTaxRateLabel(Number(tax?.amount || 0));
 };
 
 const buildTaxSummaryLines = (order, printData = {}) => {
-    const baseBuckets = ["13%", "0%", "Exe", "Exo", "NoS"];
+    const baseBuckets = ["13%", "Exe", "Exo", "NoS"];
     const buckets = new Map(baseBuckets.map((label) => [label, { label, base: 0, tax: 0 }]));
     const orderLines = order?.get_orderlines?.() || [];
 
@@ -138,7 +151,7 @@ const buildTaxSummaryLines = (order, printData = {}) => {
         const taxAmount = Number(prices.tax ?? prices.taxAmount ?? 0);
         const taxes = line?.get_taxes?.() || [];
 
-        let label = "0%";
+        let label = FE_TAX_BUCKET_LABELS.exempt;
         if (taxes.length) {
             label = classifyTaxBucket(taxes[0]);
         }
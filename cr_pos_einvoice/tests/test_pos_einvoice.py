@@ -1,13 +1,53 @@
+import base64
+import gzip
+import hashlib
 import json
+import logging
+import time
+import tracemalloc
+from datetime import timedelta
 from types import SimpleNamespace
 
 from odoo import fields
 from odoo.exceptions import UserError
 from odoo.tests import tagged
 from odoo.tests.common import TransactionCase
+from odoo.addons.cr_pos_einvoice.tools.backend_capabilities import CALL_KWARGS, CALL_POSITIONAL, resolve_capability
 from unittest.mock import patch
 
 
+def _new_order_with_taxed_lines(env, line_count, discount=0.0, stored=False):
+    tax = env["account.tax"].create({"name": "IVA 13% FE", "amount": 13.0, "amount_type": "percent", "type_tax_use": "sale"})
+    product = env["product.product"].create({"name": "Plato", "lst_price": 1000.0})
+    lines = []
+    for index in range(line_count):
+        qty = 1.0 + (index % 3)
+        price_unit = 1000.0 + index
+        subtotal = price_unit * qty * (1 - discount / 100.0)
+        lines.append(
+            (
+                0,
+                0,
+                {
+                    "product_id": product.id,
+                    "qty": qty,
+                    "price_unit": price_unit,
+                    "discount": discount,
+                    "tax_ids": [(6, 0, tax.ids)],
+                    "price_subtotal": subtotal,
+                    "price_subtotal_incl": subtotal * 1.13,
+                },
+            )
+        )
+    values = {"company_id": env.company.id, "lines": lines}
+    if not stored:
+        return env["pos.order"].new(values)
+    order = env["pos.order"].create(dict(values, name=f"POS/TAXES/{line_count}"))
+    order.flush_recordset()
+    order.invalidate_recordset()
+    return order
+
+
 @tagged("post_install", "-at_install")
 class TestPosEInvoice(TransactionCase):
     def test_status_normalization(self):
@@ -18,6 +58,21 @@ class TestPosEInvoice(TransactionCase):
         order = self.env["pos.order"]
         self.assertTrue(hasattr(order, "_cr_build_pos_payload"))
 
+    def test_company_fe_context_is_cached_and_cleared_on_emisor_changes(self):
+        company = self.env.company
+        company.vat = "3-101-123456"
+        context = company._cr_get_fe_context()
+        self.assertEqual(context["vat_digits"], "003101123456")
+        self.assertIs(company._cr_get_fe_context(), context)
+
+        company.partner_id.street = "Avenida Central"
+        self.assertIn("Avenida Central", company._cr_get_fe_context()["emisor_address"])
+        company.vat = "3-101-654321"
+        self.assertEqual(company._cr_get_fe_context()["vat_digits"], "003101654321")
+
+        order = self.env["pos.order"].new({"company_id": company.id})
+        self.assertEqual(order._cr_generate_fe_clave("0" * 20)[9:21], "003101654321")
+
     def test_general_customer_partner_is_minimal(self):
         company = self.env.company
         order = self.env["pos.order"].new({"company_id": company.id})
@@ -179,6 +234,224 @@ class TestPosEInvoice(TransactionCase):
         self.assertAlmostEqual(totals["tax"], 7.0)
         self.assertAlmostEqual(totals["total"], 57.5)
 
+    def test_report_wizard_sql_totals_match_signed_row_amounts(self):
+        wizard = self.env["pos.order.fe.report.wizard"].create(
+            {
+                "date_from": "2026-03-21",
+                "date_to": "2026-03-21",
+                "output_format": "pdf",
+            }
+        )
+        ticket = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/REPORT/001"})
+        refund = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/REPORT/002"})
+        orders = ticket | refund
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            UPDATE pos_order
+               SET cr_fe_document_type = CASE WHEN id = %s THEN 'nc' ELSE 'te' END,
+                   amount_total = CASE WHEN id = %s THEN -57.5 ELSE 115 END,
+                   amount_tax = CASE WHEN id = %s THEN 8 ELSE 15 END,
+                   cr_exempt_amount = CASE WHEN id = %s THEN 4 ELSE 10 END,
+                   cr_other_charges_amount = CASE WHEN id = %s THEN 1 ELSE 3 END,
+                   cr_taxable_amount_13 = CASE WHEN id = %s THEN 7 ELSE 14 END
+             WHERE id = ANY(%s)
+            """,
+            (refund.id,) * 6 + (orders.ids,),
+        )
+        orders.invalidate_recordset()
+
+        wizard._get_report_totals(orders)  # warm the record rule caches
+        with self.assertQueryCount(1):
+            totals = wizard._get_report_totals(orders)
+        rows = wizard._get_report_rows(orders)
+
+        self.assertEqual(totals, wizard._get_report_totals(list(orders)))
+        for key, total in totals.items():
+            self.assertAlmostEqual(total, sum(row["amounts"][key] for row in rows), msg=key)
+        self.assertAlmostEqual(totals["exempt"], 4.0)
+        self.assertAlmostEqual(totals["other_charges"], 2.0)
+        self.assertAlmostEqual(totals["taxable_13"], 7.0)
+        self.assertAlmostEqual(totals["total"], 57.5)
+
+    def test_report_wizard_xlsx_reads_orders_in_keyset_pages(self):
+        wizard = self.env["pos.order.fe.report.wizard"].with_context(tz="UTC").create(
+            {
+                "date_from": "2026-03-21",
+                "date_to": "2026-03-21",
+                "output_format": "xlsx",
+            }
+        )
+        orders = self.env["pos.order"]
+        for index, date_order in enumerate(
+            ("2026-03-21 08:00:00", "2026-03-21 08:00:00", "2026-03-21 08:00:00", "2026-03-21 09:00:00", "2026-03-21 10:00:00")
+        ):
+            orders |= self.env["pos.order"].create(
+                {
+                    "company_id": self.env.company.id,
+                    "name": f"POS/XLSX/{index:03d}",
+                    "date_order": date_order,
+                    "state": "paid",
+                }
+            )
+        expected = self.env["pos.order"].search(wizard._build_report_domain(), order="date_order asc, id asc")
+        self.assertTrue(orders <= expected)
+
+        pages = list(wizard._iter_report_order_chunks(chunk_size=2))
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+        self.assertEqual([order_id for page in pages for order_id in page.ids], expected.ids)
+
+        action = wizard.action_generate_report()
+        self.assertEqual(action["url"], f"/cr_pos_einvoice/fe_report/{wizard.id}/xlsx")
+        self.assertNotIn("file_data", wizard._fields)
+
+    def _create_summary_orders(self, date_order, count=2):
+        orders = self.env["pos.order"]
+        for index in range(count):
+            orders |= self.env["pos.order"].create(
+                {
+                    "company_id": self.env.company.id,
+                    "name": f"POS/SUMMARY/{date_order}/{index}",
+                    "date_order": date_order,
+                    "state": "paid",
+                    "cr_fe_status": "sent",
+                }
+            )
+        self.env.flush_all()
+        self.env.cr.execute(
+            """
+            UPDATE pos_order
+               SET cr_fe_document_type = 'te', amount_total = 113, amount_tax = 13, cr_taxable_amount_13 = 100
+             WHERE id = ANY(%s)
+            """,
+            (orders.ids,),
+        )
+        orders.invalidate_recordset()
+        return orders
+
+    def test_daily_summary_rebuild_matches_report_totals(self):
+        # 03:00 UTC on the 16th is still the 15th in Costa Rica (UTC-6).
+        self._create_summary_orders("2031-01-16 03:00:00")
+        summary_model = self.env["pos.fe.daily.summary"]
+        summary_model._cr_rebuild("2031-01-01", "2031-01-31")
+
+        rows = summary_model.search([("date", ">=", "2031-01-01"), ("date", "<=", "2031-01-31")])
+        self.assertEqual(rows.mapped("date"), [fields.Date.to_date("2031-01-15")])
+        self.assertEqual(sum(rows.mapped("order_count")), 2)
+
+        wizard = self.env["pos.order.fe.report.wizard"].with_context(tz="America/Costa_Rica").create(
+            {"date_from": "2031-01-15", "date_to": "2031-01-15", "output_format": "pdf"}
+        )
+        totals = wizard._get_report_totals()
+        self.assertAlmostEqual(totals["total"], 226.0)
+        self.assertAlmostEqual(totals["taxable_13"], 200.0)
+        self.assertAlmostEqual(sum(rows.mapped("total_amount")), totals["total"])
+        self.assertAlmostEqual(sum(rows.mapped("taxable_13_amount")), totals["taxable_13"])
+        self.assertEqual(wizard._get_report_totals_sql(wizard._build_report_domain()), totals)
+        # In Costa Rica time the range totals are read from the summary rows.
+        rows.unlink()
+        self.assertEqual(wizard._get_report_totals()["total"], 0.0)
+        utc_wizard = wizard.with_context(tz="UTC")
+        self.assertEqual(
+            utc_wizard._get_report_totals(), utc_wizard._get_report_totals_sql(utc_wizard._build_report_domain())
+        )
+
+    def test_daily_summary_applies_order_deltas_and_drops_emptied_rows(self):
+        orders = self._create_summary_orders("2031-02-11 15:00:00")
+        summary_model = self.env["pos.fe.daily.summary"]
+        summary_model._cr_flush_dirty()
+
+        rows = summary_model.search([("date", "=", "2031-02-11")])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows.order_count, 2)
+        self.assertAlmostEqual(rows.total_amount, 226.0)
+
+        # Moving the orders to another day shifts their amounts without re-aggregating the day.
+        orders.write({"date_order": "2031-02-12 15:00:00"})
+        with patch.object(type(summary_model), "_cr_insert_grouped", autospec=True) as insert_grouped:
+            summary_model._cr_flush_dirty()
+        insert_grouped.assert_not_called()
+
+        self.assertFalse(summary_model.search([("date", "=", "2031-02-11")]))
+        moved = summary_model.search([("date", "=", "2031-02-12")])
+        self.assertEqual(moved.order_count, 2)
+        self.assertAlmostEqual(moved.total_amount, 226.0)
+
+    def test_daily_summary_follows_fe_status_changes_at_commit(self):
+        orders = self._create_summary_orders("2031-02-10 15:00:00")
+        summary_model = self.env["pos.fe.daily.summary"]
+        summary_model._cr_rebuild("2031-02-10", "2031-02-10")
+
+        orders[0].cr_fe_status = "accepted"
+        self.env.cr.flush()  # runs the precommit hooks
+
+        rows = summary_model.search([("date", "=", "2031-02-10")])
+        self.assertEqual(
+            {row.fe_status: row.order_count for row in rows},
+            {"accepted": 1, "sent": 1},
+        )
+        accepted = rows.filtered(lambda row: row.fe_status == "accepted")
+        self.assertAlmostEqual(accepted.total_amount, 113.0)
+
+    def test_classify_line_taxes_single_pass_buckets(self):
+        order_model = self.env["pos.order"]
+        tracked = (1.0, 2.0, 4.0, 13.0)
+
+        def tax(amount, code=False):
+            return SimpleNamespace(amount=amount, fp_tax_rate_code_iva=code)
+
+        self.assertEqual(order_model._cr_classify_line_taxes([tax(13.0, "01")], tracked)[0], "nonsubject")
+        self.assertEqual(order_model._cr_classify_line_taxes([tax(0.0, "10")], tracked)[0], "exempt")
+        self.assertEqual(order_model._cr_classify_line_taxes([], tracked)[0], "exempt")
+        self.assertEqual(
+            order_model._cr_classify_line_taxes([tax(0.0, "08")], tracked),
+            ("exonerated", {"13%"}, set()),
+        )
+        self.assertEqual(
+            order_model._cr_classify_line_taxes([tax(13.0, "08"), tax(0.5)], tracked),
+            ("taxable", {"13%", "0.5%"}, {13.0}),
+        )
+
+    def test_tax_fe_classification_is_stored_and_follows_tax_changes(self):
+        values = {
+            "name": "IVA 13 FE",
+            "amount": 13,
+            "amount_type": "percent",
+            "type_tax_use": "sale",
+            "company_id": self.env.company.id,
+        }
+        if "fp_tax_rate_code_iva" in self.env["account.tax"]._fields:
+            values["fp_tax_rate_code_iva"] = False
+        tax = self.env["account.tax"].create(values)
+        self.assertEqual(tax.cr_fe_tax_bucket, "taxable")
+        self.assertEqual(
+            self.env["pos.order"]._cr_classify_line_taxes(tax, (1.0, 2.0, 4.0, 13.0)),
+            ("taxable", {"13%"}, {13.0}),
+        )
+
+        # A 0% rate is exento on the tax, the order amounts and the receipt alike.
+        tax.amount = 0.0
+        self.assertEqual(tax.cr_fe_tax_bucket, "exempt")
+        self.assertEqual(self.env["pos.order"]._cr_classify_line_taxes(tax, (1.0, 2.0, 4.0, 13.0))[0], "exempt")
+        self.assertIn("cr_fe_tax_bucket", tax._load_pos_data_fields(self.env["pos.config"].search([], limit=1)))
+
+    def test_tax_report_amounts_are_stored_for_sql_aggregation(self):
+        order_model = self.env["pos.order"]
+        for field_name in (
+            "cr_tax_rate_display",
+            "cr_taxable_amount",
+            "cr_taxable_amount_1",
+            "cr_taxable_amount_2",
+            "cr_taxable_amount_4",
+            "cr_taxable_amount_13",
+            "cr_exempt_amount",
+            "cr_nonsubject_amount",
+            "cr_exonerated_amount",
+        ):
+            self.assertTrue(order_model._fields[field_name].store, field_name)
+        groups = order_model._read_group([("id", "=", 0)], aggregates=["cr_taxable_amount_13:sum", "cr_exempt_amount:sum"])
+        self.assertEqual(len(groups), 1)
+
     def test_sync_last_consecutivo_in_einvoice_config_uses_service_method_when_available(self):
         order = self.env["pos.order"].new({"company_id": self.env.company.id})
         captured = {}
@@ -280,6 +553,68 @@ class TestPosEInvoice(TransactionCase):
         self.assertEqual(payload[0]["code"], "06")
         self.assertAlmostEqual(payload[0]["amount"], 1000.0)
 
+    def test_other_charges_are_resolved_once_and_stored_on_the_order(self):
+        Product = self.env["product.product"]
+        dish = Product.create({"name": "Casado"})
+        service = Product.create({"name": "Servicio a la mesa", "cr_is_other_charge_line": True})
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/OC/STORED/001",
+                "lines": [
+                    (0, 0, {"product_id": dish.id, "qty": 1.0, "price_unit": 500.0, "price_subtotal": 500.0, "price_subtotal_incl": 500.0}),
+                    (0, 0, {"product_id": service.id, "qty": 1.0, "price_unit": 50.0, "price_subtotal": 50.0, "price_subtotal_incl": 50.0}),
+                ],
+            }
+        )
+        order.flush_recordset()
+
+        self.assertEqual(order.cr_other_charges_amount, 50.0)
+        self.assertEqual(len(order.cr_other_charges_resolved_json), 1)
+        self.assertEqual(order.cr_other_charges_resolved_json[0]["code"], "06")
+        self.assertEqual(order.cr_other_charges_resolved_json[0]["amount"], 50.0)
+        with patch.object(type(order), "_cr_resolve_other_charges", side_effect=AssertionError("resolved again")):
+            payload = order._cr_get_other_charges_payload()
+        self.assertEqual(payload, order.cr_other_charges_resolved_json)
+
+        # Editing the charge line refreshes the stored resolution.
+        order.lines.filtered(lambda line: line.product_id == service).write(
+            {"price_unit": 75.0, "price_subtotal": 75.0, "price_subtotal_incl": 75.0}
+        )
+        self.assertEqual(order._cr_get_other_charges_payload()[0]["amount"], 75.0)
+        self.assertEqual(order.cr_other_charges_amount, 75.0)
+
+    def _assert_line_taxes_match_compute_all(self, order):
+        """The batched amounts must equal the per-line compute_all() the XML amounts come from."""
+        line_taxes = order._cr_compute_lines_taxes()
+        self.assertEqual(len(line_taxes), len(order.lines))
+        currency = self.env.company.currency_id
+        for line in order.lines:
+            expected = line.tax_ids_after_fiscal_position.compute_all(line.price_unit, currency=currency, quantity=line.qty)
+            self.assertEqual(line_taxes[line.id]["total_excluded"], expected["total_excluded"])
+            self.assertEqual(line_taxes[line.id]["total_included"], expected["total_included"])
+            self.assertEqual(line_taxes[line.id]["taxes"][0]["amount"], expected["taxes"][0]["amount"])
+            self.assertEqual(line_taxes[line.id]["taxes"][0]["base"], expected["taxes"][0]["base"])
+
+    def test_batched_line_taxes_match_per_line_compute_all(self):
+        self._assert_line_taxes_match_compute_all(_new_order_with_taxed_lines(self.env, 5))
+
+    def test_batched_line_taxes_match_compute_all_on_stored_discounted_lines(self):
+        # Stored lines carry their discount in the database, where the base-line helper would read it.
+        order = _new_order_with_taxed_lines(self.env, 4, discount=15.0, stored=True)
+        self.assertEqual(set(order.lines.mapped("discount")), {15.0})
+        self._assert_line_taxes_match_compute_all(order)
+
+    def test_batched_line_taxes_keep_per_line_amounts_for_discounts_and_global_rounding(self):
+        self._assert_line_taxes_match_compute_all(_new_order_with_taxed_lines(self.env, 5, discount=10.0))
+
+        self.env.company.tax_calculation_rounding_method = "round_globally"
+        # Prices with half-cent taxes, where global rounding would move cents between lines.
+        order = _new_order_with_taxed_lines(self.env, 6, discount=7.5)
+        for index, line in enumerate(order.lines):
+            line.price_unit = 10.05 + index * 0.11
+        self._assert_line_taxes_match_compute_all(order)
+
     def test_build_refund_reference_values_sets_reference_fields_when_available(self):
         order = self.env["pos.order"].new({"company_id": self.env.company.id, "amount_total": -10.0})
         origin_order = self.env["pos.order"].new(
@@ -647,7 +982,7 @@ class TestPosEInvoice(TransactionCase):
         self.assertTrue(mail)
         self.assertEqual(mail.email_to, partner.email)
 
-    def test_try_send_accepted_email_skips_duplicate_when_mail_already_exists(self):
+    def test_try_send_accepted_email_skips_duplicate_when_already_sent(self):
         partner = self.env["res.partner"].create({"name": "Cliente FE Dup", "email": "dupmail@example.com"})
         order = self.env["pos.order"].create(
             {
@@ -660,16 +995,7 @@ class TestPosEInvoice(TransactionCase):
             }
         )
 
-        self.env["mail.mail"].sudo().create(
-            {
-                "subject": order._cr_get_email_subject(),
-                "email_to": partner.email,
-                "body_html": "<p>Duplicado</p>",
-                "state": "sent",
-                "model": "pos.order",
-                "res_id": order.id,
-            }
-        )
+        self.env["pos.fe.email"]._cr_ensure(order, partner.email)._cr_mark_sent()
 
         with patch.object(type(order), "_cr_is_auto_email_enabled", lambda self: True):
             with patch.object(type(self.env["mail.mail"]), "create", side_effect=AssertionError("Should not create duplicate mail")):
@@ -701,6 +1027,81 @@ class TestPosEInvoice(TransactionCase):
 
         self.assertFalse(order.cr_fe_email_sent)
 
+    def test_email_queue_sends_accepted_documents_in_one_batch(self):
+        orders = self.env["pos.order"]
+        for index in range(3):
+            partner = self.env["res.partner"].create({"name": f"Cliente Cola {index}", "email": f"cola{index}@example.com"})
+            orders |= self.env["pos.order"].create(
+                {
+                    "company_id": self.env.company.id,
+                    "name": f"POS/MAIL/QUEUE/{index}",
+                    "partner_id": partner.id,
+                    "cr_fe_status": "accepted",
+                    "cr_fe_document_type": "te",
+                    "cr_fe_email_sent": False,
+                }
+            )
+        xml_attachment = self.env["ir.attachment"].create(
+            {"name": "cola.xml", "type": "binary", "datas": "PGZvbz5iYXI8L2Zvbz4=", "mimetype": "application/xml"}
+        )
+        send_batches = []
+
+        def fake_send(mails, *args, **kwargs):
+            send_batches.append(mails.ids)
+            mails.write({"state": "sent"})
+            return True
+
+        with patch.object(type(orders), "_cr_is_auto_email_enabled", lambda self: True):
+            self.assertTrue(orders._cr_enqueue_accepted_email())
+            entries = self.env["pos.fe.email"].search([("order_id", "in", orders.ids)])
+            self.assertEqual(set(entries.mapped("state")), {"queued"})
+
+            with patch.object(type(orders), "_cr_get_email_attachments", lambda self: xml_attachment):
+                with patch.object(type(self.env["mail.mail"]), "send", fake_send):
+                    self.env["pos.fe.email"]._cron_cr_pos_send_fe_emails()
+
+        self.assertEqual(len(send_batches), 1)
+        self.assertEqual(len(send_batches[0]), 3)
+        self.assertEqual(set(entries.mapped("state")), {"sent"})
+        self.assertTrue(all(orders.mapped("cr_fe_email_sent")))
+
+    def test_email_queue_retries_failed_deliveries_with_backoff(self):
+        partner = self.env["res.partner"].create({"name": "Cliente Reintento", "email": "reintento@example.com"})
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/MAIL/RETRY/001",
+                "partner_id": partner.id,
+                "cr_fe_status": "accepted",
+                "cr_fe_document_type": "te",
+                "cr_fe_email_sent": False,
+            }
+        )
+        entry = self.env["pos.fe.email"]._cr_ensure(order, partner.email)
+        EmailQueue = self.env["pos.fe.email"]
+
+        with patch.object(type(order), "_cr_is_auto_email_enabled", lambda self: True), patch.object(
+            type(order), "_cr_get_email_attachments", lambda self: self.env["ir.attachment"]
+        ):
+            EmailQueue._cron_cr_pos_send_fe_emails()
+            self.assertEqual((entry.state, entry.attempts), ("queued", 1))
+            self.assertGreater(entry.next_try, fields.Datetime.now())
+
+            # Not due yet: the next run leaves it alone.
+            EmailQueue._cron_cr_pos_send_fe_emails()
+            self.assertEqual(entry.attempts, 1)
+
+            for attempt in range(2, 6):
+                entry.next_try = fields.Datetime.now() - timedelta(minutes=1)
+                EmailQueue._cron_cr_pos_send_fe_emails()
+                self.assertEqual(entry.attempts, attempt)
+        self.assertEqual(entry.state, "error")
+        self.assertFalse(entry.next_try)
+
+        # A manual resend queues it again with a fresh attempt count.
+        EmailQueue._cr_ensure(order, partner.email, requeue=True)
+        self.assertEqual((entry.state, entry.attempts), ("queued", 0))
+
     def test_get_email_attachments_includes_linked_pdf_attachment(self):
         order = self.env["pos.order"].create(
             {
@@ -769,6 +1170,269 @@ class TestPosEInvoice(TransactionCase):
         self.assertEqual(len(second), 1)
         self.assertEqual(second.id, first_id)
 
+    def test_accepted_status_enqueues_receipt_pdf_instead_of_rendering(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/QUEUE/001",
+                "cr_fe_status": "sent",
+                "cr_fe_consecutivo": "00100001010000000020",
+            }
+        )
+        with patch.object(
+            type(order),
+            "_cr_render_receipt_pdf_content",
+            side_effect=AssertionError("PDF must not be rendered inside the status write"),
+        ):
+            order.write({"cr_fe_status": "accepted"})
+        self.assertTrue(order.cr_fe_pdf_pending)
+        self.assertFalse(order.cr_fe_pdf_attachment_id)
+
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", lambda self: b"%PDF-queued"):
+            self.env["pos.order"]._cron_cr_pos_render_pending_receipt_pdfs()
+        self.assertFalse(order.cr_fe_pdf_pending)
+        self.assertTrue(order.cr_fe_pdf_attachment_id)
+
+    def test_fe_status_changes_are_logged_as_events_with_terminal_chatter_only(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/EVENT/001",
+                "cr_fe_status": "pending",
+            }
+        )
+        messages_before = len(order.message_ids)
+
+        order.with_context(cr_fe_skip_email_delivery=True).write({"cr_fe_status": "sent"})
+        order.with_context(cr_fe_skip_email_delivery=True).write({"cr_fe_status": "processing"})
+        self.assertEqual(len(order.message_ids), messages_before)
+
+        order.with_context(cr_fe_skip_email_delivery=True).write({"cr_fe_status": "accepted"})
+        self.assertEqual(len(order.message_ids), messages_before + 1)
+
+        events = order.cr_fe_event_ids.filtered(lambda event: event.event == "status").sorted("id")
+        self.assertEqual(events.mapped("status"), ["sent", "processing", "accepted"])
+        self.assertEqual(events.mapped("previous_status"), ["pending", "sent", "processing"])
+        self.assertTrue(order.cr_fe_status_changed_at)
+
+    def test_render_cron_drops_orders_no_longer_accepted(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/QUEUE/002",
+                "cr_fe_status": "rejected",
+                "cr_fe_pdf_pending": True,
+            }
+        )
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", side_effect=AssertionError("Should not render")):
+            self.env["pos.order"]._cron_cr_pos_render_pending_receipt_pdfs()
+        self.assertFalse(order.cr_fe_pdf_pending)
+
+    def test_render_cron_backs_off_failing_orders_then_falls_back_to_existing_pdf(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/QUEUE/003",
+                "cr_fe_status": "accepted",
+                "cr_fe_pdf_pending": True,
+            }
+        )
+        order_class = type(order)
+        cron = self.env.ref("cr_pos_einvoice.ir_cron_cr_pos_render_pending_receipt_pdfs")
+        with patch.object(order_class, "_cr_render_receipt_pdf_content", side_effect=RuntimeError("wkhtmltopdf crashed")), patch.object(
+            order_class, "_cr_enqueue_accepted_email", autospec=True
+        ) as enqueue_email, patch.object(type(cron), "_trigger", autospec=True) as trigger:
+            self.env["pos.order"]._cron_cr_pos_render_pending_receipt_pdfs(limit=1)
+            self.assertTrue(order.cr_fe_pdf_pending)
+            self.assertEqual(order.cr_fe_pdf_attempts, 1)
+            self.assertGreater(order.cr_fe_pdf_next_try, fields.Datetime.now())
+            # A failing head of the queue does not re-trigger the cron on the same rows.
+            trigger.assert_not_called()
+            self.assertFalse(enqueue_email.call_args.args[0])
+
+            # Not due yet: the next run skips it.
+            self.env["pos.order"]._cron_cr_pos_render_pending_receipt_pdfs(limit=1)
+            self.assertEqual(order.cr_fe_pdf_attempts, 1)
+
+            order.cr_fe_pdf_attempts = order._CR_RECEIPT_PDF_MAX_ATTEMPTS - 1
+            order.cr_fe_pdf_next_try = False
+            self.env["pos.order"]._cron_cr_pos_render_pending_receipt_pdfs(limit=1)
+        self.assertFalse(order.cr_fe_pdf_pending)
+        self.assertEqual(enqueue_email.call_args.args[0], order)
+
+    def test_receipt_pdf_render_cache_skips_rendering_until_inputs_change(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/CACHE/001",
+                "cr_fe_status": "accepted",
+                "cr_fe_consecutivo": "00100001010000000030",
+            }
+        )
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", lambda self: b"%PDF-cached"):
+            order.cr_pos_generate_receipt_pdf_if_accepted([order.id])
+        attachment = order.cr_fe_pdf_attachment_id
+        self.assertTrue(attachment)
+
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", side_effect=AssertionError("Should use cache")):
+            attachments = order._cr_get_email_attachments()
+        self.assertIn(attachment, attachments)
+
+        order.cr_fe_consecutivo = "00100001010000000031"
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", lambda self: b"%PDF-rerendered"):
+            order.cr_pos_generate_receipt_pdf_if_accepted([order.id])
+        document = self.env["pos.fe.document"]._cr_get(order, "pdf")
+        self.assertEqual(document.digest, self.env["pos.fe.document"]._cr_compute_digest(b"%PDF-rerendered"))
+        self.assertEqual(document.source_hash, order._cr_get_receipt_render_hash())
+
+    def test_native_ticket_engine_renders_pdf_without_wkhtmltopdf(self):
+        config = self.env["pos.config"].create(
+            {
+                "name": "POS FE Native PDF",
+                "company_id": self.env.company.id,
+                "cr_fe_ticket_pdf_engine": "native",
+            }
+        )
+        order = self.env["pos.order"].new(
+            {
+                "company_id": self.env.company.id,
+                "config_id": config.id,
+                "name": "POS/NATIVE/001",
+                "cr_fe_status": "accepted",
+                "cr_fe_consecutivo": "00100001040000000040",
+                "cr_fe_clave": "506" + "0" * 47,
+            }
+        )
+        with patch.object(
+            type(self.env["ir.actions.report"]),
+            "_render_qweb_pdf",
+            side_effect=AssertionError("QWeb/wkhtmltopdf must not run for the native engine"),
+        ):
+            pdf_content = order._cr_render_receipt_pdf_content()
+        self.assertTrue(pdf_content.startswith(b"%PDF"))
+
+        data = order._cr_get_ticket_render_data()
+        self.assertIn(("Consecutivo", "00100001040000000040"), data["document_lines"])
+        self.assertEqual(data["clave"], "506" + "0" * 47)
+
+    def test_receipt_html_is_stored_compressed_outside_pos_order(self):
+        order = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/HTML/001"})
+        html = "<div class='pos-receipt'>" + "Línea de tiquete " * 200 + "</div>"
+        self.assertEqual(order.cr_pos_store_receipt_html(order.id, html), {"ok": True})
+
+        self.assertFalse(order._fields["cr_receipt_html"].store)
+        attachment = order._cr_get_fe_document_attachment("receipt_html")
+        self.assertEqual(attachment.mimetype, "application/gzip")
+        self.assertLess(len(attachment.raw), len(html.encode("utf-8")))
+        self.assertEqual(order.cr_receipt_html, html)
+
+    def test_store_receipt_html_accepts_gzip_capture_with_deduplicated_header(self):
+        config = self.env["pos.config"].create({"name": "POS FE Capture", "company_id": self.env.company.id})
+        order = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/HTML/003"})
+        header = "<img class='pos-receipt-logo' src='data:image/png;base64,AAAA'/>"
+        digest = hashlib.sha256(header.encode("utf-8")).hexdigest()
+        body = "<div class='pos-receipt'><!--cr-receipt-header--><div>Total 1000</div></div>"
+        options = {"encoding": "gzip+base64", "header_digest": digest}
+        encoded_body = base64.b64encode(gzip.compress(body.encode("utf-8"))).decode()
+
+        result = order.cr_pos_store_receipt_html(order.id, encoded_body, options)
+        self.assertEqual(result, {"ok": False, "missing_header": True})
+
+        # The miss above was not cached: the stored header is found without clearing any cache.
+        with patch.object(type(self.env.registry), "clear_cache", side_effect=AssertionError("cache cleared")):
+            self.assertEqual(
+                self.env["pos.config"].cr_pos_store_receipt_header(config.id, digest, header, {"encoding": "identity"}),
+                {"ok": True},
+            )
+            self.assertEqual(order.cr_pos_store_receipt_html(order.id, encoded_body, options), {"ok": True})
+
+        self.assertEqual(order.cr_receipt_html, body.replace("<!--cr-receipt-header-->", header))
+
+    def test_purge_receipt_html_respects_retention(self):
+        order = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/HTML/002", "cr_receipt_html": "<div>Viejo</div>"}
+        )
+        document = self.env["pos.fe.document"]._cr_get(order, "receipt_html")
+        self.assertTrue(document)
+        self.env["ir.config_parameter"].sudo().set_param("cr_pos_einvoice.receipt_html_retention_days", "7")
+
+        self.env["pos.order"]._cron_cr_pos_purge_receipt_html()
+        self.assertTrue(document.exists())
+
+        document.created_at = fields.Datetime.now() - timedelta(days=8)
+        self.env["pos.order"]._cron_cr_pos_purge_receipt_html()
+        self.assertFalse(document.exists())
+        order.invalidate_recordset(["cr_receipt_html"])
+        self.assertFalse(order.cr_receipt_html)
+
+    def test_receipt_pdf_is_registered_as_fe_document_with_digest(self):
+        order = self.env["pos.order"].create(
+            {
+                "company_id": self.env.company.id,
+                "name": "POS/DOC/001",
+                "cr_fe_status": "accepted",
+                "cr_fe_consecutivo": "00100001010000000010",
+            }
+        )
+        with patch.object(type(order), "_cr_render_receipt_pdf_content", lambda self: b"%PDF-doc"):
+            order.cr_pos_generate_receipt_pdf_if_accepted([order.id])
+
+        document = self.env["pos.fe.document"].search([("order_id", "=", order.id), ("kind", "=", "pdf")])
+        self.assertEqual(len(document), 1)
+        self.assertEqual(document.attachment_id, order.cr_fe_pdf_attachment_id)
+        self.assertEqual(document.size, len(b"%PDF-doc"))
+        self.assertEqual(document.digest, self.env["pos.fe.document"]._cr_compute_digest(b"%PDF-doc"))
+
+    def test_legacy_pdf_attachment_is_registered_instead_of_duplicated(self):
+        order = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/DOC/LEGACY", "cr_fe_consecutivo": "00100001010000000011"}
+        )
+        legacy = self.env["ir.attachment"].create(
+            {
+                "name": "00100001010000000011.pdf",
+                "type": "binary",
+                "raw": b"%PDF-legacy",
+                "res_model": "pos.order",
+                "res_id": order.id,
+                "mimetype": "application/pdf",
+            }
+        )
+
+        with patch.object(type(order), "_cr_get_pdf_report_action", side_effect=AssertionError("rendered again")):
+            self.assertEqual(order._cr_get_or_create_pdf_attachment(), legacy)
+
+        document = self.env["pos.fe.document"]._cr_get(order, "pdf")
+        self.assertEqual(document.attachment_id, legacy)
+        self.assertEqual(document.digest, self.env["pos.fe.document"]._cr_compute_digest(b"%PDF-legacy"))
+        self.assertEqual(order.cr_fe_pdf_attachment_id, legacy)
+
+    def test_build_pos_xml_reuses_stored_digest_without_decoding(self):
+        order = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/DOC/002"})
+        attachment = self.env["ir.attachment"].create(
+            {
+                "name": "TE-00100001040000000010-firmado.xml",
+                "type": "binary",
+                "raw": b"<TiqueteElectronico/>",
+                "res_model": "pos.order",
+                "res_id": order.id,
+                "mimetype": "application/xml",
+            }
+        )
+        document = order._cr_register_fe_document("xml", attachment, b"<TiqueteElectronico/>")
+        order.cr_fe_xml_attachment_id = attachment
+
+        with patch("odoo.addons.cr_pos_einvoice.models.pos_order.base64.b64decode") as b64decode:
+            result = order.build_pos_xml_from_order(
+                order.id,
+                consecutivo="00100001040000000010",
+                idempotency_key="key-doc-002",
+                clave="506" + "0" * 47,
+                document_type="te",
+            )
+        b64decode.assert_not_called()
+        self.assertTrue(result["reused"])
+        self.assertEqual(result["digest"], document.digest)
+
     def test_generate_receipt_pdf_fallback_without_html(self):
         order = self.env["pos.order"].create(
             {
@@ -876,6 +1540,64 @@ class TestPosEInvoice(TransactionCase):
         self.assertEqual(reference_data.get("issue_date"), refund_order.cr_fe_reference_issue_date)
         self.assertFalse(refund_order._cr_should_delay_credit_note_xml())
 
+    def test_refund_reference_resolution_is_memoized_per_transaction(self):
+        PosOrder = self.env["pos.order"]
+        origin_order = PosOrder.create(
+            {
+                "company_id": self.env.company.id,
+                "name": "ORIGIN/MEMO/001",
+                "cr_fe_document_type": "te",
+                "cr_fe_clave": "50601010100000000000000100001040000000001123456789",
+                "date_order": fields.Datetime.now(),
+            }
+        )
+        refund_order = PosOrder.create(
+            {"company_id": self.env.company.id, "name": "REFUND/MEMO/001", "amount_total": -10.0, "cr_fe_document_type": "nc"}
+        )
+        self.env.flush_all()
+
+        with patch.object(type(refund_order), "_cr_get_origin_order_for_refund", lambda self: origin_order), patch.object(
+            type(refund_order), "_cr_get_origin_invoice_for_refund", lambda self: self.env["account.move"]
+        ):
+            reference_data = refund_order._cr_get_refund_reference_data()
+            self.assertEqual(reference_data["number"], origin_order.cr_fe_clave)
+
+            with self.assertQueryCount(0):
+                self.assertEqual(refund_order._cr_get_refund_reference_data(), reference_data)
+                refund_order._cr_get_manual_reference_data()
+
+            # Callers get copies: mutating one never leaks into the memo.
+            reference_data["number"] = False
+            self.assertTrue(refund_order._cr_get_refund_reference_data()["number"])
+
+            refund_order.write({"cr_fe_reference_code": "02"})
+            self.assertNotIn(PosOrder._CR_REFERENCE_MEMO_KEY, self.env.cr.precommit.data)
+            self.assertEqual(refund_order._cr_get_manual_reference_data()["code"], "02")
+
+    def test_create_runs_reference_machinery_only_on_refund_candidates(self):
+        PosOrder = self.env["pos.order"]
+        prefilled = []
+        original_prefill = type(PosOrder)._cr_prefill_reference_from_origin_order
+
+        def _recording_prefill(records):
+            prefilled.append(records)
+            return original_prefill(records)
+
+        with patch.object(type(PosOrder), "_cr_prefill_reference_from_origin_order", _recording_prefill):
+            orders = PosOrder.create(
+                [
+                    {"company_id": self.env.company.id, "name": "SALE/BATCH/001", "amount_total": 10.0},
+                    {"company_id": self.env.company.id, "name": "REFUND/BATCH/001", "amount_total": -10.0},
+                    {"company_id": self.env.company.id, "name": "SALE/BATCH/002", "amount_total": 5.0},
+                ]
+            )
+
+        self.assertEqual(prefilled, [orders[1]])
+        self.assertEqual(orders._cr_get_refund_candidates(), orders[1])
+        self.assertFalse(orders[0]._cr_is_credit_note_order())
+        orders[2].cr_fe_document_type = "nc"
+        self.assertEqual(orders._cr_get_refund_candidates(), orders[1:])
+
     def test_capture_reference_snapshot_fills_optional_reference_fields_when_required_are_present(self):
         refund_order = self.env["pos.order"].create(
             {
@@ -1248,6 +1970,224 @@ class TestPosEInvoice(TransactionCase):
         self.assertEqual(captured.get("cr_fe_status"), "error_retry")
         self.assertEqual(captured.get("cr_fe_error_code"), "reference_pending")
 
+    def test_fe_transition_table_blocks_leaving_terminal_states(self):
+        accepted = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/FSM/001", "cr_fe_status": "accepted"}
+        )
+        pending = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/FSM/002", "cr_fe_status": "pending"}
+        )
+
+        moved = (accepted | pending)._cr_fe_transition("error_retry", {"cr_fe_error_code": "send_error"})
+
+        self.assertEqual(moved, pending)
+        self.assertEqual(pending.cr_fe_status, "error_retry")
+        self.assertEqual(accepted.cr_fe_status, "accepted")
+        self.assertFalse(accepted.cr_fe_error_code)
+
+    def test_fe_transition_force_reopens_rejected_and_sent_returns_to_pending(self):
+        rejected = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/FSM/004", "cr_fe_status": "rejected"}
+        )
+        sent = self.env["pos.order"].create(
+            {"company_id": self.env.company.id, "name": "POS/FSM/005", "cr_fe_status": "sent"}
+        )
+
+        self.assertFalse(rejected._cr_fe_transition("accepted"))
+        self.assertEqual(rejected.cr_fe_status, "rejected")
+
+        self.assertEqual(rejected._cr_fe_transition("accepted", force=True), rejected)
+        self.assertEqual(rejected.cr_fe_status, "accepted")
+        self.assertFalse(rejected._cr_fe_transition("sent", force=True))
+        self.assertEqual(rejected.cr_fe_status, "accepted")
+
+        self.assertEqual(sent._cr_fe_transition("pending"), sent)
+        self.assertEqual(sent.cr_fe_status, "pending")
+
+    def test_prepare_te_document_applies_a_single_transition_write(self):
+        order = self.env["pos.order"].create({"company_id": self.env.company.id, "name": "POS/FSM/003"})
+        attachment = self.env["ir.attachment"].create(
+            {"name": "TE-1-firmado.xml", "raw": b"<TiqueteElectronico/>", "res_model": "pos.order", "res_id": order.id}
+        )
+        order_class = type(order)
+        original_write = order_class.write
+        written = []
+
+        def _counting_write(records, values):
+            written.append(dict(values))
+            return original_write(records, values)
+
+        def _fake_service(records, method_names, *args, **kwargs):
+            self.assertTrue(records.env.context.get("cr_fe_defer_xml_link"))
+            return {"ok": True, "xml_attachment_id": attachment.id}
+
+        with patch.multiple(
+            order_class,
+            _cr_requires_account_move_flow=lambda self: False,
+            _cr_should_emit_ticket=lambda self: True,
+            _cr_validate_before_send=lambda self: True,
+            _cr_is_credit_note_order=lambda self: False,
+            _cr_should_delay_credit_note_xml=lambda self: False,
+            _cr_get_pos_document_type=lambda self: "te",
+            _cr_generate_fe_consecutivo=lambda self, document_type=None: "00100001040000000099",
+            _cr_generate_fe_clave=lambda self, consecutivo: "506" + "9" * 47,
+            _cr_build_pos_payload=lambda self, **kwargs: {},
+            _cr_sync_last_consecutivo_in_einvoice_config=lambda self, doc_type, consecutivo: True,
+            _cr_call_service_method=_fake_service,
+            write=_counting_write,
+        ):
+            self.assertTrue(order._cr_prepare_te_document())
+
+        self.assertEqual(len(written), 1)
+        self.assertEqual(written[0]["cr_fe_status"], "pending")
+        self.assertEqual(order.cr_fe_xml_attachment_id, attachment)
+        self.assertTrue(order.cr_fe_idempotency_key)
+
+    def test_backend_capabilities_are_resolved_from_signatures(self):
+        class LegacyService:
+            def get_next_consecutivo(self, company_id, document_type):
+                return "0000000007"
+
+            def send_to_hacienda(self):
+                return {}
+
+            def send_from_pos_order(self, order_id, document_type, idempotency_key, company_id, /):
+                return {"ok": True}
+
+        self.assertEqual(
+            resolve_capability(LegacyService, "next_consecutive"), ("get_next_consecutivo", CALL_KWARGS, [])
+        )
+        # send_to_hacienda() cannot take the call at all; the legacy method only takes positional arguments.
+        self.assertEqual(
+            resolve_capability(LegacyService, "send"), ("send_from_pos_order", CALL_POSITIONAL, ["send_to_hacienda"])
+        )
+        self.assertEqual(resolve_capability(LegacyService, "status"), (None, None, []))
+
+        order_model = self.env["pos.order"]
+        self.assertEqual(
+            order_model._cr_resolve_backend_capability("pos.order", "send"), ("send_to_hacienda", CALL_KWARGS)
+        )
+        self.assertIsNone(order_model._cr_resolve_backend_capability("cr.missing.model", "send"))
+        with patch("odoo.addons.cr_pos_einvoice.models.pos_order.resolve_capability") as resolver:
+            order_model._cr_resolve_backend_capability("pos.order", "send")
+        resolver.assert_not_called()
+
+    def _create_posted_pos_invoices(self, count):
+        if not self.env["account.journal"].search([("type", "=", "sale"), ("company_id", "=", self.env.company.id)], limit=1):
+            self.skipTest("No sale journal in the test company")
+        moves = self.env["account.move"].create([{"move_type": "out_invoice"} for _index in range(count)])
+        orders = self.env["pos.order"].create(
+            [{"company_id": self.env.company.id, "name": f"POS/POSTHOOK/{move.id}"} for move in moves]
+        )
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE account_move SET state = 'posted' WHERE id = ANY(%s)", (moves.ids,))
+        for order, move in zip(orders, moves):
+            self.env.cr.execute("UPDATE pos_order SET account_move = %s WHERE id = %s", (move.id, order.id))
+        self.env.invalidate_all()
+        return moves, orders
+
+    def test_account_move_post_hook_is_batched(self):
+        query_counts = []
+        for count in (2, 6):
+            moves, orders = self._create_posted_pos_invoices(count)
+            with patch.object(type(orders), "_cr_sync_from_invoice_only") as sync:
+                queries_before = self.env.cr.sql_log_count
+                # Chatter tracking of cr_pos_fe_state is per record by design; keep it out of the budget.
+                moves.with_context(tracking_disable=True)._cr_pos_after_post_hook()
+                self.env.flush_all()
+                query_counts.append(self.env.cr.sql_log_count - queries_before)
+
+            sync.assert_called_once()
+            self.assertEqual(moves.cr_pos_order_id, orders)
+            self.assertEqual(set(moves.mapped("cr_pos_fe_state")), {"to_send"})
+            self.assertEqual(set(moves.mapped("cr_pos_document_type")), {"fe"})
+
+        # The query budget does not depend on the number of posted moves.
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_pending_ticket_dispatch_is_fair_across_companies(self):
+        busy_company = self.env["res.company"].create({"name": "FE Backlog Co"})
+        other_company = self.env["res.company"].create({"name": "FE Quiet Co"})
+        busy_orders = self.env["pos.order"].create(
+            [{"company_id": busy_company.id, "name": f"POS/FAIR/BUSY/{index}"} for index in range(6)]
+        )
+        other_orders = self.env["pos.order"].create(
+            [{"company_id": other_company.id, "name": f"POS/FAIR/OTHER/{index}"} for index in range(2)]
+        )
+        (busy_orders | other_orders).write({"cr_fe_status": "pending", "cr_fe_next_try": False})
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE pos_order SET state = 'paid' WHERE id = ANY(%s)", ((busy_orders | other_orders).ids,))
+        self.env.invalidate_all()
+        order_model = self.env["pos.order"].with_context(allowed_company_ids=[busy_company.id, other_company.id])
+
+        targets = [order for order, _target in order_model._cr_get_pending_send_ticket_targets(limit=4)]
+        self.assertEqual(len(targets), 4)
+        self.assertEqual(set(targets) & set(other_orders), set(other_orders))
+        self.assertEqual(targets[0].company_id, busy_orders[0].company_id)
+        self.assertNotEqual(targets[0].company_id, targets[1].company_id)
+
+        # A per-document rejection never pauses the company; a streak of transport failures does.
+        circuit = self.env["pos.fe.circuit"]
+        busy_order = busy_orders[0]
+        order_class = type(busy_order)
+        with patch.object(order_class, "_cr_prepare_te_document"), patch.object(order_class, "_cr_validate_before_send"):
+            with patch.object(
+                order_class, "_cr_call_service_method", return_value={"ok": False, "reason": "Identificación del receptor inválida"}
+            ):
+                for _attempt in range(6):
+                    busy_order._cr_dispatch_pending_te(force=True)
+            self.assertEqual(busy_order.cr_fe_error_code, "send_error")
+            self.assertEqual(busy_order.cr_fe_retry_count, 6)
+            self.assertFalse(circuit._cr_get_open([busy_company.id]))
+
+            with patch.object(order_class, "_cr_call_service_method", side_effect=ConnectionError("Connection refused")) as send:
+                for _attempt in range(6):
+                    busy_order._cr_dispatch_pending_te(force=True)
+            self.assertEqual(busy_order.cr_fe_error_code, "transport_error")
+            # The sixth dispatch is skipped: the company was paused by the fifth failure.
+            self.assertEqual(send.call_count, 5)
+        self.assertIn(busy_company.id, circuit._cr_get_open([busy_company.id, other_company.id]))
+        targets = [order for order, _target in order_model._cr_get_pending_send_ticket_targets(limit=4)]
+        self.assertEqual(set(targets), set(other_orders))
+
+        circuit._cr_register_outcome(busy_company.id, failed=False)
+        self.assertFalse(circuit._cr_get_open([busy_company.id]))
+
+    def test_fe_circuit_success_without_streak_writes_nothing(self):
+        circuit = self.env["pos.fe.circuit"]
+        company = self.env["res.company"].create({"name": "Circuito FE sin fallos"})
+        registry_class = type(self.env.registry)
+
+        with patch.object(registry_class, "cursor", side_effect=AssertionError("circuit cursor opened")):
+            self.assertEqual(circuit._cr_register_outcome(company.id, failed=False), (0, None))
+
+        self.assertEqual(circuit._cr_register_outcome(company.id, failed=True)[0], 1)
+        self.assertEqual(circuit._cr_register_outcome(company.id, failed=False), (0, None))
+        self.assertEqual(circuit.search([("company_id", "=", company.id)]).failure_streak, 0)
+        with patch.object(registry_class, "cursor", side_effect=AssertionError("circuit cursor opened")):
+            self.assertEqual(circuit._cr_register_outcome(company.id, failed=False), (0, None))
+
+    def test_large_send_selection_runs_as_background_bulk_job(self):
+        orders = self.env["pos.order"].create(
+            [{"company_id": self.env.company.id, "name": f"POS/BULK/{index}"} for index in range(3)]
+        )
+        order_class = type(orders)
+        with patch.object(order_class, "_CR_SYNC_ACTION_LIMIT", 2), patch.object(
+            order_class, "_cr_send_pending_te_to_hacienda", autospec=True, side_effect=[True, False, True]
+        ) as send:
+            action = orders.action_cr_send_hacienda()
+            send.assert_not_called()
+            job = self.env["pos.fe.bulk.job"].browse(action["res_id"])
+            self.assertEqual((job.operation, job.state, job.total_count), ("send", "queued", 3))
+
+            job._cron_cr_pos_process_fe_bulk_jobs(batch_size=2)
+            self.assertEqual((job.state, len(job.done_order_ids), job.progress), ("running", 2, 100.0 * 2 / 3))
+            job._cron_cr_pos_process_fe_bulk_jobs(batch_size=2)
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual((job.state, job.success_count, job.error_count), ("done", 2, 1))
+        self.assertIn(orders[1].name, job.result_log)
+
     def test_should_delay_credit_note_xml_when_reference_is_incomplete(self):
         order = self.env["pos.order"].new({"company_id": self.env.company.id, "amount_total": -10.0})
 
@@ -1837,6 +2777,64 @@ class TestPosEInvoice(TransactionCase):
         self.assertTrue(order.cr_other_charges_json)
         self.assertEqual(order.cr_other_charges_amount, 10.0)
 
+    def test_field_aliases_keep_existing_fields_and_are_cached_per_registry(self):
+        order_model = self.env["pos.order"]
+        aliases = order_model._cr_field_aliases()
+
+        self.assertIn("cr_is_other_charge_line", aliases["line_tip_markers"])
+        self.assertIn("cr_is_other_charge_line", aliases["product_other_charge_markers"])
+        self.assertEqual(aliases["config_tip_product"][0], "cr_tip_product_id")
+        for alias, (model_name, _candidates) in order_model._CR_FIELD_ALIASES.items():
+            for field_name in aliases[alias]:
+                self.assertIn(field_name, self.env[model_name]._fields)
+        self.assertIs(order_model._cr_field_aliases(), aliases)
+
+        product = self.env["product.product"].create({"name": "Servicio 10%", "cr_is_other_charge_line": True})
+        self.assertTrue(order_model._cr_is_other_charge_product(product))
+        self.assertFalse(order_model._cr_is_other_charge_product(self.env["product.product"].create({"name": "Café"})))
+
+    def test_product_fe_charge_role_is_stored_and_drives_line_flag(self):
+        Product = self.env["product.product"]
+        marked_product = Product.create({"name": "Recargo", "cr_is_other_charge_line": True})
+        named_product = Product.create({"name": "Propina voluntaria"})
+        plain_product = Product.create({"name": "Casado"})
+        self.assertEqual(marked_product.cr_fe_charge_role, "other_charge")
+        self.assertEqual(named_product.cr_fe_charge_role, "tip_name")
+        self.assertFalse(plain_product.cr_fe_charge_role)
+
+        order = self.env["pos.order"].new(
+            {
+                "company_id": self.env.company.id,
+                "lines": [
+                    (0, 0, {"product_id": plain_product.id, "qty": 1.0, "price_unit": 100.0}),
+                    (0, 0, {"product_id": marked_product.id, "qty": 1.0, "price_unit": 10.0}),
+                ],
+            }
+        )
+        self.assertEqual(order.lines.mapped("cr_is_fe_charge_line"), [False, True])
+        self.assertEqual(order._cr_get_marked_other_charge_line_ids(), {order.lines[1].id})
+
+    def test_product_fe_charge_role_follows_pos_tip_product(self):
+        config = self.env["pos.config"].create({"name": "POS FE Propina", "company_id": self.env.company.id})
+        if not config._cr_get_native_tip_field_name():
+            self.skipTest("No native POS tip product field in this build")
+        Product = self.env["product.product"]
+        tip_product = Product.create({"name": "Cortesía mesa"})
+        marked_product = Product.create({"name": "Recargo", "cr_is_other_charge_line": True})
+        self.assertFalse(tip_product.cr_fe_charge_role)
+
+        config.cr_tip_product_id = tip_product
+        self.assertEqual(config.cr_tip_product_id, tip_product)
+        self.assertEqual(tip_product.cr_fe_charge_role, "tip")
+        with patch.object(type(self.env["pos.config"]), "search", side_effect=AssertionError("no tip candidate")):
+            # Marked products cannot be tips: their recompute does not look up the POS configs.
+            self.env.add_to_compute(Product._fields["cr_fe_charge_role"], marked_product)
+            marked_product.flush_recordset(["cr_fe_charge_role"])
+        self.assertEqual(marked_product.cr_fe_charge_role, "other_charge")
+
+        config.cr_tip_product_id = False
+        self.assertFalse(tip_product.cr_fe_charge_role)
+
     def test_normalize_other_charges_accepts_cr_marker(self):
         order = self.env["pos.order"].new({"company_id": self.env.company.id})
 
@@ -1906,3 +2904,84 @@ class TestPosEInvoice(TransactionCase):
         self.assertEqual(len(payload["other_charges"]), 1)
         self.assertEqual(payload["other_charges"][0]["code"], "06")
         self.assertEqual(payload["other_charges"][0]["amount"], 10.0)
+
+
+@tagged("post_install", "-at_install", "-standard", "cr_pos_benchmark")
+class TestPosTicketPdfBenchmark(TransactionCase):
+    """Compare the native ticket renderer with QWeb/wkhtmltopdf (run with ``--test-tags cr_pos_benchmark``)."""
+
+    _logger = logging.getLogger(__name__)
+    ORDER_COUNT = 20
+
+    def _measure(self, orders):
+        tracemalloc.start()
+        started = time.perf_counter()
+        for order in orders:
+            self.assertTrue(order._cr_render_receipt_pdf_content().startswith(b"%PDF"))
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed / len(orders), peak
+
+    def test_benchmark_native_vs_qweb_ticket_rendering(self):
+        if self.env["ir.actions.report"].get_wkhtmltopdf_state() != "ok":
+            self.skipTest("wkhtmltopdf is not available")
+
+        results = {}
+        for engine in ("native", "qweb"):
+            config = self.env["pos.config"].create(
+                {"name": f"POS Bench {engine}", "company_id": self.env.company.id, "cr_fe_ticket_pdf_engine": engine}
+            )
+            orders = self.env["pos.order"].create(
+                [
+                    {
+                        "company_id": self.env.company.id,
+                        "config_id": config.id,
+                        "name": f"POS/BENCH/{engine}/{index:03d}",
+                        "cr_fe_status": "accepted",
+                        "cr_fe_consecutivo": f"001000010400000{index:05d}",
+                        "cr_fe_clave": "506" + f"{index:047d}",
+                    }
+                    for index in range(self.ORDER_COUNT)
+                ]
+            )
+            results[engine] = self._measure(orders.with_context(force_report_rendering=True))
+
+        for engine, (seconds, peak) in results.items():
+            self._logger.info(
+                "Ticket PDF engine %s: %.1f ms/ticket, peak Python allocations %.1f KiB (wkhtmltopdf RSS not included)",
+                engine,
+                seconds * 1000,
+                peak / 1024,
+            )
+        self.assertLess(results["native"][0], results["qweb"][0])
+
+
+@tagged("post_install", "-at_install", "-standard", "cr_pos_benchmark")
+class TestPosLineTaxesBenchmark(TransactionCase):
+    """Per-line compute_all() vs the batched tax pass on a large ticket (run with ``--test-tags cr_pos_benchmark``)."""
+
+    _logger = logging.getLogger(__name__)
+    LINE_COUNT = 300
+
+    def test_benchmark_batched_line_taxes_on_large_ticket(self):
+        order = _new_order_with_taxed_lines(self.env, self.LINE_COUNT)
+        currency = self.env.company.currency_id
+
+        started = time.perf_counter()
+        for line in order.lines:
+            line.tax_ids_after_fiscal_position.compute_all(line.price_unit, currency=currency, quantity=line.qty)
+        per_line = time.perf_counter() - started
+
+        started = time.perf_counter()
+        line_taxes = order._cr_compute_lines_taxes()
+        batched = time.perf_counter() - started
+
+        self._logger.info(
+            "Line taxes for a %s-line ticket: per-line compute_all %.1f ms, batched %.1f ms",
+            self.LINE_COUNT,
+            per_line * 1000,
+            batched * 1000,
+        )
+        self.assertEqual(len(line_taxes), self.LINE_COUNT)
+        self.assertLess(batched, per_line)
@@ -0,0 +1,125 @@
+"""FE backend capabilities (which method implements each bridge call, and how to call it).
+
+The FE backend may be ``l10n_cr.einvoice.service``, ``pos.order`` itself or the
+``account.move`` of ``l10n_cr_einvoice``, depending on the installed version. Each
+capability lists its candidate method names in priority order together with the
+shape of the call made by the bridge, so the first compatible method and its call
+style can be resolved from the signatures once, instead of probing with
+``getattr`` and retrying on ``TypeError`` at every call.
+"""
+
+import inspect
+
+# Call styles.
+CALL_KWARGS = "kwargs"  # method(*args, **kwargs)
+CALL_WITHOUT_ID = "without_id"  # record method not taking order_id: method(*args[1:], **kwargs)
+CALL_POSITIONAL = "positional"  # legacy positional API: method(*args, *kwargs values in declared order)
+
+# capability -> (candidate method names, positional argument count, keyword names)
+BACKEND_CAPABILITIES = {
+    "build_xml": (
+        ("build_pos_xml_from_order", "prepare_pos_document", "prepare_from_pos_order", "enqueue_from_pos_order"),
+        1,
+        ("consecutivo", "idempotency_key", "clave", "document_type", "payload"),
+    ),
+    "send": (
+        ("send_to_hacienda", "enqueue_from_pos_order", "send_from_pos_order", "process_pos_order"),
+        1,
+        ("document_type", "idempotency_key", "company_id"),
+    ),
+    "status": (
+        ("consult_status", "check_status_from_pos_order", "check_status", "get_pos_order_status"),
+        1,
+        ("idempotency_key",),
+    ),
+    "status_action": (
+        (
+            "action_check_hacienda_status",
+            "action_consult_hacienda",
+            "action_get_hacienda_status",
+            "action_refresh_hacienda_status",
+        ),
+        0,
+        (),
+    ),
+    "send_action": (
+        (
+            "action_fp_send_to_api",
+            "action_sign_and_send",
+            "action_post_sign_invoices",
+            "action_send_to_hacienda",
+            "action_sign_xml",
+            "action_post_sign_pos_order",
+        ),
+        0,
+        (),
+    ),
+    "next_consecutive": (
+        ("get_next_consecutivo", "get_next_consecutive", "get_next_consecutivo_by_document_type"),
+        0,
+        ("company_id", "document_type"),
+    ),
+    "last_consecutive": (
+        ("get_last_consecutivo_by_document_type", "get_last_consecutive_by_document_type"),
+        0,
+        ("company_id", "document_type"),
+    ),
+    "set_last_consecutive": (
+        (
+            "set_last_consecutivo_by_document_type",
+            "update_last_consecutivo_by_document_type",
+            "set_last_consecutive_by_document_type",
+            "set_last_number_by_document_type",
+            "update_last_number_by_document_type",
+        ),
+        0,
+        ("company_id", "document_type", "consecutivo"),
+    ),
+}
+
+
+def _accepts(function, arg_count, keywords=()):
+    try:
+        signature = inspect.signature(function)
+    except (TypeError, ValueError):
+        # Signature not introspectable (C function, exotic wrapper): trust the keyword call.
+        return True
+    try:
+        signature.bind(None, *range(arg_count), **dict.fromkeys(keywords))
+    except TypeError:
+        return False
+    return True
+
+
+def resolve_capability(model_class, capability):
+    """Return ``(method_name, call_style, incompatible_names)`` for ``capability`` on ``model_class``.
+
+    ``method_name`` is ``None`` when no candidate exists with a compatible signature;
+    ``incompatible_names`` lists the candidates that exist but cannot take the call.
+    """
+    names, arg_count, keywords = BACKEND_CAPABILITIES[capability]
+    incompatible = []
+    for name in names:
+        function = getattr(model_class, name, None)
+        if not callable(function):
+            continue
+        if _accepts(function, arg_count, keywords):
+            return name, CALL_KWARGS, incompatible
+        if arg_count and _accepts(function, arg_count - 1, keywords):
+            return name, CALL_WITHOUT_ID, incompatible
+        if keywords and _accepts(function, arg_count + len(keywords)):
+            return name, CALL_POSITIONAL, incompatible
+        incompatible.append(name)
+    return None, None, incompatible
+
+
+def call_capability(target, capability, method_name, call_style, args=(), kwargs=None):
+    """Call the resolved ``method_name`` of ``target`` with the bridge arguments."""
+    kwargs = kwargs or {}
+    method = getattr(target, method_name)
+    if call_style == CALL_WITHOUT_ID:
+        return method(*args[1:], **kwargs)
+    if call_style == CALL_POSITIONAL:
+        keywords = BACKEND_CAPABILITIES[capability][2]
+        return method(*args, *(kwargs.get(keyword) for keyword in keywords))
+    return method(*args, **kwargs)
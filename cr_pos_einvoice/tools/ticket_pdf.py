@@ -0,0 +1,195 @@
+"""In-process 80mm POS ticket renderer (ReportLab).
+
+Draws the same content as ``cr_pos_einvoice.report_pos_order_ticket_cr`` directly
+to PDF, without spawning wkhtmltopdf. The renderer is Odoo-agnostic: it only
+receives the plain dict built by ``pos.order._cr_get_ticket_render_data``.
+"""
+
+import io
+import os
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+PAGE_WIDTH = 80 * mm
+MARGIN = 3 * mm
+FONT_SIZE = 8
+SMALL_FONT_SIZE = 6.5
+TITLE_FONT_SIZE = 9.5
+LINE_HEIGHT = 1.3
+QR_SIZE = 28 * mm
+
+_DEJAVU_PATHS = (
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/TTF",
+)
+_FONTS = None
+
+
+def _get_fonts():
+    """Return ``(regular, bold, unicode)``; DejaVu Sans when installed (same font as the QWeb ticket)."""
+    global _FONTS  # noqa: PLW0603
+    if _FONTS is not None:
+        return _FONTS
+    _FONTS = ("Helvetica", "Helvetica-Bold", False)
+    for directory in _DEJAVU_PATHS:
+        regular = os.path.join(directory, "DejaVuSans.ttf")
+        bold = os.path.join(directory, "DejaVuSans-Bold.ttf")
+        if os.path.exists(regular) and os.path.exists(bold):
+            pdfmetrics.registerFont(TTFont("CrTicketDejaVuSans", regular))
+            pdfmetrics.registerFont(TTFont("CrTicketDejaVuSans-Bold", bold))
+            _FONTS = ("CrTicketDejaVuSans", "CrTicketDejaVuSans-Bold", True)
+            break
+    return _FONTS
+
+
+class _TicketLayout:
+    """Two-pass layout: measure the ticket height first, then draw on a page of that height."""
+
+    def __init__(self, data):
+        self.data = data
+        self.regular, self.bold, self.unicode = _get_fonts()
+        self.width = PAGE_WIDTH - 2 * MARGIN
+        self.ops = []
+        self.y = 0.0
+
+    def text(self, value):
+        value = str(value or "")
+        if not self.unicode:
+            # Type 1 base fonts only cover WinAnsi; keep the ticket readable without DejaVu.
+            value = value.replace("₡", "CRC ").encode("cp1252", "replace").decode("cp1252")
+        return value
+
+    def _advance(self, size):
+        self.y += size * LINE_HEIGHT
+
+    def paragraph(self, value, *, bold=False, size=FONT_SIZE, align="left", label=None):
+        font = self.bold if bold else self.regular
+        value = self.text(value)
+        if label:
+            label = self.text(label)
+            label_width = pdfmetrics.stringWidth(label, self.bold, size)
+            lines = simpleSplit(value, font, size, max(self.width - label_width, 10 * mm))
+            for index, line in enumerate(lines or [""]):
+                self._advance(size)
+                if index == 0:
+                    self.ops.append(("text", self.bold, size, "left", 0.0, self.y, label))
+                self.ops.append(("text", font, size, "left", label_width, self.y, line))
+            return
+        for line in simpleSplit(value, font, size, self.width) or [""]:
+            self._advance(size)
+            self.ops.append(("text", font, size, align, 0.0, self.y, line))
+
+    def columns(self, left, right, *, bold=False, size=FONT_SIZE, middle=None):
+        """Row with a right-aligned amount; ``middle`` (product name) wraps between both columns."""
+        font = self.bold if bold else self.regular
+        left, right = self.text(left), self.text(right)
+        right_width = pdfmetrics.stringWidth(right, font, size) + 1.5 * mm
+        if middle is None:
+            self._advance(size)
+            self.ops.append(("text", font, size, "left", 0.0, self.y, left))
+            self.ops.append(("text", font, size, "right", self.width, self.y, right))
+            return
+        left_width = 8 * mm
+        lines = simpleSplit(self.text(middle), font, size, max(self.width - left_width - right_width, 10 * mm))
+        for index, line in enumerate(lines or [""]):
+            self._advance(size)
+            if index == 0:
+                self.ops.append(("text", font, size, "right", left_width - 1 * mm, self.y, left))
+                self.ops.append(("text", font, size, "right", self.width, self.y, right))
+            self.ops.append(("text", font, size, "left", left_width, self.y, line))
+
+    def rule(self):
+        self.y += 1.2 * mm
+        self.ops.append(("rule", self.y))
+        self.y += 0.4 * mm
+
+    def gap(self, height=1.5 * mm):
+        self.y += height
+
+    def qr(self, value):
+        self.gap()
+        self.ops.append(("qr", self.y, value))
+        self.y += QR_SIZE
+
+    def build(self):
+        data = self.data
+        self.paragraph(data.get("company_name"), bold=True, size=TITLE_FONT_SIZE, align="center")
+        for label, value in data.get("company_lines") or []:
+            self.paragraph(f"{label}: {value}", align="center")
+        self.gap()
+        for label, value in data.get("document_lines") or []:
+            self.paragraph(value, label=f"{label}: ")
+        self.gap()
+        self.paragraph("Datos del cliente", bold=True)
+        for label, value in data.get("customer_lines") or []:
+            self.paragraph(value, label=f"{label}: ")
+        self.rule()
+        self.columns("Cant.", "Importe", middle="Producto", bold=True)
+        for line in data.get("lines") or []:
+            self.columns(line["qty"], f"{line['amount']} {line['tax']}", middle=line["name"])
+        self.rule()
+        totals = data.get("totals") or []
+        for index, (label, value) in enumerate(totals):
+            self.columns(label, value, bold=index == len(totals) - 1)
+        if data.get("tax_summary"):
+            self.rule()
+            self.columns("Resumen de impuestos", "Impuesto", bold=True, size=SMALL_FONT_SIZE)
+            for label, base, tax in data["tax_summary"]:
+                self.columns(f"{label}  {base}", tax, size=SMALL_FONT_SIZE)
+        if data.get("other_charges"):
+            self.gap(0.8 * mm)
+            self.paragraph(data["other_charges"], label="Otros cargos: ")
+        if data.get("clave"):
+            self.gap()
+            self.paragraph(data["clave"], label="Clave: ", size=SMALL_FONT_SIZE)
+            for legend in data.get("legend") or []:
+                self.paragraph(legend, size=SMALL_FONT_SIZE)
+            self.qr(data["clave"])
+        self.gap()
+        return self.y
+
+    def draw(self, pdf, height):
+        top = height - MARGIN
+        for op in self.ops:
+            if op[0] == "text":
+                _kind, font, size, align, x, y, value = op
+                pdf.setFont(font, size)
+                baseline = top - y + size * (LINE_HEIGHT - 1)
+                if align == "center":
+                    pdf.drawCentredString(MARGIN + self.width / 2, baseline, value)
+                elif align == "right":
+                    pdf.drawRightString(MARGIN + x, baseline, value)
+                else:
+                    pdf.drawString(MARGIN + x, baseline, value)
+            elif op[0] == "rule":
+                pdf.setLineWidth(0.4)
+                pdf.setDash(1, 1)
+                pdf.line(MARGIN, top - op[1], MARGIN + self.width, top - op[1])
+                pdf.setDash()
+            elif op[0] == "qr":
+                widget = QrCodeWidget(op[2])
+                x1, y1, x2, y2 = widget.getBounds()
+                drawing = Drawing(QR_SIZE, QR_SIZE, transform=[QR_SIZE / (x2 - x1), 0, 0, QR_SIZE / (y2 - y1), 0, 0])
+                drawing.add(widget)
+                renderPDF.draw(drawing, pdf, MARGIN + (self.width - QR_SIZE) / 2, top - op[1] - QR_SIZE)
+
+
+def render_ticket_pdf(data):
+    """Render one 80mm ticket (page height fitted to the content) and return the PDF bytes."""
+    layout = _TicketLayout(data)
+    height = layout.build() + 2 * MARGIN
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, height), pageCompression=1)
+    pdf.setTitle(data.get("title") or "Ticket")
+    layout.draw(pdf, height)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
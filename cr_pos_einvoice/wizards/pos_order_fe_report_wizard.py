@@ -1,10 +1,15 @@
-import base64
+import os
 from datetime import datetime, time
-from io import BytesIO
 
 import pytz
 from odoo import _, fields, models
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+from ..models.pos_fe_daily_summary import REPORT_AMOUNT_FIELDS, SUMMARY_TZ
+
+# Orders read per keyset page by the XLSX export.
+REPORT_XLSX_CHUNK_SIZE = 2000
 
 
 class PosOrderFeReportWizard(models.TransientModel):
@@ -19,16 +24,13 @@ class PosOrderFeReportWizard(models.TransientModel):
         required=True,
         default="pdf",
     )
-    file_data = fields.Binary(string="Archivo", readonly=True)
-    file_name = fields.Char(string="Nombre archivo", readonly=True)
 
     def _build_report_domain(self):
         self.ensure_one()
         # Las fechas del asistente son locales al usuario; para filtrar por
         # date_order (UTC en base de datos) convertimos los límites exactos del
         # día local usando la zona horaria configurada.
-        user_tz_name = self.env.context.get("tz") or self.env.user.tz or "UTC"
-        user_tz = pytz.timezone(user_tz_name)
+        user_tz = pytz.timezone(self._get_report_tz_name())
         start_local = user_tz.localize(datetime.combine(self.date_from, time.min))
         end_local = user_tz.localize(datetime.combine(self.date_to, time.max.replace(microsecond=0)))
         start_utc = start_local.astimezone(pytz.UTC).replace(tzinfo=None)
@@ -53,44 +55,100 @@ class PosOrderFeReportWizard(models.TransientModel):
             return -1
         return 1
 
-    def _get_signed_report_amount(self, order, amount):
-        self.ensure_one()
-        return (amount or 0.0) * self._get_order_report_sign(order)
+    def _get_report_totals(self, orders=None):
+        """Signed report totals.
 
-    def _get_report_totals(self, orders):
+        ``None`` means the wizard range: read from the daily FE summary when the
+        report days are the summary days (Costa Rica time), otherwise aggregated
+        from the report orders. Recordsets are summed by a single aggregate query
+        on the stored amounts; any other iterable of order-like objects is summed
+        in Python.
+        """
         self.ensure_one()
-        totals = {
-            "exempt": 0.0,
-            "other_charges": 0.0,
-            "nonsubject": 0.0,
-            "exonerated": 0.0,
-            "taxable_1": 0.0,
-            "taxable_2": 0.0,
-            "taxable_4": 0.0,
-            "taxable_13": 0.0,
-            "tax": 0.0,
-            "total": 0.0,
-        }
+        if orders is None:
+            if self._get_report_tz_name() == SUMMARY_TZ:
+                return self._get_report_totals_summary()
+            return self._get_report_totals_sql(self._build_report_domain())
+        if isinstance(orders, models.BaseModel):
+            return self._get_report_totals_sql([("id", "in", orders.ids)])
+        totals = dict.fromkeys((key for key, _field, _minus in REPORT_AMOUNT_FIELDS), 0.0)
         for order in orders:
-            totals["exempt"] += self._get_signed_report_amount(order, self._get_order_report_exempt_amount(order))
-            totals["other_charges"] += self._get_signed_report_amount(order, self._get_order_report_other_charges_amount(order))
-            totals["nonsubject"] += self._get_signed_report_amount(order, order.cr_nonsubject_amount)
-            totals["exonerated"] += self._get_signed_report_amount(order, order.cr_exonerated_amount)
-            totals["taxable_1"] += self._get_signed_report_amount(order, order.cr_taxable_amount_1)
-            totals["taxable_2"] += self._get_signed_report_amount(order, order.cr_taxable_amount_2)
-            totals["taxable_4"] += self._get_signed_report_amount(order, order.cr_taxable_amount_4)
-            totals["taxable_13"] += self._get_signed_report_amount(order, order.cr_taxable_amount_13)
-            totals["tax"] += self._get_signed_report_amount(order, order.amount_tax)
-            totals["total"] += self._get_signed_report_amount(order, order.amount_total)
+            for key, amount in self._get_order_report_amounts(order).items():
+                totals[key] += amount
         return totals
 
-    def _get_order_report_other_charges_amount(self, order):
+    def _get_report_tz_name(self):
+        return self.env.context.get("tz") or self.env.user.tz or "UTC"
+
+    def _get_report_totals_summary(self):
         self.ensure_one()
-        return order.cr_other_charges_amount or 0.0
+        Summary = self.env["pos.fe.daily.summary"]
+        # Orders changed earlier in this transaction are not in the summary rows yet.
+        Summary._cr_flush_dirty()
+        keys = [key for key, _fname, _minus in REPORT_AMOUNT_FIELDS]
+        [row] = Summary._read_group(
+            [("date", ">=", self.date_from), ("date", "<=", self.date_to)],
+            aggregates=[f"{key}_amount:sum" for key in keys],
+        )
+        return {key: float(value or 0.0) for key, value in zip(keys, row)}
 
-    def _get_order_report_exempt_amount(self, order):
+    def _get_report_totals_sql(self, domain):
         self.ensure_one()
-        return (order.cr_exempt_amount or 0.0) - self._get_order_report_other_charges_amount(order)
+        Order = self.env["pos.order"]
+        Order.flush_model(
+            ["cr_fe_document_type"] + [fname for _key, fname, _minus in REPORT_AMOUNT_FIELDS]
+        )
+        query = Order._search(domain)
+
+        def amount_sql(fname):
+            return SQL("COALESCE(%s, 0)", Order._field_to_sql(query.table, fname, query))
+
+        sign = SQL(
+            "CASE WHEN %s = 'nc' OR %s < 0 THEN -1 ELSE 1 END",
+            Order._field_to_sql(query.table, "cr_fe_document_type", query),
+            amount_sql("amount_total"),
+        )
+        aggregates = []
+        for _key, fname, minus_fname in REPORT_AMOUNT_FIELDS:
+            amount = amount_sql(fname)
+            if minus_fname:
+                amount = SQL("%s - %s", amount, amount_sql(minus_fname))
+            aggregates.append(SQL("COALESCE(SUM(%s * (%s)), 0)", sign, amount))
+        self.env.cr.execute(query.select(*aggregates))
+        row = self.env.cr.fetchone() or ()
+        return {
+            key: float(value or 0.0)
+            for (key, _fname, _minus), value in zip(REPORT_AMOUNT_FIELDS, row)
+        }
+
+    def _get_order_report_amounts(self, order):
+        """Signed amounts of one order, keyed like the report totals."""
+        self.ensure_one()
+        sign = self._get_order_report_sign(order)
+        amounts = {}
+        for key, fname, minus_fname in REPORT_AMOUNT_FIELDS:
+            amount = getattr(order, fname, 0.0) or 0.0
+            if minus_fname:
+                amount -= getattr(order, minus_fname, 0.0) or 0.0
+            amounts[key] = sign * amount
+        return amounts
+
+    def _get_report_rows(self, orders):
+        """Rows shared by the PDF and XLSX outputs: the order, its labels and signed amounts."""
+        self.ensure_one()
+        order_fields = self.env["pos.order"]._fields
+        document_types = dict(order_fields["cr_fe_document_type"].selection)
+        statuses = dict(order_fields["cr_fe_status"].selection)
+        return [
+            {
+                "order": order,
+                "document_type": document_types.get(order.cr_fe_document_type, ""),
+                "document": order.cr_fe_consecutivo or order.name or "",
+                "status": statuses.get(order.cr_fe_status, ""),
+                "amounts": self._get_order_report_amounts(order),
+            }
+            for order in orders
+        ]
 
     def action_generate_report(self):
         self.ensure_one()
@@ -100,14 +158,56 @@ class PosOrderFeReportWizard(models.TransientModel):
             return self._action_generate_xlsx()
         return self.env.ref("cr_pos_einvoice.action_report_pos_order_fe_summary_wizard").report_action(self)
 
+    def _iter_report_order_chunks(self, chunk_size=REPORT_XLSX_CHUNK_SIZE):
+        """Yield the report orders in ``(date_order, id)`` keyset pages.
+
+        Each page is dropped from the cache before the next one is read, so memory
+        stays bounded by ``chunk_size`` whatever the date range.
+        """
+        self.ensure_one()
+        Order = self.env["pos.order"]
+        domain = self._build_report_domain()
+        page_domain = domain
+        while True:
+            orders = Order.search(page_domain, order="date_order asc, id asc", limit=chunk_size)
+            if not orders:
+                return
+            yield orders
+            if len(orders) < chunk_size:
+                return
+            last_date = fields.Datetime.to_string(orders[-1].date_order)
+            last_id = orders[-1].id
+            self.env.invalidate_all()
+            page_domain = domain + [
+                "|",
+                ("date_order", ">", last_date),
+                "&",
+                ("date_order", "=", last_date),
+                ("id", ">", last_id),
+            ]
+
+    def _get_report_xlsx_filename(self):
+        self.ensure_one()
+        return f"reporte_fe_pos_{self.date_from}_{self.date_to}.xlsx"
+
     def _action_generate_xlsx(self):
         self.ensure_one()
-        orders = self._get_report_orders()
+        return {
+            "type": "ir.actions.act_url",
+            "url": f"/cr_pos_einvoice/fe_report/{self.id}/xlsx",
+            "target": "self",
+        }
 
-        output = BytesIO()
+    def _write_report_xlsx(self, path):
+        """Write the XLSX report to ``path``.
+
+        Uses xlsxwriter ``constant_memory`` mode: rows are flushed to disk as they
+        are written, so only the current keyset page of orders is held in memory.
+        """
+        self.ensure_one()
         import xlsxwriter
 
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "tmpdir": os.path.dirname(path)})
         sheet = workbook.add_worksheet(_("Reporte FE POS")[:31])
 
         header_format = workbook.add_format({"bold": True, "bg_color": "#D9E1F2", "border": 1})
@@ -117,6 +217,9 @@ class PosOrderFeReportWizard(models.TransientModel):
         total_label_format = workbook.add_format({"bold": True, "bg_color": "#F2F2F2", "border": 1})
         total_amount_format = workbook.add_format({"bold": True, "bg_color": "#F2F2F2", "num_format": "#,##0.00", "border": 1})
 
+        sheet.set_column(0, 2, 22)
+        sheet.set_column(3, 13, 16)
+
         headers = [
             _("Fecha"),
             _("Tipo"),
@@ -138,52 +241,23 @@ class PosOrderFeReportWizard(models.TransientModel):
             sheet.write(0, col, header, header_format)
 
         row = 1
-        totals = self._get_report_totals(orders)
-        for order in orders:
-            sheet.write_datetime(row, 0, fields.Datetime.from_string(order.date_order), date_format)
-            sheet.write(row, 1, dict(order._fields["cr_fe_document_type"].selection).get(order.cr_fe_document_type, ""), text_format)
-            sheet.write(row, 2, order.cr_fe_consecutivo or order.name or "", text_format)
-            sheet.write_number(row, 3, self._get_signed_report_amount(order, self._get_order_report_exempt_amount(order)), amount_format)
-            sheet.write_number(row, 4, self._get_signed_report_amount(order, self._get_order_report_other_charges_amount(order)), amount_format)
-            sheet.write_number(row, 5, self._get_signed_report_amount(order, order.cr_nonsubject_amount), amount_format)
-            sheet.write_number(row, 6, self._get_signed_report_amount(order, order.cr_exonerated_amount), amount_format)
-            sheet.write_number(row, 7, self._get_signed_report_amount(order, order.cr_taxable_amount_1), amount_format)
-            sheet.write_number(row, 8, self._get_signed_report_amount(order, order.cr_taxable_amount_2), amount_format)
-            sheet.write_number(row, 9, self._get_signed_report_amount(order, order.cr_taxable_amount_4), amount_format)
-            sheet.write_number(row, 10, self._get_signed_report_amount(order, order.cr_taxable_amount_13), amount_format)
-            sheet.write_number(row, 11, self._get_signed_report_amount(order, order.amount_tax), amount_format)
-            sheet.write_number(row, 12, self._get_signed_report_amount(order, order.amount_total), amount_format)
-            sheet.write(row, 13, dict(order._fields["cr_fe_status"].selection).get(order.cr_fe_status, ""), text_format)
-            row += 1
+        amount_keys = [key for key, _fname, _minus in REPORT_AMOUNT_FIELDS]
+        for orders in self._iter_report_order_chunks():
+            for report_row in self._get_report_rows(orders):
+                sheet.write_datetime(row, 0, fields.Datetime.from_string(report_row["order"].date_order), date_format)
+                sheet.write(row, 1, report_row["document_type"], text_format)
+                sheet.write(row, 2, report_row["document"], text_format)
+                for col, key in enumerate(amount_keys, start=3):
+                    sheet.write_number(row, col, report_row["amounts"][key], amount_format)
+                sheet.write(row, 13, report_row["status"], text_format)
+                row += 1
 
+        totals = self._get_report_totals()
         sheet.write(row, 0, _("Totales"), total_label_format)
         sheet.write(row, 1, "", total_label_format)
         sheet.write(row, 2, "", total_label_format)
-        sheet.write_number(row, 3, totals["exempt"], total_amount_format)
-        sheet.write_number(row, 4, totals["other_charges"], total_amount_format)
-        sheet.write_number(row, 5, totals["nonsubject"], total_amount_format)
-        sheet.write_number(row, 6, totals["exonerated"], total_amount_format)
-        sheet.write_number(row, 7, totals["taxable_1"], total_amount_format)
-        sheet.write_number(row, 8, totals["taxable_2"], total_amount_format)
-        sheet.write_number(row, 9, totals["taxable_4"], total_amount_format)
-        sheet.write_number(row, 10, totals["taxable_13"], total_amount_format)
-        sheet.write_number(row, 11, totals["tax"], total_amount_format)
-        sheet.write_number(row, 12, totals["total"], total_amount_format)
+        for col, key in enumerate(amount_keys, start=3):
+            sheet.write_number(row, col, totals[key], total_amount_format)
         sheet.write(row, 13, "", total_label_format)
 
-        sheet.set_column(0, 2, 22)
-        sheet.set_column(3, 13, 16)
-
         workbook.close()
-        output.seek(0)
-
-        filename = f"reporte_fe_pos_{self.date_from}_{self.date_to}.xlsx"
-        self.write({
-            "file_name": filename,
-            "file_data": base64.b64encode(output.read()),
-        })
-        return {
-            "type": "ir.actions.act_url",
-            "url": f"/web/content?model={self._name}&id={self.id}&field=file_data&filename_field=file_name&download=true",
-            "target": "self",
-        }